@@ -0,0 +1,4 @@
+"""Load and latency benchmarks for the main routes, run against a synthetic law-firm dataset.
+
+See ``python -m benchmarks --help``.
+"""
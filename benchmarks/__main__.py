@@ -0,0 +1,111 @@
+"""Seed a benchmark database and measure the main routes against it.
+
+    python -m benchmarks seed --database sqlite:////tmp/bench.db --scale small
+    python -m benchmarks run --database sqlite:////tmp/bench.db --scale small \
+        --output benchmarks/baselines/sqlite-small.json
+    python -m benchmarks run --database postgresql://localhost/bench --scale small \
+        --compare benchmarks/baselines/postgresql-small.json
+    python -m benchmarks startup --database sqlite:////tmp/bench.db --runs 5
+
+``run --compare`` exits with status 1 when a route's p95 latency grows past the tolerance or it issues more queries
+than in the baseline. ``startup`` compares how long a forked gunicorn-style worker takes to serve its first page
+with and without the app preloaded in the parent (see benchmarks/startup.py); run it from the repository root, where
+``wsgi.py`` lives. Use a dedicated database: ``seed`` drops and recreates every table.
+"""
+import argparse
+import os
+import sys
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+
+def _configure(database, query_stats=True):
+    # The app reads its settings at import time, so they have to be in place before create_app runs.
+    os.environ["DATABASE1"] = database
+    os.environ.setdefault("APP_SECRET_KEY", "benchmark")
+    os.environ["QUERY_STATS_ENABLED"] = "true" if query_stats else "false"
+    os.environ["EMAIL_QUEUE_WORKERS"] = "0"
+
+
+def _create_app(database):
+    _configure(database)
+    from website import create_app
+    app = create_app()
+    app.config["WTF_CSRF_ENABLED"] = False
+    app.logger.disabled = True
+    return app
+
+
+def main(argv=None):
+    from .datagen import SCALES
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("seed", "run"):
+        command = commands.add_parser(name)
+        command.add_argument("--database", required=True, help="SQLAlchemy URL of a dedicated benchmark database")
+        command.add_argument("--scale", choices=sorted(SCALES), default="tiny")
+    commands.choices["seed"].add_argument("--seed", type=int, default=42)
+    run_parser = commands.choices["run"]
+    run_parser.add_argument("--requests", type=int, default=50, help="measured requests per route")
+    run_parser.add_argument("--warmup", type=int, default=5)
+    run_parser.add_argument("--output", help="write the results as a JSON baseline")
+    run_parser.add_argument("--compare", help="baseline JSON to compare against")
+    run_parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 growth, 0.2 = 20%%")
+    startup_parser = commands.add_parser("startup")
+    startup_parser.add_argument("--database", required=True, help="SQLAlchemy URL of a seeded benchmark database")
+    startup_parser.add_argument("--runs", type=int, default=5, help="workers forked per mode")
+    args = parser.parse_args(argv)
+
+    if args.command == "startup":
+        return _startup(args)
+    app = _create_app(args.database)
+    from website.db import db
+    from . import datagen, harness
+
+    with app.app_context():
+        if args.command == "seed":
+            db.drop_all()
+            db.create_all()
+            # create_all builds the head schema, so record it: a later ``flask db upgrade`` then has nothing to do.
+            from flask_migrate import stamp
+            stamp(directory=MIGRATIONS_DIR, revision="head")
+            datagen.seed(args.scale, args.seed)
+            # The rows go in with core inserts, which skip the flush hooks maintaining these two.
+            from website.dashboard import rebuild_case_stats
+            from website.search import rebuild_search_index, search_enabled
+            rebuild_case_stats()
+            if search_enabled():
+                rebuild_search_index()
+            return 0
+
+        counts = SCALES[args.scale]
+    results = harness.run(app, counts["cases"], counts["clients"], requests=args.requests, warmup=args.warmup)
+    with app.app_context():
+        data = harness.report(app, results, args.scale)
+    for name, stats in results.items():
+        print(f"{name:22} p50 {stats['p50_ms']:8.1f}ms  p95 {stats['p95_ms']:8.1f}ms  p99 {stats['p99_ms']:8.1f}ms  "
+              f"queries {stats['queries_max']}  status {stats['statuses']}")
+    if args.output:
+        harness.save(args.output, data)
+    if args.compare:
+        regressions = harness.compare(data, harness.load(args.compare), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+def _startup(args):
+    # Nothing of the app may be imported before the cold runs, so this runs without _create_app.
+    _configure(args.database, query_stats=False)
+    from . import startup
+    results = startup.run(args.runs)
+    for mode, stats in results.items():
+        print(f"{mode:10} boot {stats['boot_ms']:8.1f}ms  first page {stats['first_ms']:8.1f}ms  "
+              f"runs {stats['runs']}  status {stats['statuses']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import random
+from datetime import date, datetime, timedelta
+
+from passlib.handlers.pbkdf2 import pbkdf2_sha256
+
+from website.db import db
+from website.models import UserModel, ConfirmationModel, ClientModel, CaseModel, CaseAttorneyModel, CaseNoteModel, \
+    CaseHearingModel
+
+BENCH_EMAIL = "bench.admin@example.com"
+BENCH_PASSWORD = "bench-password"
+BATCH_SIZE = 5000
+
+# Row counts per table for each named scale.
+SCALES = {
+    "tiny": {"attorneys": 20, "clients": 200, "cases": 1000, "notes": 5000, "hearings": 3000, "attorneys_per_case": 3},
+    "small": {"attorneys": 100, "clients": 5000, "cases": 20000, "notes": 200000, "hearings": 200000,
+              "attorneys_per_case": 4},
+    "large": {"attorneys": 500, "clients": 50000, "cases": 200000, "notes": 2000000, "hearings": 2000000,
+              "attorneys_per_case": 6},
+}
+CASE_TYPES = ['Criminal', 'Civil', 'Commercial', 'Administrative', 'Bankruptcy', 'Environmental', 'Human Rights',
+              'Immigration', 'Consumer Protection', 'Tax', 'Military']
+ATTORNEY_TYPES = ["advocate", "associate", "lawyer", "intern", "admin"]
+FIRST_NAMES = ["Amina", "Brian", "Caro", "David", "Esther", "Felix", "Grace", "Hassan", "Irene", "James", "Kamau",
+               "Lucy", "Mercy", "Njeri", "Otieno", "Peter", "Rose", "Samuel", "Wanjiru", "Zawadi"]
+LAST_NAMES = ["Achieng", "Barasa", "Chebet", "Gitau", "Kariuki", "Kiprono", "Mugami", "Mutua", "Njoroge", "Odhiambo",
+              "Omondi", "Otieno", "Wafula", "Wambui", "Wekesa"]
+WORDS = ["land", "title", "deed", "contract", "breach", "appeal", "injunction", "custody", "estate", "tax", "tender",
+         "employment", "dismissal", "lease", "dispute", "fraud", "bail", "hearing", "mention", "ruling", "evidence",
+         "witness", "affidavit", "judgment", "settlement"]
+START_DATE = date(2018, 1, 1)
+
+
+def _insert(model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(db.insert(model), rows[start:start + BATCH_SIZE])
+
+
+def _sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _day(rng, span_days=2500):
+    return START_DATE + timedelta(days=rng.randrange(span_days))
+
+
+def seed(scale="tiny", seed_value=42, echo=print):
+    """Fill an empty database with a reproducible dataset of the given scale; the same seed yields the same rows.
+
+    Rows are written with batched executemany inserts, so the ORM flush hooks (search index, audit trail) do not
+    run; rebuild derived data afterwards where needed.
+    """
+    counts = SCALES[scale]
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    password = pbkdf2_sha256.hash(BENCH_PASSWORD)
+
+    users = [{"id": 1, "first_name": "Bench", "last_name": "Admin", "email": BENCH_EMAIL, "password": password,
+              "phone_no": "0700000000", "user_type": "super_admin", "is_active": True, "creation_date": now}]
+    for number in range(2, counts["attorneys"] + 2):
+        users.append({"id": number, "first_name": rng.choice(FIRST_NAMES), "last_name": rng.choice(LAST_NAMES),
+                      "email": f"attorney{number}@example.com", "password": password,
+                      "phone_no": f"07{number:08d}", "user_type": rng.choice(ATTORNEY_TYPES), "is_active": True,
+                      "creation_date": now})
+    _insert(UserModel, users)
+    confirmations = []
+    for user in users:
+        confirmation = ConfirmationModel(user["id"])
+        confirmations.append({"id": confirmation.id, "expire_at": confirmation.expire_at, "confirmed": True,
+                              "user_id": user["id"]})
+    _insert(ConfirmationModel, confirmations)
+    attorney_ids = [user["id"] for user in users]
+    echo(f"users: {len(users)}")
+
+    clients = []
+    for number in range(1, counts["clients"] + 1):
+        clients.append({"id": number, "first_name": rng.choice(FIRST_NAMES), "middle_name": rng.choice(FIRST_NAMES),
+                        "last_name": rng.choice(LAST_NAMES), "email": f"client{number}@example.com",
+                        "phone_no": f"01{number:08d}", "address": f"{rng.randrange(1, 999)} Moi Avenue",
+                        "identification_no": f"ID{number:09d}", "is_active": True, "is_archived": False,
+                        "date_created": now, "user_id": 1})
+    _insert(ClientModel, clients)
+    echo(f"clients: {len(clients)}")
+
+    cases, assignments = [], []
+    for number in range(1, counts["cases"] + 1):
+        filed = _day(rng)
+        cases.append({"id": number, "case_number": f"HC-{filed.year}-{number:07d}", "title": _sentence(rng, 4),
+                      "description": _sentence(rng, 20), "status": rng.choice(["open", "closed", "pending"]),
+                      "case_type": rng.choice(CASE_TYPES), "filed_date": filed,
+                      "court_date": filed + timedelta(days=rng.randrange(10, 400)),
+                      "priority": rng.choice(["high", "medium", "low"]), "date_created": now,
+                      "client_id": rng.randrange(1, counts["clients"] + 1), "user_id": rng.choice(attorney_ids)})
+        for user_id in rng.sample(attorney_ids, min(counts["attorneys_per_case"], len(attorney_ids))):
+            assignments.append({"case_id": number, "user_id": user_id})
+    _insert(CaseModel, cases)
+    _insert(CaseAttorneyModel, assignments)
+    echo(f"cases: {len(cases)}, assignments: {len(assignments)}")
+
+    for model, count, build in (
+            (CaseNoteModel, counts["notes"], lambda case_id: {
+                "case_id": case_id, "user_id": rng.choice(attorney_ids), "note": _sentence(rng, 30),
+                "date_created": now, "reference_date": datetime.combine(_day(rng), datetime.min.time())}),
+            (CaseHearingModel, counts["hearings"], lambda case_id: {
+                "case_id": case_id, "user_id": rng.choice(attorney_ids), "details": _sentence(rng, 15),
+                "description": _sentence(rng, 3), "date_created": now,
+                "hearing_date": datetime.combine(_day(rng), datetime.min.time()) + timedelta(hours=9)})):
+        rows = []
+        for _ in range(count):
+            rows.append(build(rng.randrange(1, counts["cases"] + 1)))
+            if len(rows) == BATCH_SIZE:
+                _insert(model, rows)
+                rows = []
+        _insert(model, rows)
+        echo(f"{model.__tablename__}: {count}")
+
+    if db.engine.dialect.name == "postgresql":
+        # Explicit ids leave the sequences behind; move them past the seeded rows.
+        for table in ("users", "clients", "cases"):
+            db.session.execute(db.text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                                       f"(SELECT MAX(id) FROM {table}))"))
+    db.session.commit()
+    return counts
@@ -0,0 +1,124 @@
+import json
+import platform
+import random
+import re
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+from .datagen import BENCH_EMAIL, BENCH_PASSWORD
+
+QUERY_COUNT = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def routes(rng, case_count, client_count):
+    """(name, method, url factory) for the benchmarked routes; factories pick random rows from the dataset."""
+    case_id = lambda: rng.randrange(1, case_count + 1)  # noqa: E731
+    return [
+        ("home_page", "GET", lambda: "/"),
+        ("calendar_events", "GET", lambda: "/calendar/events?start=2022-03-01&end=2022-04-12"),
+        ("all_cases", "GET", lambda: "/case/"),
+        ("all_cases_filtered", "GET", lambda: f"/case/?nameFilter=HC-{rng.randrange(2018, 2025)}"),
+        ("get_case", "GET", lambda: f"/case/{case_id()}"),
+        ("view_notes", "GET", lambda: f"/case/{case_id()}/notes"),
+        ("view_hearings", "GET", lambda: f"/case/case/{case_id()}/hearings"),
+        ("get_clients", "GET", lambda: "/client/"),
+        ("get_clients_filtered", "GET", lambda: "/client/?nameFilter=wanj"),
+        ("get_client", "GET", lambda: f"/client/{rng.randrange(1, client_count + 1)}"),
+        ("login", "POST", lambda: "/auth/login"),
+    ]
+
+
+def _percentile(samples, percent):
+    if len(samples) < 2:
+        return samples[0] if samples else None
+    return statistics.quantiles(samples, n=100, method="inclusive")[percent - 1]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(app, case_count, client_count, requests=50, warmup=5, seed_value=7):
+    """Drive the test client over every route and collect latency percentiles (ms) and query counts."""
+    rng = random.Random(seed_value)
+    client = app.test_client()
+    login = {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}
+    client.post("/auth/login", data=login)
+
+    results = {}
+    for name, method, url in routes(rng, case_count, client_count):
+        latencies, query_counts, db_times, statuses = [], [], [], set()
+        for number in range(warmup + requests):
+            started = time.perf_counter()
+            if method == "POST":
+                client.get("/auth/logout")
+                response = client.post(url(), data=login)
+            else:
+                response = client.get(url())
+            elapsed = (time.perf_counter() - started) * 1000
+            if number < warmup:
+                continue
+            latencies.append(elapsed)
+            statuses.add(response.status_code)
+            for header in response.headers.getlist("Server-Timing"):
+                match = QUERY_COUNT.match(header)
+                if match:
+                    db_times.append(float(match.group(1)))
+                    query_counts.append(int(match.group(2)))
+        results[name] = {
+            "requests": requests,
+            "statuses": sorted(statuses),
+            "p50_ms": round(_percentile(latencies, 50), 2),
+            "p95_ms": round(_percentile(latencies, 95), 2),
+            "p99_ms": round(_percentile(latencies, 99), 2),
+            "mean_ms": round(statistics.fmean(latencies), 2),
+            "queries_p50": _percentile(query_counts, 50) if query_counts else None,
+            "queries_max": max(query_counts) if query_counts else None,
+            "db_p50_ms": round(_percentile(db_times, 50), 2) if db_times else None,
+        }
+    return results
+
+
+def report(app, results, scale):
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "dialect": app.extensions["sqlalchemy"].engine.dialect.name,
+            "scale": scale,
+            "python": platform.python_version(),
+            "date": datetime.utcnow().isoformat(timespec="seconds"),
+        },
+        "routes": results,
+    }
+
+
+def compare(current, baseline, tolerance=0.2, min_delta_ms=2.0):
+    """Routes whose p95 latency grew more than ``tolerance`` (and ``min_delta_ms``) or that issue more queries."""
+    regressions = []
+    for name, stats in current["routes"].items():
+        before = baseline["routes"].get(name)
+        if not before:
+            continue
+        if stats["p95_ms"] > max(before["p95_ms"] * (1 + tolerance), before["p95_ms"] + min_delta_ms):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {stats['p95_ms']}ms")
+        if before["queries_max"] is not None and stats["queries_max"] is not None \
+                and stats["queries_max"] > before["queries_max"]:
+            regressions.append(f"{name}: queries {before['queries_max']} -> {stats['queries_max']}")
+    return regressions
+
+
+def load(path):
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def save(path, data):
+    with open(path, "w") as baseline_file:
+        json.dump(data, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write("\n")
@@ -0,0 +1,81 @@
+"""Worker boot time, cold and preloaded.
+
+Both modes fork children from this process, the way gunicorn starts its workers, and time each child from the fork
+until it has answered a first logged-in page:
+
+* cold: the parent has not imported the app, so every child imports ``wsgi`` (building the app and compiling the
+  templates) itself, as workers do without ``preload_app``;
+* preloaded: the parent imports ``wsgi`` once first and children only reset the inherited database connections.
+
+``boot_ms`` is the time until the worker could accept requests, ``first_ms`` adds logging in and rendering the home
+page. Cold runs go first because after the preload the parent cannot un-import the app.
+"""
+import json
+import os
+import statistics
+import time
+import traceback
+
+from .datagen import BENCH_EMAIL, BENCH_PASSWORD
+
+
+def _first_requests(app):
+    client = app.test_client()
+    client.post("/auth/login", data={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    return client.get("/").status_code
+
+
+def _child(write_fd, preloaded, started):
+    if preloaded:
+        from website.db import dispose_engines
+        from wsgi import app
+        dispose_engines(app)
+    else:
+        from wsgi import app
+    app.config["WTF_CSRF_ENABLED"] = False
+    booted = time.perf_counter()
+    status = _first_requests(app)
+    finished = time.perf_counter()
+    os.write(write_fd, json.dumps({"boot_ms": (booted - started) * 1000, "first_ms": (finished - started) * 1000,
+                                   "status": status}).encode())
+
+
+def _fork(preloaded):
+    read_fd, write_fd = os.pipe()
+    # Taken before the fork, so the samples include copying the parent, which grows with the preloaded app.
+    started = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        code = 0
+        try:
+            _child(write_fd, preloaded, started)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        output = pipe.read()
+    _, code = os.waitpid(pid, 0)
+    if code or not output:
+        raise RuntimeError(f"benchmark worker {pid} failed")
+    return json.loads(output)
+
+
+def _summary(samples):
+    return {
+        "runs": len(samples),
+        "boot_ms": round(statistics.median(sample["boot_ms"] for sample in samples), 1),
+        "first_ms": round(statistics.median(sample["first_ms"] for sample in samples), 1),
+        "statuses": sorted({sample["status"] for sample in samples}),
+    }
+
+
+def run(runs=5):
+    """``{"cold": {...}, "preloaded": {...}}`` with median boot and first-response times in ms."""
+    cold = [_fork(preloaded=False) for _ in range(runs)]
+    import wsgi  # noqa: F401  (the preload, as gunicorn's master does it)
+    preloaded = [_fork(preloaded=True) for _ in range(runs)]
+    return {"cold": _summary(cold), "preloaded": _summary(preloaded)}
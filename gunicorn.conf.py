@@ -0,0 +1,84 @@
+"""Gunicorn settings for production, read automatically when ``gunicorn`` starts in this directory.
+
+Multi-process, multi-threaded: ``GUNICORN_WORKERS`` processes of ``GUNICORN_THREADS`` threads each (gthread), so
+requests waiting on the database or SMTP do not hold a whole process. Each thread may hold a database connection,
+so keep ``DB_POOL_SIZE`` at least ``GUNICORN_THREADS`` and ``workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)`` below
+the server's connection limit.
+
+The app is preloaded in the master and forked, so workers share its memory and compiled templates and boot in a
+fraction of a cold start; ``python -m benchmarks startup`` measures both. Code changes therefore need a full restart
+(``kill -HUP`` only re-forks the loaded code). Every worker logs its boot time, and on exit how many requests it
+served; set ``GUNICORN_STATSD_HOST`` to also ship gunicorn's request and worker metrics to statsd.
+
+Workers keep their metrics samples in ``PROMETHEUS_MULTIPROC_DIR``, so every scrape of ``/metrics`` (served once
+``METRICS_TOKEN`` is set) reports all of them. Unless set, a fresh temporary directory is used per master and removed
+on shutdown; a directory given explicitly must be emptied before each start.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+wsgi_app = "wsgi:app"
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8080")
+worker_class = "gthread"
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+preload_app = True
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+# Recycle workers now and then so slow leaks cannot grow unbounded; the jitter keeps them from restarting together.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 500))
+# Heartbeat files on tmpfs, so a slow disk cannot make the master think workers hang.
+worker_tmp_dir = os.environ.get("GUNICORN_WORKER_TMP_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else None)
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+proc_name = "lawfirm"
+statsd_host = os.environ.get("GUNICORN_STATSD_HOST")
+statsd_prefix = os.environ.get("GUNICORN_STATSD_PREFIX", proc_name)
+
+# Must be in place before the app (and prometheus_client with it) is imported; reloads keep the first directory.
+if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix=f"{proc_name}-metrics-")
+    _own_metrics_dir = True
+
+
+def pre_fork(server, worker):
+    worker.forked_at = time.monotonic()
+
+
+def post_fork(server, worker):
+    from wsgi import app
+    from website.db import dispose_engines
+
+    dispose_engines(app)
+    worker.requests_served = 0
+
+
+def post_worker_init(worker):
+    worker.booted_at = time.monotonic()
+    worker.log.info("Worker %s ready in %.1fms", worker.pid, (worker.booted_at - worker.forked_at) * 1000)
+
+
+def post_request(worker, req, environ, resp):
+    # Under gthread this runs on several threads; the count is for the exit log, so a lost increment is harmless.
+    worker.requests_served += 1
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # Drops the worker's live gauges (in-flight requests, pool connections); its counters stay in the totals.
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if globals().get("_own_metrics_dir"):
+        shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+
+
+def worker_exit(server, worker):
+    uptime = time.monotonic() - getattr(worker, "booted_at", worker.forked_at)
+    worker.log.info("Worker %s exiting after %d requests in %.0fs", worker.pid, worker.requests_served, uptime)
@@ -0,0 +1,209 @@
+"""baseline schema
+
+The tables as they were before the project used migrations. A database created from those models with
+``create_all`` already has them: run ``flask db stamp 1d0c7e4b9a62`` once, then ``flask db upgrade``.
+
+Revision ID: 1d0c7e4b9a62
+Revises: 
+Create Date: 2026-10-18 13:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1d0c7e4b9a62'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('roles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=20), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('update_date', sa.DateTime(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('creation_date', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('first_name', sa.String(length=80), nullable=False),
+    sa.Column('last_name', sa.String(length=80), nullable=False),
+    sa.Column('email', sa.String(length=80), nullable=False),
+    sa.Column('password', sa.String(length=200), nullable=False),
+    sa.Column('phone_no', sa.String(length=200), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('image', sa.String(length=200), nullable=True),
+    sa.Column('is_archived', sa.Boolean(), nullable=True),
+    sa.Column('last_login', sa.DateTime(), nullable=True),
+    sa.Column('date_registered', sa.DateTime(), nullable=True),
+    sa.Column('date_archived', sa.DateTime(), nullable=True),
+    sa.Column('date_unarchived', sa.DateTime(), nullable=True),
+    sa.Column('update_date', sa.DateTime(), nullable=True),
+    sa.Column('creation_date', sa.DateTime(), nullable=True),
+    sa.Column('user_type', sa.Enum('admin', 'super_admin', 'advocate', 'associate', 'intern', 'lawyer', 'client',
+                                   'secretary', name='user_type'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('phone_no')
+    )
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_email'), ['email'], unique=True)
+
+    op.create_table('clients',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('first_name', sa.String(length=80), nullable=False),
+    sa.Column('middle_name', sa.String(length=80), nullable=True),
+    sa.Column('last_name', sa.String(length=80), nullable=False),
+    sa.Column('email', sa.String(length=80), nullable=True),
+    sa.Column('phone_no', sa.String(length=80), nullable=False),
+    sa.Column('address', sa.String(length=200), nullable=False),
+    sa.Column('identification_no', sa.String(length=200), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_archived', sa.Boolean(), nullable=True),
+    sa.Column('client_date', sa.DateTime(), nullable=True),
+    sa.Column('date_created', sa.DateTime(), nullable=True),
+    sa.Column('last_updated', sa.DateTime(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('identification_no')
+    )
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_clients_email'), ['email'], unique=True)
+        batch_op.create_index(batch_op.f('ix_clients_phone_no'), ['phone_no'], unique=True)
+
+    op.create_table('confirmations',
+    sa.Column('id', sa.String(length=50), nullable=False),
+    sa.Column('expire_at', sa.Integer(), nullable=False),
+    sa.Column('confirmed', sa.Boolean(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('cases',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('case_number', sa.String(length=80), nullable=False),
+    sa.Column('title', sa.String(length=120), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('status', sa.Enum('open', 'closed', 'pending', name='status_type'), nullable=False),
+    sa.Column('case_type', sa.Enum('Criminal', 'Civil', 'Commercial', 'Administrative', 'Bankruptcy', 'Environmental',
+                                   'Human Rights', 'Immigration', 'Consumer Protection', 'Tax', 'Military',
+                                   name='case_types'), nullable=False),
+    sa.Column('case_description', sa.Text(), nullable=True),
+    sa.Column('filed_date', sa.Date(), nullable=False),
+    sa.Column('court_date', sa.Date(), nullable=True),
+    sa.Column('resolution_date', sa.Date(), nullable=True),
+    sa.Column('resolution', sa.String(length=200), nullable=True),
+    sa.Column('priority', sa.Enum('high', 'medium', 'low', name='priority_type'), nullable=False),
+    sa.Column('date_created', sa.DateTime(), nullable=True),
+    sa.Column('last_updated', sa.DateTime(), nullable=True),
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['client_id'], ['clients.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('cases', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_cases_case_number'), ['case_number'], unique=True)
+
+    op.create_table('case_attachments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(length=200), nullable=False),
+    sa.Column('attachment_filename', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.String(length=200), nullable=False),
+    sa.Column('file_url', sa.String(length=200), nullable=False),
+    sa.Column('uploaded_at', sa.DateTime(), nullable=True),
+    sa.Column('case_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('last_updated', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['case_id'], ['cases.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('case_attorneys',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('case_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['case_id'], ['cases.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('case_id', 'user_id')
+    )
+    op.create_table('case_details',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('judge_name', sa.String(length=120), nullable=False),
+    sa.Column('court_type', sa.Enum('supreme court of kenya', 'court of appeal', 'high court',
+                                    'employment and labour relations court', 'environment and land court',
+                                    'magistrates court', "kadhi's court", 'courts martial', 'tribunal',
+                                    name='court_types'), nullable=False),
+    sa.Column('court_location', sa.String(length=200), nullable=True),
+    sa.Column('court_description', sa.String(length=200), nullable=True),
+    sa.Column('case_judgment', sa.Text(), nullable=True),
+    sa.Column('case_outcome', sa.String(length=120), nullable=True),
+    sa.Column('assigned_prosecutor', sa.String(length=120), nullable=True),
+    sa.Column('evidence_details', sa.Text(), nullable=True),
+    sa.Column('date_created', sa.DateTime(), nullable=True),
+    sa.Column('last_updated', sa.DateTime(), nullable=True),
+    sa.Column('case_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['case_id'], ['cases.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('case_hearing',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('hearing_date', sa.DateTime(), nullable=False),
+    sa.Column('next_hearing_date', sa.DateTime(), nullable=True),
+    sa.Column('description', sa.String(length=200), nullable=True),
+    sa.Column('details', sa.Text(), nullable=False),
+    sa.Column('date_created', sa.DateTime(), nullable=True),
+    sa.Column('last_updated', sa.DateTime(), nullable=True),
+    sa.Column('case_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['case_id'], ['cases.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('case_notes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('case_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('note', sa.Text(), nullable=False),
+    sa.Column('date_created', sa.DateTime(), nullable=True),
+    sa.Column('last_updated', sa.DateTime(), nullable=True),
+    sa.Column('reference_date', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['case_id'], ['cases.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('case_notes')
+    op.drop_table('case_hearing')
+    op.drop_table('case_details')
+    op.drop_table('case_attorneys')
+    op.drop_table('case_attachments')
+    with op.batch_alter_table('cases', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_cases_case_number'))
+
+    op.drop_table('cases')
+    op.drop_table('confirmations')
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_clients_phone_no'))
+        batch_op.drop_index(batch_op.f('ix_clients_email'))
+
+    op.drop_table('clients')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_email'))
+
+    op.drop_table('users')
+    op.drop_table('roles')
+    for name in ('court_types', 'priority_type', 'case_types', 'status_type', 'user_type'):
+        sa.Enum(name=name).drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,34 @@
+"""attachment hashes
+
+Content hash and size of each attachment, so identical uploads share one stored blob. Rows from before this
+revision keep NULLs and their own per-case files.
+
+Revision ID: 3f1a9c2d7e10
+Revises: 2c9e7b1f4a03
+Create Date: 2026-10-18 13:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c2d7e10'
+down_revision = '2c9e7b1f4a03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('case_attachments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sha256', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('size', sa.BigInteger(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_case_attachments_sha256'), ['sha256'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('case_attachments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_case_attachments_sha256'))
+        batch_op.drop_column('size')
+        batch_op.drop_column('sha256')
+
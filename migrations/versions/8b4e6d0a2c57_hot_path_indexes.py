@@ -0,0 +1,42 @@
+"""hot path indexes
+
+Indexes matching the filter and sort of each listing and lookup: case notes, hearings and attachments by case in
+display order, cases by client and creator, assignments by attorney and the latest confirmation per user.
+
+Revision ID: 8b4e6d0a2c57
+Revises: 3f1a9c2d7e10
+Create Date: 2026-10-18 13:16:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e6d0a2c57'
+down_revision = '3f1a9c2d7e10'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_case_notes_case_id_reference_date', 'case_notes', ['case_id', sa.text('reference_date DESC'), 'id']),
+    ('ix_case_hearing_case_id_hearing_date', 'case_hearing', ['case_id', 'hearing_date', 'id']),
+    ('ix_case_hearing_hearing_date', 'case_hearing', ['hearing_date']),
+    ('ix_case_hearing_next_hearing_date', 'case_hearing', ['next_hearing_date']),
+    ('ix_case_attachments_case_id_uploaded_at', 'case_attachments', ['case_id', sa.text('uploaded_at DESC'), 'id']),
+    ('ix_case_attorneys_user_id_case_id', 'case_attorneys', ['user_id', 'case_id']),
+    ('ix_cases_client_id_case_number', 'cases', ['client_id', 'case_number']),
+    ('ix_cases_user_id', 'cases', ['user_id']),
+    ('ix_case_details_case_id', 'case_details', ['case_id']),
+    ('ix_confirmations_user_id_expire_at', 'confirmations', ['user_id', sa.text('expire_at DESC')]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,35 @@
+"""hearing reminders
+
+Ledger of the hearing digests queued per attorney and window, written by ``flask reminders send``.
+
+Revision ID: a9d3e5f7c218
+Revises: f4c8a1d6b372
+Create Date: 2026-10-18 15:55:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d3e5f7c218'
+down_revision = 'f4c8a1d6b372'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('hearing_reminders',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('window_start', sa.Date(), nullable=False),
+    sa.Column('hearings', sa.Integer(), nullable=False),
+    sa.Column('outbox_id', sa.Integer(), nullable=True),
+    sa.Column('date_created', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['outbox_id'], ['email_outbox.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'window_start')
+    )
+
+
+def downgrade():
+    op.drop_table('hearing_reminders')
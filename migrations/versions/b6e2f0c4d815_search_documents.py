@@ -0,0 +1,58 @@
+"""search documents
+
+The full-text index behind website/search.py (an FTS5 table on SQLite, a tsvector column with a GIN index on
+PostgreSQL), backfilled from the current cases, clients and notes. Later changes are indexed by the flush hook;
+``flask search rebuild`` recomputes it. Other databases get no table and search falls back to the LIKE filters.
+
+Revision ID: b6e2f0c4d815
+Revises: a9d3e5f7c218
+Create Date: 2026-10-18 18:10:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e2f0c4d815'
+down_revision = 'a9d3e5f7c218'
+branch_labels = None
+depends_on = None
+
+SCHEMA = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE search_documents USING fts5("
+        "entity UNINDEXED, entity_id UNINDEXED, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    ],
+    'postgresql': [
+        "CREATE TABLE search_documents ("
+        "doc_id BIGINT PRIMARY KEY, entity VARCHAR(20) NOT NULL, entity_id INTEGER NOT NULL, body TEXT NOT NULL, "
+        "document TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED)",
+        "CREATE INDEX ix_search_documents_document ON search_documents USING gin (document)",
+    ],
+}
+KEY_COLUMN = {'sqlite': 'rowid', 'postgresql': 'doc_id'}
+# Same order as website.search.SEARCHABLE: a document's key is entity_id * 3 + the entity's position.
+BACKFILL = [
+    ('case', 'cases', ('case_number', 'title', 'description')),
+    ('client', 'clients', ('first_name', 'middle_name', 'last_name', 'email')),
+    ('note', 'case_notes', ('note',)),
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect not in SCHEMA:
+        return
+    # Earlier versions created the table on first use; it only holds derived rows, so start over from the backfill.
+    op.execute("DROP TABLE IF EXISTS search_documents")
+    for statement in SCHEMA[dialect]:
+        op.execute(statement)
+    for position, (entity, table, columns) in enumerate(BACKFILL):
+        body = " || ' ' || ".join(f"COALESCE(CAST({column} AS TEXT), '')" for column in columns)
+        op.execute(f"INSERT INTO search_documents ({KEY_COLUMN[dialect]}, entity, entity_id, body) "
+                   f"SELECT id * {len(BACKFILL)} + {position}, '{entity}', id, {body} FROM {table}")
+
+
+def downgrade():
+    if op.get_bind().dialect.name in SCHEMA:
+        op.execute("DROP TABLE IF EXISTS search_documents")
@@ -0,0 +1,35 @@
+"""lookup prefix indexes
+
+Expression indexes on lower(first_name), lower(last_name) and lower(email) of clients and users for the typeahead
+lookups. On PostgreSQL they use text_pattern_ops so ``LIKE 'prefix%'`` can use them whatever the collation.
+
+Revision ID: c5d2e8f1a934
+Revises: 8b4e6d0a2c57
+Create Date: 2026-10-18 14:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d2e8f1a934'
+down_revision = '8b4e6d0a2c57'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    (f'ix_{table}_lower_{column}', table, column)
+    for table in ('clients', 'users') for column in ('first_name', 'last_name', 'email')
+]
+
+
+def upgrade():
+    pattern_ops = ' text_pattern_ops' if op.get_bind().dialect.name == 'postgresql' else ''
+    for name, table, column in INDEXES:
+        op.create_index(name, table, [sa.text(f'lower({column}){pattern_ops}')], unique=False)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,40 @@
+"""case_notes.reference_date not null
+
+The notes listing pages on (reference_date, id), which needs a value in every row: notes without a reference date
+take their creation time.
+
+Revision ID: c8f1d3a5e927
+Revises: b6e2f0c4d815
+Create Date: 2026-10-18 18:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8f1d3a5e927'
+down_revision = 'b6e2f0c4d815'
+branch_labels = None
+depends_on = None
+
+
+# SQLite copies the table to change the column, and would recreate this index without its DESC.
+INDEX = ('ix_case_notes_case_id_reference_date', 'case_notes', ['case_id', sa.text('reference_date DESC'), 'id'])
+
+
+def _set_nullable(nullable):
+    op.drop_index(INDEX[0], table_name=INDEX[1])
+    with op.batch_alter_table('case_notes', schema=None) as batch_op:
+        batch_op.alter_column('reference_date', existing_type=sa.DateTime(), nullable=nullable)
+    op.create_index(*INDEX, unique=False)
+
+
+def upgrade():
+    op.execute("UPDATE case_notes SET reference_date = COALESCE(date_created, CURRENT_TIMESTAMP) "
+               "WHERE reference_date IS NULL")
+    _set_nullable(False)
+
+
+def downgrade():
+    _set_nullable(True)
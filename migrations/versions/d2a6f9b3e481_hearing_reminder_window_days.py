@@ -0,0 +1,38 @@
+"""hearing_reminders.window_days
+
+Reminder windows are keyed by their first day and their length, so ``flask reminders send --days`` with a longer
+window than an earlier run on the same day is not skipped. Rows queued before this revision used the default
+HEARING_REMINDER_DAYS of 7.
+
+Revision ID: d2a6f9b3e481
+Revises: c8f1d3a5e927
+Create Date: 2026-10-18 19:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a6f9b3e481'
+down_revision = 'c8f1d3a5e927'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The table is copied on every backend, which is the one portable way to change a primary key.
+    with op.batch_alter_table('hearing_reminders', schema=None, recreate='always') as batch_op:
+        batch_op.add_column(sa.Column('window_days', sa.Integer(), nullable=False, server_default='7'))
+        batch_op.create_primary_key('pk_hearing_reminders', ['user_id', 'window_start', 'window_days'])
+
+
+def downgrade():
+    # Several lengths may have been sent for one day; keep one row per attorney and day.
+    op.execute("DELETE FROM hearing_reminders WHERE EXISTS (SELECT 1 FROM hearing_reminders AS other "
+               "WHERE other.user_id = hearing_reminders.user_id "
+               "AND other.window_start = hearing_reminders.window_start "
+               "AND other.window_days < hearing_reminders.window_days)")
+    with op.batch_alter_table('hearing_reminders', schema=None, recreate='always') as batch_op:
+        batch_op.create_primary_key('pk_hearing_reminders', ['user_id', 'window_start'])
+        batch_op.drop_column('window_days')
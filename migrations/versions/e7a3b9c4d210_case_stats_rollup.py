@@ -0,0 +1,45 @@
+"""case stats rollup
+
+The case_stats table behind the dashboard, backfilled from the current cases, assignments and hearings. Later
+changes are applied incrementally by the flush hooks in website/dashboard.py; ``flask stats rebuild`` recomputes it.
+
+Revision ID: e7a3b9c4d210
+Revises: c5d2e8f1a934
+Create Date: 2026-10-18 14:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3b9c4d210'
+down_revision = 'c5d2e8f1a934'
+branch_labels = None
+depends_on = None
+
+BACKFILL = [
+    ('status', 'status', 'cases'),
+    ('case_type', 'case_type', 'cases'),
+    ('priority', 'priority', 'cases'),
+    ('client', 'client_id', 'cases'),
+    ('attorney', 'user_id', 'case_attorneys'),
+    ('hearing_day', 'date(hearing_date)', 'case_hearing'),
+]
+
+
+def upgrade():
+    op.create_table('case_stats',
+                    sa.Column('dimension', sa.String(length=20), nullable=False),
+                    sa.Column('key', sa.String(length=80), nullable=False),
+                    sa.Column('count', sa.Integer(), nullable=False),
+                    sa.PrimaryKeyConstraint('dimension', 'key')
+                    )
+    for dimension, expression, table in BACKFILL:
+        op.execute(f"INSERT INTO case_stats (dimension, key, count) "
+                   f"SELECT '{dimension}', CAST({expression} AS VARCHAR(80)), COUNT(*) FROM {table} "
+                   f"WHERE {expression} IS NOT NULL GROUP BY {expression}")
+
+
+def downgrade():
+    op.drop_table('case_stats')
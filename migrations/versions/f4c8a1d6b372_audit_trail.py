@@ -0,0 +1,41 @@
+"""audit trail
+
+Append-only audit_trail table written in batches by website/audit.py.
+
+Revision ID: f4c8a1d6b372
+Revises: e7a3b9c4d210
+Create Date: 2026-10-18 15:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c8a1d6b372'
+down_revision = 'e7a3b9c4d210'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('audit_trail',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('action', sa.Enum('insert', 'update', 'delete', name='audit_action'), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('changes', sa.JSON(), nullable=False),
+    sa.Column('ts', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('audit_trail', schema=None) as batch_op:
+        batch_op.create_index('ix_audit_trail_entity_entity_id_ts', ['entity', 'entity_id', 'ts'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('audit_trail', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_trail_entity_entity_id_ts')
+
+    op.drop_table('audit_trail')
+    sa.Enum(name='audit_action').drop(op.get_bind(), checkfirst=True)
@@ -1,12 +1,28 @@
+from . import env  # noqa: F401  (loads .env before anything reads its settings)
+
 from flask import Flask, render_template
 from flask_cors import CORS
 from flask_login import LoginManager, current_user
 from flask_migrate import Migrate
 from flask_uploads import configure_uploads
 
-from .db import db
+from .attachments import attachments_cli
+from .audit import audit_trail
+from .bulk_import import import_cli
+from .dashboard import init_dashboard
+from .db import db, init_unit_of_work, init_engines, init_replicas
+from .email_queue import email_queue
+from .index_check import indexes_cli
+from .libs.query_stats import init_query_stats
+from .libs.template_cache import init_template_cache
+from .libs.user_cache import user_cache
+from .metrics import metrics
 from .models import UserModel
 from .photos import photos, attachments
+from .reminders import reminders_cli
+from .search import init_search
+from .static_assets import static_assets
+from .thumbnails import thumbnails
 
 migrate = Migrate()
 cors = CORS()
@@ -16,18 +32,38 @@ login_manager = LoginManager()
 def create_app():
     app = Flask(__name__, template_folder="templates", static_folder="static")
     app.config.from_pyfile("config.py")
+    init_engines(app)
     db.init_app(app)
+    init_unit_of_work(app)
+    init_replicas(app)
+    if app.config.get("QUERY_STATS_ENABLED"):
+        init_query_stats(app)
 
     migrate.init_app(app=app, db=db)
+    init_search(app)
+    init_dashboard(app)
+    audit_trail.init_app(app)
+    email_queue.init_app(app)
+    app.cli.add_command(indexes_cli)
+    app.cli.add_command(import_cli)
+    app.cli.add_command(reminders_cli)
+    app.cli.add_command(attachments_cli)
     cors.init_app(app, resources={r"*": {"origins": "*"}})
     login_manager.init_app(app)
     configure_uploads(app, photos)
     configure_uploads(app, attachments)
+    static_assets.init_app(app)
+    thumbnails.init_app(app)
+    init_template_cache(app)
+    metrics.init_app(app)
     login_manager.login_view = 'auth_blp.login'
+    user_cache.configure(enabled=app.config.get("USER_CACHE_ENABLED", True),
+                         max_size=app.config.get("USER_CACHE_SIZE", 1024),
+                         ttl=app.config.get("USER_CACHE_TTL", 60))
 
     @login_manager.user_loader
     def load_user(id):
-        return UserModel.query.get(int(id))
+        return user_cache.get(int(id), UserModel.find_session_fields)
 
     @app.errorhandler(404)
     def page_not_found(e):
@@ -41,9 +77,10 @@ def create_app():
     def server_error(e):
         return render_template('500.html', user=current_user), 500
 
-    from .paths import home_blp, auth_blp, client_blp, case_blp
+    from .paths import home_blp, auth_blp, client_blp, case_blp, search_blp
     app.register_blueprint(home_blp)
     app.register_blueprint(auth_blp, url_prefix="/auth")
     app.register_blueprint(client_blp, url_prefix="/client")
     app.register_blueprint(case_blp, url_prefix="/case")
+    app.register_blueprint(search_blp, url_prefix="/search")
     return app
@@ -0,0 +1,24 @@
+import click
+from flask import current_app
+
+from .libs.attachment_store import collect_garbage
+from .models import CaseAttachmentModel
+
+
+@click.group("attachments")
+def attachments_cli():
+    """Attachment storage commands."""
+
+
+@attachments_cli.command("gc")
+@click.option("--min-age", type=int, default=3600, show_default=True,
+              help="Seconds an unreferenced blob is kept, so uploads still being saved are not removed.")
+@click.option("--dry-run", is_flag=True, help="Only list what would be removed.")
+def gc_command(min_age, dry_run):
+    """Remove stored blobs no attachment references any more, e.g. replaced files and failed uploads."""
+    referenced = CaseAttachmentModel.referenced_hashes()
+    root = current_app.config["UPLOADED_ATTACHMENTS_DEST"]
+    removed = collect_garbage(root, referenced, min_age, dry_run=dry_run)
+    for path in removed:
+        click.echo(path)
+    click.echo(f"{'Would remove' if dry_run else 'Removed'} {len(removed)} unreferenced files.")
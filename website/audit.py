@@ -0,0 +1,255 @@
+import atexit
+import threading
+from collections import deque
+from datetime import date, datetime
+from decimal import Decimal
+from functools import partial
+
+import click
+from flask import current_app, has_request_context
+from flask_login import current_user
+from sqlalchemy import event, inspect
+
+from .db import db, after_commit
+from .models import AuditTrailModel, CaseModel, CaseNoteModel, CaseAttachmentModel, ClientModel
+
+# Entity name -> audited model. Every insert, update and delete of these rows gets an ``audit_trail`` entry.
+AUDITED = {
+    "case": CaseModel,
+    "note": CaseNoteModel,
+    "attachment": CaseAttachmentModel,
+    "client": ClientModel,
+}
+# Touched by every ``update_db``; recording it would turn each no-op save into an entry.
+IGNORED_COLUMNS = ("last_updated",)
+_ENTITIES = {model: entity for entity, model in AUDITED.items()}
+_PENDING = "audit_pending"
+_MISSING = object()
+_listeners_installed = False
+
+
+def _json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _columns(model):
+    return [attr.key for attr in inspect(model).column_attrs if attr.key not in IGNORED_COLUMNS]
+
+
+def _acting_user_id():
+    if has_request_context() and current_user.is_authenticated:
+        return current_user.id
+    return None
+
+
+def _entry(entity, entity_id, action, changes, user_id):
+    return {"entity": entity, "entity_id": entity_id, "action": action, "user_id": user_id, "changes": changes,
+            "ts": datetime.utcnow()}
+
+
+def _update_changes(session, objects):
+    """``{obj: {column: [old, new]}}`` for the dirty ``objects`` of one model.
+
+    Attributes that were expired by an earlier commit and then overwritten carry no old value in their history; those
+    are read back in a single query for the whole model rather than one per object.
+    """
+    changes, unknown = {}, {}
+    for obj in objects:
+        state = inspect(obj)
+        for column in _columns(type(obj)):
+            history = state.attrs[column].history
+            if not history.has_changes():
+                continue
+            old = history.deleted[0] if history.deleted else _MISSING
+            new = history.added[0] if history.added else None
+            changes.setdefault(obj, {})[column] = [old, new]
+            if old is _MISSING:
+                unknown.setdefault(obj.id, set()).add(column)
+    if unknown:
+        model = type(objects[0])
+        needed = sorted(set().union(*unknown.values()))
+        stored = {row.id: row for row in session.query(model.id, *[getattr(model, column) for column in needed])
+                  .filter(model.id.in_(unknown))}
+        for obj, columns in changes.items():
+            for column in unknown.get(obj.id, ()):
+                columns[column][0] = getattr(stored[obj.id], column) if obj.id in stored else None
+    return {obj: {column: [_json(old), _json(new)] for column, (old, new) in columns.items() if old != new}
+            for obj, columns in changes.items()}
+
+
+def _collect_changes(session, flush_context, instances):
+    """Diff dirty and deleted rows while their stored values can still be read; inserts wait for their ids."""
+    pending = session.info.setdefault(_PENDING, {"user_id": None, "inserted": [], "entries": []})
+    with session.no_autoflush:
+        pending["user_id"] = user_id = _acting_user_id()
+        pending["inserted"] += [obj for obj in session.new if type(obj) in _ENTITIES]
+        dirty = {}
+        for obj in session.dirty:
+            if type(obj) in _ENTITIES and session.is_modified(obj, include_collections=False):
+                dirty.setdefault(type(obj), []).append(obj)
+        for model, objects in dirty.items():
+            for obj, changes in _update_changes(session, objects).items():
+                if changes:
+                    pending["entries"].append(_entry(_ENTITIES[model], obj.id, "update", changes, user_id))
+        for obj in session.deleted:
+            if type(obj) in _ENTITIES:
+                state = inspect(obj)
+                changes = {}
+                for column in _columns(type(obj)):
+                    history = state.attrs[column].history
+                    old = history.deleted[0] if history.deleted else getattr(obj, column)
+                    changes[column] = [_json(old), None]
+                pending["entries"].append(_entry(_ENTITIES[type(obj)], obj.id, "delete", changes, user_id))
+
+
+def _stage_changes(session, flush_context):
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    entries = pending["entries"]
+    for obj in pending["inserted"]:
+        changes = {column: [None, _json(getattr(obj, column))] for column in _columns(type(obj))}
+        entries.append(_entry(_ENTITIES[type(obj)], obj.id, "insert", changes, pending["user_id"]))
+    if entries:
+        after_commit(partial(audit_trail.record, entries))
+
+
+def _discard_changes(session, previous_transaction):
+    session.info.pop(_PENDING, None)
+
+
+def audit_inserts(entity, rows, user_id=None):
+    """Record rows inserted with core statements, which bypass the flush hooks; ``rows`` must include ``id``."""
+    if not current_app.config.get("AUDIT_ENABLED", True):
+        return
+    columns = _columns(AUDITED[entity])
+    entries = [_entry(entity, row["id"], "insert", {column: [None, _json(row.get(column))] for column in columns},
+                      user_id) for row in rows]
+    if entries:
+        after_commit(partial(audit_trail.record, entries))
+
+
+class AuditTrail:
+    """Buffers committed audit entries in memory and writes them to ``audit_trail`` in batched inserts.
+
+    A background thread drains the buffer every ``AUDIT_FLUSH_SECONDS``, or as soon as ``AUDIT_BATCH_SIZE``
+    entries are waiting, so requests never wait on the audit insert. When the buffer reaches ``AUDIT_MAX_BUFFER``
+    the recording request writes it itself, which bounds memory if the writer falls behind. Whatever is still
+    buffered is written when the process exits. With ``AUDIT_WRITE_BEHIND`` off entries are written straight after
+    each commit.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        global _listeners_installed
+        self.app = app
+        app.extensions["audit_trail"] = self
+        app.cli.add_command(audit_cli)
+        if not app.config.get("AUDIT_ENABLED", True):
+            return
+        if not _listeners_installed:
+            event.listen(db.session, "before_flush", _collect_changes)
+            event.listen(db.session, "after_flush", _stage_changes)
+            event.listen(db.session, "after_soft_rollback", _discard_changes)
+            atexit.register(self.stop)
+            _listeners_installed = True
+
+    @property
+    def config(self):
+        return self.app.config
+
+    def record(self, entries):
+        """Queue committed ``entries`` for the writer."""
+        with self._lock:
+            self._buffer.extend(entries)
+            buffered = len(self._buffer)
+        if not self.config.get("AUDIT_WRITE_BEHIND", True) or buffered >= self.config.get("AUDIT_MAX_BUFFER", 10000):
+            self.flush()
+            return
+        self.start()
+        if buffered >= self.config.get("AUDIT_BATCH_SIZE", 500):
+            self._wake.set()
+
+    def start(self):
+        """Start the writer thread once per process (again after a fork, which does not copy threads)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _take(self, size):
+        with self._lock:
+            return [self._buffer.popleft() for _ in range(min(size, len(self._buffer)))]
+
+    def flush(self):
+        """Write everything buffered, ``AUDIT_BATCH_SIZE`` rows per insert; returns the number of rows written."""
+        written = 0
+        batch_size = self.config.get("AUDIT_BATCH_SIZE", 500)
+        with self._write_lock, self.app.app_context():
+            while batch := self._take(batch_size):
+                try:
+                    # A connection of its own: this runs after the audited commit, outside the session's transaction.
+                    with db.engine.begin() as connection:
+                        connection.execute(db.insert(AuditTrailModel), batch)
+                except Exception:
+                    self.app.logger.exception("Writing %s audit entries failed, keeping them for the next flush",
+                                              len(batch))
+                    with self._lock:
+                        self._buffer.extendleft(reversed(batch))
+                    break
+                written += len(batch)
+        return written
+
+    def _run(self):
+        interval = self.config.get("AUDIT_FLUSH_SECONDS", 2)
+        while not self._stop.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            self.flush()
+
+
+audit_trail = AuditTrail()
+
+
+@click.group("audit")
+def audit_cli():
+    """Audit trail commands."""
+
+
+@audit_cli.command("history")
+@click.argument("entity", type=click.Choice(list(AUDITED)))
+@click.argument("entity_id", type=int)
+@click.option("--limit", type=int, default=20, help="Number of entries to show, newest first.")
+def history_command(entity, entity_id, limit):
+    """Show the recorded changes of one case, note, attachment or client."""
+    for entry in AuditTrailModel.find_by_entity(entity, entity_id, limit):
+        click.echo(f"{entry.ts:%Y-%m-%d %H:%M:%S} {entry.action} by user {entry.user_id or '-'}")
+        if entry.action == "update":
+            for column, (old, new) in entry.changes.items():
+                click.echo(f"    {column}: {old!r} -> {new!r}")
@@ -0,0 +1,349 @@
+import codecs
+import csv
+import os
+import zipfile
+from collections import Counter
+from datetime import datetime
+from xml.etree.ElementTree import ParseError
+
+import click
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from .audit import audit_inserts
+from .dashboard import case_deltas
+from .db import db
+from .models import ClientModel, CaseModel, UserModel, CaseStatModel
+from .search import index_rows
+
+IMPORT_KINDS = ("clients", "cases")
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx")
+MAX_REPORTED_ERRORS = 1000
+TRUE_VALUES = ("1", "true", "yes", "y", "active")
+UNSUPPORTED_FILE = "Only .csv and .xlsx files can be imported."
+XLSX_NOT_AVAILABLE = "Importing .xlsx files requires the openpyxl package."
+CSV_UNREADABLE = "The CSV file could not be read after line {}: {}. Save it as UTF-8 and try again."
+XLSX_UNREADABLE = "The file is not a valid .xlsx workbook."
+DUPLICATE_ROW = "clashes with an existing record on {}"
+
+
+class BulkImportException(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+class ImportReport:
+    """Running totals of an import; ``errors`` keeps the first ``MAX_REPORTED_ERRORS`` ``(line, message)`` pairs."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def as_dict(self):
+        return {"kind": self.kind, "rows": self.rows, "inserted": self.inserted, "failed": self.failed,
+                "errors": [{"line": line, "message": message} for line, message in self.errors]}
+
+
+def _header(name):
+    return str(name or "").strip().lower().replace(" ", "_")
+
+
+def _csv_rows(stream):
+    # The file is decoded as it is read, so a bad byte may only turn up many rows in.
+    reader = csv.reader(codecs.getreader("utf-8-sig")(stream))
+    try:
+        headers = [_header(name) for name in next(reader, [])]
+        for line, values in enumerate(reader, start=2):
+            if any(values):
+                yield line, dict(zip(headers, values))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise BulkImportException(CSV_UNREADABLE.format(reader.line_num, e))
+
+
+def _xlsx_rows(stream):
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        raise BulkImportException(XLSX_NOT_AVAILABLE)
+    unreadable = (zipfile.BadZipFile, InvalidFileException, KeyError, ParseError)
+    try:
+        # Read-only mode parses the sheet lazily, so rows are not all held in memory at once.
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except unreadable:
+        raise BulkImportException(XLSX_UNREADABLE)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [_header(name) for name in next(rows, ())]
+        for line, values in enumerate(rows, start=2):
+            if any(value not in (None, "") for value in values):
+                yield line, dict(zip(headers, values))
+    except unreadable:
+        raise BulkImportException(XLSX_UNREADABLE)
+    finally:
+        workbook.close()
+
+
+def iter_rows(stream, filename):
+    """``(line number, {header: value})`` for every non-empty data row of a CSV or XLSX file, read lazily."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".csv":
+        return _csv_rows(stream)
+    if extension == ".xlsx":
+        return _xlsx_rows(stream)
+    raise BulkImportException(UNSUPPORTED_FILE)
+
+
+def _text(row, key):
+    value = row.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _date(value):
+    """A datetime from an Excel date cell or a ``YYYY-MM-DD`` string; None when the cell is empty."""
+    if value is None or isinstance(value, datetime):
+        return value
+    value = str(value).strip()
+    return datetime.strptime(value[:10], "%Y-%m-%d") if value else None
+
+
+class _Importer:
+    """Validates and inserts one kind of record; subclasses describe the columns and duplicate keys."""
+    model = None
+    required = ()
+    optional = ()
+    unique = ()
+    entity = None
+
+    def __init__(self, user_id, report):
+        self.user_id = user_id
+        self.report = report
+        # Keys already seen earlier in this file, so duplicates across chunks are caught without re-querying.
+        self.seen = {column: set() for column in self.unique}
+
+    def parse(self, row):
+        """The insert parameters for ``row``; raise ``ValueError`` with a message when it is invalid."""
+        values = {}
+        for column in self.required + self.optional:
+            value = _text(row, column)
+            if value is None:
+                if column in self.required:
+                    raise ValueError(f"{column} is required")
+                continue
+            length = getattr(self.model.__table__.c[column].type, "length", None)
+            if length and len(value) > length:
+                raise ValueError(f"{column} is longer than {length} characters")
+            values[column] = value
+        return values
+
+    def resolve(self, parsed):
+        """Set-based lookups a whole chunk needs before it can be inserted, e.g. foreign keys."""
+
+    def after_insert(self, rows):
+        """Bookkeeping the flush hooks would do for ORM inserts, which these core inserts skip."""
+
+    def existing(self, column, values):
+        """Which of ``values`` are already stored in the unique ``column``; one indexed ``IN`` query."""
+        if not values:
+            return set()
+        model_column = getattr(self.model, column)
+        return {value for value, in db.session.query(model_column).filter(model_column.in_(values))}
+
+    def insert(self, rows):
+        """Insert ``rows`` and update the search index and rollups; returns them with their new ``id``."""
+        # One executemany INSERT; RETURNING gives the ids for the search index in parameter order.
+        ids = db.session.execute(db.insert(self.model).returning(self.model.id, sort_by_parameter_order=True),
+                                 rows).scalars().all()
+        inserted = [dict(values, id=row_id) for values, row_id in zip(rows, ids)]
+        index_rows(self.entity, inserted)
+        self.after_insert(rows)
+        return inserted
+
+    def import_chunk(self, chunk):
+        parsed, errors = [], []
+        for line, row in chunk:
+            try:
+                parsed.append((line, self.parse(row)))
+            except ValueError as e:
+                errors.append((line, str(e)))
+        self.resolve(parsed)
+
+        taken = {column: self.existing(column, {values[column] for _, values in parsed if values.get(column)})
+                 for column in self.unique}
+        rows = []
+        for line, values in parsed:
+            if "_error" in values:
+                errors.append((line, values.pop("_error")))
+                continue
+            duplicate = next((column for column in self.unique if values.get(column) and (
+                values[column] in taken[column] or values[column] in self.seen[column])), None)
+            if duplicate:
+                errors.append((line, f"{duplicate} {values[duplicate]} already exists"))
+                continue
+            for column in self.unique:
+                if values.get(column):
+                    self.seen[column].add(values[column])
+            rows.append((line, values))
+
+        inserted = []
+        if rows:
+            try:
+                with db.session.begin_nested():
+                    inserted = self.insert([values for _, values in rows])
+            except IntegrityError:
+                # A concurrent writer, or a stored value differing only in case, slipped past the duplicate check:
+                # retry one row per savepoint so only the clashing rows are reported.
+                for line, values in rows:
+                    try:
+                        with db.session.begin_nested():
+                            inserted += self.insert([values])
+                    except IntegrityError:
+                        errors.append((line, DUPLICATE_ROW.format(", ".join(self.unique))))
+            audit_inserts(self.entity, inserted, self.user_id)
+        db.session.commit()
+        self.report.inserted += len(inserted)
+        for line, message in sorted(errors):
+            self.report.add_error(line, message)
+
+
+class ClientImporter(_Importer):
+    model = ClientModel
+    entity = "client"
+    required = ("first_name", "last_name", "phone_no", "address", "identification_no")
+    optional = ("middle_name", "email", "notes")
+    unique = ("email", "phone_no", "identification_no")
+
+    def parse(self, row):
+        values = super().parse(row)
+        if values.get("email"):
+            values["email"] = values["email"].lower()
+        is_active = _text(row, "is_active")
+        values["is_active"] = is_active is None or is_active.lower() in TRUE_VALUES
+        try:
+            values["client_date"] = _date(row.get("client_date")) or datetime.utcnow()
+        except ValueError:
+            raise ValueError("client_date must be written as YYYY-MM-DD")
+        values["date_created"] = datetime.utcnow()
+        values["user_id"] = self.user_id
+        return values
+
+
+class CaseImporter(_Importer):
+    """Cases name their client by ``client_identification_no`` (or ``client_email``)."""
+    model = CaseModel
+    entity = "case"
+    required = ("case_number", "title", "case_type")
+    optional = ("description", "case_description", "resolution", "status", "priority")
+    unique = ("case_number",)
+
+    def parse(self, row):
+        values = super().parse(row)
+        for column in ("status", "case_type", "priority"):
+            if column in values and values[column] not in CaseModel.__table__.c[column].type.enums:
+                raise ValueError(f"{column} {values[column]} is not one of "
+                                 f"{', '.join(CaseModel.__table__.c[column].type.enums)}")
+        values.setdefault("status", "open")
+        values.setdefault("priority", "medium")
+        try:
+            for column in ("filed_date", "court_date", "resolution_date"):
+                value = _date(row.get(column))
+                values[column] = value.date() if value else None
+        except ValueError:
+            raise ValueError("dates must be written as YYYY-MM-DD")
+        if values["filed_date"] is None:
+            raise ValueError("filed_date is required")
+        values["client_identification_no"] = _text(row, "client_identification_no")
+        values["client_email"] = (_text(row, "client_email") or "").lower() or None
+        if not values["client_identification_no"] and not values["client_email"]:
+            raise ValueError("client_identification_no or client_email is required")
+        values["date_created"] = datetime.utcnow()
+        values["user_id"] = self.user_id
+        return values
+
+    def resolve(self, parsed):
+        identifications = {values["client_identification_no"] for _, values in parsed
+                           if values["client_identification_no"]}
+        emails = {values["client_email"] for _, values in parsed if values["client_email"]}
+        by_identification = dict(db.session.query(ClientModel.identification_no, ClientModel.id).filter(
+            ClientModel.identification_no.in_(identifications))) if identifications else {}
+        by_email = dict(db.session.query(ClientModel.email, ClientModel.id).filter(
+            ClientModel.email.in_(emails))) if emails else {}
+        for _, values in parsed:
+            identification_no, email = values.pop("client_identification_no"), values.pop("client_email")
+            client_id = by_identification.get(identification_no) or by_email.get(email)
+            if client_id is None:
+                values["_error"] = f"client {identification_no or email} does not exist"
+            values["client_id"] = client_id
+
+    def after_insert(self, rows):
+        deltas = Counter()
+        for values in rows:
+            deltas.update(case_deltas(values))
+        CaseStatModel.apply(db.session.connection(), deltas)
+
+
+IMPORTERS = {"clients": ClientImporter, "cases": CaseImporter}
+
+
+def import_file(kind, stream, filename, user_id, chunk_size=None, progress=None):
+    """Stream ``stream`` into the ``kind`` table, ``chunk_size`` rows per validation pass and transaction.
+
+    Rows failing validation or clashing with existing or earlier rows on a unique column are skipped and reported;
+    the rest are committed chunk by chunk, so an interrupted import keeps every completed chunk. ``progress`` is
+    called with the report after each chunk.
+    """
+    chunk_size = chunk_size or current_app.config.get("IMPORT_CHUNK_SIZE", 1000)
+    report = ImportReport(kind)
+    importer = IMPORTERS[kind](user_id, report)
+    chunk = []
+    for line, row in iter_rows(stream, filename):
+        report.rows += 1
+        chunk.append((line, row))
+        if len(chunk) == chunk_size:
+            importer.import_chunk(chunk)
+            chunk = []
+            if progress:
+                progress(report)
+    if chunk:
+        importer.import_chunk(chunk)
+        if progress:
+            progress(report)
+    return report
+
+
+@click.group("import")
+def import_cli():
+    """Bulk import commands."""
+
+
+@import_cli.command("run")
+@click.argument("kind", type=click.Choice(IMPORT_KINDS))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--user", "user_email", required=True, help="Email of the user the records are created by.")
+@click.option("--chunk-size", type=int, default=None, help="Rows per validation pass and transaction.")
+def import_command(kind, path, user_email, chunk_size):
+    """Import clients or cases from a CSV or XLSX file."""
+    user = UserModel.find_by_email(user_email)
+    if user is None:
+        raise click.BadParameter(f"no user with email {user_email}", param_hint="--user")
+
+    def progress(report):
+        click.echo(f"{report.rows} rows read, {report.inserted} inserted, {report.failed} failed")
+
+    with open(path, "rb") as stream:
+        report = import_file(kind, stream, path, user.id, chunk_size, progress)
+    for line, message in report.errors:
+        click.echo(f"line {line}: {message}", err=True)
+    if report.failed > len(report.errors):
+        click.echo(f"... {report.failed - len(report.errors)} more errors not shown", err=True)
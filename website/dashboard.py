@@ -0,0 +1,154 @@
+from collections import Counter
+from datetime import date, timedelta
+
+import click
+from sqlalchemy import event, inspect
+
+from .db import db
+from .models import CaseModel, CaseAttorneyModel, CaseHearingModel, CaseStatModel
+
+CASE_DIMENSIONS = ("status", "case_type", "priority")
+CASE_COLUMNS = CASE_DIMENSIONS + ("client_id",)
+UPCOMING_DAYS = (7, 30)
+_PENDING = "case_stat_deltas"
+_listeners_installed = False
+
+
+def case_deltas(values, sign=1):
+    """Rollup changes for one case given its column ``values`` (a dict or a ``CaseModel``), added or removed."""
+    get = values.get if isinstance(values, dict) else lambda column: getattr(values, column)
+    deltas = Counter({(dimension, get(dimension)): sign for dimension in CASE_DIMENSIONS})
+    deltas[("client", get("client_id"))] += sign
+    return deltas
+
+
+def _hearing_day(hearing_date):
+    return hearing_date.date().isoformat() if hearing_date else None
+
+
+def _old_value(obj, column):
+    history = inspect(obj).attrs[column].history
+    return history.deleted[0] if history.deleted else getattr(obj, column)
+
+
+def _collect_changes(session, flush_context, instances):
+    """Work out the rollup deltas of this flush while old values and soon-deleted rows can still be read."""
+    with session.no_autoflush:
+        _collect_deltas(session, session.info.setdefault(_PENDING, Counter()))
+
+
+def _collect_deltas(session, deltas):
+    deleted_case_ids = {obj.id for obj in session.deleted if isinstance(obj, CaseModel)}
+    # Old values are read back from the database in one query per model: an expired attribute that was simply
+    # overwritten has no old value in its history.
+    changed_cases = [obj for obj in session.dirty if isinstance(obj, CaseModel) and any(
+        inspect(obj).attrs[column].history.has_changes() for column in CASE_COLUMNS)]
+    if changed_cases:
+        stored = {row.id: row for row in session.query(CaseModel.id, *[getattr(CaseModel, column) for column in
+                                                                       CASE_COLUMNS]).filter(
+            CaseModel.id.in_([obj.id for obj in changed_cases]))}
+        for obj in changed_cases:
+            deltas.subtract(case_deltas(stored[obj.id]._asdict()))
+            deltas.update(case_deltas(obj))
+    changed_hearings = [obj for obj in session.dirty if isinstance(obj, CaseHearingModel)
+                        and inspect(obj).attrs.hearing_date.history.has_changes()]
+    if changed_hearings:
+        stored = dict(session.query(CaseHearingModel.id, CaseHearingModel.hearing_date).filter(
+            CaseHearingModel.id.in_([obj.id for obj in changed_hearings])))
+        for obj in changed_hearings:
+            deltas[("hearing_day", _hearing_day(stored[obj.id]))] -= 1
+            deltas[("hearing_day", _hearing_day(obj.hearing_date))] += 1
+    for obj in session.deleted:
+        if isinstance(obj, CaseModel):
+            deltas.subtract(case_deltas({column: _old_value(obj, column) for column in CASE_COLUMNS}))
+        elif isinstance(obj, CaseHearingModel) and obj.case_id not in deleted_case_ids:
+            deltas[("hearing_day", _hearing_day(_old_value(obj, "hearing_date")))] -= 1
+        elif isinstance(obj, CaseAttorneyModel) and obj.case_id not in deleted_case_ids:
+            deltas[("attorney", obj.user_id)] -= 1
+    if deleted_case_ids:
+        # Hearings and assignments of deleted cases go with them, whether or not they were loaded.
+        hearing_days = session.query(CaseHearingModel.hearing_date).filter(
+            CaseHearingModel.case_id.in_(deleted_case_ids))
+        attorneys = session.query(CaseAttorneyModel.user_id).filter(CaseAttorneyModel.case_id.in_(deleted_case_ids))
+        deltas.subtract(("hearing_day", _hearing_day(row.hearing_date)) for row in hearing_days)
+        deltas.subtract(("attorney", row.user_id) for row in attorneys)
+
+
+def _count_inserts(session, deltas):
+    # Counted after the flush, once column defaults (status "open", priority "medium") have been filled in.
+    for obj in session.new:
+        if isinstance(obj, CaseModel):
+            deltas.update(case_deltas(obj))
+        elif isinstance(obj, CaseHearingModel):
+            deltas[("hearing_day", _hearing_day(obj.hearing_date))] += 1
+        elif isinstance(obj, CaseAttorneyModel):
+            deltas[("attorney", obj.user_id)] += 1
+
+
+def _apply_changes(session, flush_context):
+    deltas = session.info.pop(_PENDING, None) or Counter()
+    _count_inserts(session, deltas)
+    if deltas:
+        CaseStatModel.apply(session.connection(), deltas)
+
+
+def _discard_changes(session, previous_transaction):
+    # A flush that failed after before_flush never reaches after_flush; its deltas must not leak into the next one.
+    session.info.pop(_PENDING, None)
+
+
+def rebuild_case_stats():
+    """Recompute every rollup row from the case tables, e.g. after bulk SQL or to repair drift."""
+    connection = db.session.connection()
+    connection.execute(db.delete(CaseStatModel))
+    rows = []
+    for dimension in CASE_DIMENSIONS:
+        column = getattr(CaseModel, dimension)
+        rows += [{"dimension": dimension, "key": str(key), "count": count}
+                 for key, count in db.session.query(column, db.func.count()).group_by(column)]
+    rows += [{"dimension": "client", "key": str(key), "count": count} for key, count in
+             db.session.query(CaseModel.client_id, db.func.count()).group_by(CaseModel.client_id)]
+    rows += [{"dimension": "attorney", "key": str(key), "count": count} for key, count in
+             db.session.query(CaseAttorneyModel.user_id, db.func.count()).group_by(CaseAttorneyModel.user_id)]
+    day = db.func.date(CaseHearingModel.hearing_date)
+    rows += [{"dimension": "hearing_day", "key": str(key), "count": count}
+             for key, count in db.session.query(day, db.func.count()).group_by(day) if key is not None]
+    if rows:
+        connection.execute(db.insert(CaseStatModel), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def dashboard_stats(user=None):
+    """The dashboard figures, read from the rollup: a few primary key lookups, independent of the data size."""
+    today = date.today()
+    stats = {dimension: CaseStatModel.counts(dimension) for dimension in CASE_DIMENSIONS}
+    stats["total"] = sum(stats["status"].values())
+    stats["upcoming_hearings"] = {
+        days: CaseStatModel.total("hearing_day", today.isoformat(), (today + timedelta(days=days)).isoformat())
+        for days in UPCOMING_DAYS}
+    if user is not None:
+        stats["my_cases"] = CaseStatModel.counts("attorney", [user.id]).get(str(user.id), 0)
+    return stats
+
+
+@click.group("stats")
+def stats_cli():
+    """Dashboard statistics commands."""
+
+
+@stats_cli.command("rebuild")
+def rebuild_command():
+    """Recompute the dashboard rollup from scratch."""
+    click.echo(f"Rebuilt {rebuild_case_stats()} dashboard statistics rows.")
+
+
+def init_dashboard(app):
+    """Maintain the rollup on every flush and register the ``flask stats`` commands."""
+    global _listeners_installed
+    if not _listeners_installed:
+        event.listen(db.session, "before_flush", _collect_changes)
+        event.listen(db.session, "after_flush", _apply_changes)
+        event.listen(db.session, "after_soft_rollback", _discard_changes)
+        _listeners_installed = True
+    app.cli.add_command(stats_cli)
@@ -1,3 +1,223 @@
+import random
+import time
+from contextlib import ContextDecorator
+from functools import wraps
+
+from flask import current_app, request, session as http_session
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, Select
+from sqlalchemy.engine import make_url
+
+_UNIT_OF_WORK = "unit_of_work"
+_AFTER_COMMIT = "after_commit"
+_REPLICA = "replica"
+_WROTE = "wrote"
+# Unix time until which the browser's requests read from the primary, set in its cookie session after a write.
+_STICKY_UNTIL = "_primary_until"
+_SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+_listeners_installed = False
+
+
+class RoutingSession(Session):
+    """Sends the SELECTs of requests marked with ``@read_replica`` to a read replica.
+
+    Everything else uses the primary: writes and flushes, statements other than SELECT, and every read that follows
+    a flush in the same session, so a request always sees its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get(_REPLICA)
+        if (bind is None and replica is not None and not self._flushing and not self.info.get(_WROTE)
+                and isinstance(clause, Select)):
+            return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def _run_after_commit(session):
+    for callback in session.info.pop(_AFTER_COMMIT, []):
+        callback()
+
+
+def _drop_after_commit(session):
+    session.info.pop(_AFTER_COMMIT, None)
+
+
+def _mark_wrote(session, flush_context):
+    session.info[_WROTE] = True
+
+
+def _install_listeners():
+    # Only from init_unit_of_work: adding a listener while a session event is dispatching (e.g. after_commit called
+    # from an after_flush hook) mutates the listener collection being iterated.
+    global _listeners_installed
+    if not _listeners_installed:
+        event.listen(db.session, "after_commit", _run_after_commit)
+        event.listen(db.session, "after_rollback", _drop_after_commit)
+        event.listen(db.session, "after_flush", _mark_wrote)
+        _listeners_installed = True
+
+
+class unit_of_work(ContextDecorator):
+    """Make the models' ``save_to_db``/``update_db``/``delete_from_db`` flush instead of commit.
+
+    Everything staged inside the block is committed once when it exits and rolled back if it raises, so multi-step
+    flows either land completely or not at all. Nested blocks join the outermost one. With ``batch_size`` the unit
+    also commits after every ``batch_size`` helper calls, which keeps scripts from building one huge transaction.
+    Works as a context manager or as a decorator on views and functions.
+    """
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size
+
+    def __enter__(self):
+        state = db.session.info.get(_UNIT_OF_WORK)
+        if state is None:
+            state = db.session.info[_UNIT_OF_WORK] = {"depth": 0, "staged": 0, "batch_size": self.batch_size}
+        state["depth"] += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        state = db.session.info[_UNIT_OF_WORK]
+        state["depth"] -= 1
+        if state["depth"] == 0:
+            del db.session.info[_UNIT_OF_WORK]
+        if exc_type is not None:
+            db.session.rollback()
+        elif state["depth"] == 0:
+            try:
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        return False
+
+
+def in_unit_of_work():
+    return _UNIT_OF_WORK in db.session.info
+
+
+def commit():
+    """Commit the session, or only flush it while a unit of work is open (committing when its batch is full)."""
+    state = db.session.info.get(_UNIT_OF_WORK)
+    if state is None:
+        db.session.commit()
+        return
+    db.session.flush()
+    state["staged"] += 1
+    if state["batch_size"] and state["staged"] >= state["batch_size"]:
+        state["staged"] = 0
+        db.session.commit()
+
+
+def after_commit(callback):
+    """Run ``callback`` once the current transaction commits; it is dropped if the transaction rolls back."""
+    db.session.info.setdefault(_AFTER_COMMIT, []).append(callback)
+
+
+def init_unit_of_work(app):
+    """Install the session listeners behind ``after_commit`` and the replica routing, before anything can flush.
+
+    With ``UNIT_OF_WORK_PER_REQUEST`` every request also runs in one unit of work, committed after the view returns.
+    """
+    _install_listeners()
+    if not app.config.get("UNIT_OF_WORK_PER_REQUEST", False):
+        return
+    unit = unit_of_work()
+
+    @app.before_request
+    def begin_unit_of_work():
+        unit.__enter__()
+
+    @app.after_request
+    def commit_unit_of_work(response):
+        if in_unit_of_work():
+            if response.status_code >= 500:
+                unit.__exit__(RuntimeError, None, None)
+            else:
+                unit.__exit__(None, None, None)
+        return response
+
+    @app.teardown_request
+    def discard_unit_of_work(exc):
+        # Only reached with the unit still open when the view raised and after_request never ran.
+        if in_unit_of_work():
+            db.session.info.pop(_UNIT_OF_WORK)
+            db.session.rollback()
+
+
+def pool_options(config, url):
+    """Engine options for ``url`` from the ``DB_POOL_*`` settings.
+
+    In-memory SQLite runs on a single shared connection, so it only takes the options that pool accepts.
+    """
+    options = {"pool_pre_ping": config.get("DB_POOL_PRE_PING", True),
+               "pool_recycle": config.get("DB_POOL_RECYCLE", 1800)}
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+    options.update(pool_size=config.get("DB_POOL_SIZE", 5), max_overflow=config.get("DB_MAX_OVERFLOW", 10),
+                   pool_timeout=config.get("DB_POOL_TIMEOUT", 30))
+    return options
+
+
+def replica_binds(app):
+    return [key for key in app.config.get("SQLALCHEMY_BINDS", {}) if key.startswith("replica_")]
+
+
+def init_engines(app):
+    """Apply the pool settings to the primary and register every ``DATABASE_REPLICAS`` URI as a ``replica_<n>`` bind.
+
+    Call before ``db.init_app``; explicit ``SQLALCHEMY_ENGINE_OPTIONS`` win over the ``DB_POOL_*`` values.
+    """
+    config = app.config
+    if config.get("SQLALCHEMY_DATABASE_URI"):
+        config["SQLALCHEMY_ENGINE_OPTIONS"] = {**pool_options(config, config["SQLALCHEMY_DATABASE_URI"]),
+                                               **config.get("SQLALCHEMY_ENGINE_OPTIONS", {})}
+    binds = dict(config.get("SQLALCHEMY_BINDS") or {})
+    for number, url in enumerate(config.get("DATABASE_REPLICAS") or []):
+        binds[f"replica_{number}"] = {"url": url, **pool_options(config, url)}
+    config["SQLALCHEMY_BINDS"] = binds
+
+
+def read_replica(view):
+    """Let a read-only view run its SELECTs on a randomly picked replica.
+
+    Falls back to the primary when no replica is configured, for unsafe methods, and for ``REPLICA_STICKY_SECONDS``
+    after the same browser made a write, so a redirect after a POST never shows stale data.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        replicas = replica_binds(current_app)
+        if replicas and request.method in _SAFE_METHODS and http_session.get(_STICKY_UNTIL, 0) <= time.time():
+            db.session.info[_REPLICA] = random.choice(replicas)
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def init_replicas(app):
+    """Keep a browser on the primary for a while after it wrote, and stop replica reads once a request flushes."""
+    if not replica_binds(app):
+        return
+
+    @app.after_request
+    def stick_to_primary(response):
+        if request.method not in _SAFE_METHODS:
+            http_session[_STICKY_UNTIL] = time.time() + app.config.get("REPLICA_STICKY_SECONDS", 5)
+        return response
+
+
+def dispose_engines(app):
+    """Forget the pooled connections inherited from the parent process; call first thing in a forked worker.
 
-db = SQLAlchemy()
+    Sockets must not be shared between processes. ``close=False`` leaves them open for the parent, which may still
+    be using them, while the worker opens its own on demand.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -1,16 +1,55 @@
 import os
 
-from dotenv import load_dotenv
-
-load_dotenv(".env", verbose=True)
 DEBUG = True
 basedir = os.path.abspath(os.path.dirname(__file__))
 UPLOADED_PHOTOS_DEST = os.path.join(basedir, "static/uploads")
 UPLOADED_ATTACHMENTS_DEST = os.path.join(basedir, "static/attachments")
 base_dir = os.path.abspath(os.path.dirname(__file__))
 URI = "sqlite:///" + os.path.join(base_dir, "database.db")
-load_dotenv(".env", verbose=True)
 SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE", URI)
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 SECRET_KEY = os.environ.get("APP_SECRET_KEY")
 PROPAGATE_EXCEPTIONS = True
+QUERY_STATS_ENABLED = os.environ.get("QUERY_STATS_ENABLED", "false").lower() == "true"
+QUERY_STATS_SLOW_REQUEST_MS = int(os.environ.get("QUERY_STATS_SLOW_REQUEST_MS", 500))
+QUERY_STATS_MAX_QUERIES = int(os.environ.get("QUERY_STATS_MAX_QUERIES", 30))
+QUERY_STATS_KEEP_SLOWEST = int(os.environ.get("QUERY_STATS_KEEP_SLOWEST", 3))
+USER_CACHE_ENABLED = os.environ.get("USER_CACHE_ENABLED", "true").lower() == "true"
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 1024))
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 60))
+SEARCH_ENABLED = os.environ.get("SEARCH_ENABLED", "true").lower() == "true"
+EMAIL_QUEUE_WORKERS = int(os.environ.get("EMAIL_QUEUE_WORKERS", 2))
+EMAIL_BATCH_SIZE = int(os.environ.get("EMAIL_BATCH_SIZE", 20))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get("EMAIL_MAX_ATTEMPTS", 5))
+EMAIL_RETRY_BASE_SECONDS = int(os.environ.get("EMAIL_RETRY_BASE_SECONDS", 30))
+EMAIL_POLL_SECONDS = int(os.environ.get("EMAIL_POLL_SECONDS", 5))
+EMAIL_SESSION_KEEPALIVE_SECONDS = int(os.environ.get("EMAIL_SESSION_KEEPALIVE_SECONDS", 60))
+EMAIL_CLAIM_TIMEOUT = int(os.environ.get("EMAIL_CLAIM_TIMEOUT", 600))
+MAX_CONTENT_LENGTH = int(os.environ.get("MAX_CONTENT_LENGTH", 100 * 1024 * 1024))
+USE_X_SENDFILE = os.environ.get("USE_X_SENDFILE", "false").lower() == "true"
+ATTACHMENT_ACCEL_REDIRECT_PREFIX = os.environ.get("ATTACHMENT_ACCEL_REDIRECT_PREFIX")
+UNIT_OF_WORK_PER_REQUEST = os.environ.get("UNIT_OF_WORK_PER_REQUEST", "false").lower() == "true"
+IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", 1000))
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 1000))
+AUDIT_ENABLED = os.environ.get("AUDIT_ENABLED", "true").lower() == "true"
+AUDIT_WRITE_BEHIND = os.environ.get("AUDIT_WRITE_BEHIND", "true").lower() == "true"
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", 500))
+AUDIT_FLUSH_SECONDS = int(os.environ.get("AUDIT_FLUSH_SECONDS", 2))
+AUDIT_MAX_BUFFER = int(os.environ.get("AUDIT_MAX_BUFFER", 10000))
+HEARING_REMINDER_DAYS = int(os.environ.get("HEARING_REMINDER_DAYS", 7))
+CONDITIONAL_GET_ENABLED = os.environ.get("CONDITIONAL_GET_ENABLED", "true").lower() == "true"
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+DATABASE_REPLICAS = [url for url in os.environ.get("DATABASE_REPLICAS", "").split(",") if url]
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+STATIC_FINGERPRINT = os.environ.get("STATIC_FINGERPRINT", "true").lower() == "true"
+STATIC_MAX_AGE = int(os.environ.get("STATIC_MAX_AGE", 365 * 24 * 3600))
+THUMBNAILS_ENABLED = os.environ.get("THUMBNAILS_ENABLED", "true").lower() == "true"
+THUMBNAIL_QUALITY = int(os.environ.get("THUMBNAIL_QUALITY", 80))
+JINJA_BYTECODE_CACHE_DIR = os.environ.get("JINJA_BYTECODE_CACHE_DIR")
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+METRICS_PATH = os.environ.get("METRICS_PATH", "/metrics")
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
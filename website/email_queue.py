@@ -0,0 +1,185 @@
+import secrets
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import or_, and_
+
+from .db import db
+from .libs.send_email import Mailgun, MailgunException, OUTBOX_READY
+from .models import OutboxEmailModel
+
+
+class EmailQueue:
+    """Delivers the ``email_outbox`` table from a pool of background threads.
+
+    Each worker claims a batch of due messages with a conditional UPDATE (so several threads or processes never
+    send the same row), delivers the batch over an SMTP session it keeps open between batches, and reschedules
+    failures with exponential backoff until ``EMAIL_MAX_ATTEMPTS`` is reached.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._threads = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["email_queue"] = self
+        app.cli.add_command(email_cli)
+        if app.config.get("EMAIL_QUEUE_WORKERS", 2):
+            app.before_request(self.start)
+
+    @property
+    def config(self):
+        return self.app.config
+
+    def start(self):
+        """Start the worker threads once per process; safe to call on every request."""
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            for number in range(self.config.get("EMAIL_QUEUE_WORKERS", 2)):
+                thread = threading.Thread(target=self._run, name=f"email-worker-{number}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        OUTBOX_READY.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def claim_batch(self):
+        """Mark up to ``EMAIL_BATCH_SIZE`` due messages as ours and return them."""
+        now = datetime.utcnow()
+        stale_claim = now - timedelta(seconds=self.config.get("EMAIL_CLAIM_TIMEOUT", 600))
+        due = db.session.query(OutboxEmailModel.id).filter(or_(
+            and_(OutboxEmailModel.status == "pending", OutboxEmailModel.next_attempt_at <= now),
+            and_(OutboxEmailModel.status == "sending", OutboxEmailModel.claimed_at < stale_claim),
+        )).order_by(OutboxEmailModel.next_attempt_at).limit(self.config.get("EMAIL_BATCH_SIZE", 20))
+        ids = [row.id for row in due]
+        if not ids:
+            db.session.rollback()
+            return []
+        claim_token = secrets.token_hex(16)
+        OutboxEmailModel.query.filter(
+            OutboxEmailModel.id.in_(ids),
+            or_(OutboxEmailModel.status == "pending",
+                and_(OutboxEmailModel.status == "sending", OutboxEmailModel.claimed_at < stale_claim)),
+        ).update({"status": "sending", "claim_token": claim_token, "claimed_at": now}, synchronize_session=False)
+        db.session.commit()
+        return OutboxEmailModel.find_by_claim_token(claim_token)
+
+    def _mark_failed(self, message, error):
+        message.attempts += 1
+        message.last_error = str(error)
+        message.claim_token = None
+        if message.attempts >= self.config.get("EMAIL_MAX_ATTEMPTS", 5):
+            message.status = "failed"
+        else:
+            delay = self.config.get("EMAIL_RETRY_BASE_SECONDS", 30) * 2 ** (message.attempts - 1)
+            message.status = "pending"
+            message.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+
+    def deliver(self, batch, smtp=None):
+        """Send a claimed batch, reusing ``smtp`` when it is still connected; returns the session to reuse."""
+        for message in batch:
+            mime = Mailgun.build_message(message.recipient, message.subject, message.text, message.html)
+            try:
+                if smtp is None:
+                    smtp = Mailgun.open_session()
+                try:
+                    smtp.send_message(mime)
+                except smtplib.SMTPServerDisconnected:
+                    # The server dropped an idle kept-alive session, reconnect once and retry.
+                    smtp = Mailgun.open_session()
+                    smtp.send_message(mime)
+                message.status = "sent"
+                message.sent_at = datetime.utcnow()
+                message.claim_token = None
+                message.attempts += 1
+            except (MailgunException, smtplib.SMTPException, OSError) as e:
+                current_app.logger.warning("Email %s to %s failed: %s", message.id, message.recipient, e)
+                self._mark_failed(message, e)
+                if not isinstance(e, smtplib.SMTPRecipientsRefused):
+                    smtp = self._close(smtp)
+        db.session.commit()
+        return smtp
+
+    def process_due(self, smtp=None):
+        """Deliver batches until nothing is due; returns the number of messages handled and the open session."""
+        handled = 0
+        while True:
+            batch = self.claim_batch()
+            if not batch:
+                return handled, smtp
+            smtp = self.deliver(batch, smtp)
+            handled += len(batch)
+
+    @staticmethod
+    def _close(smtp):
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+        return None
+
+    def _run(self):
+        smtp = None
+        idle_since = time.monotonic()
+        poll_interval = self.config.get("EMAIL_POLL_SECONDS", 5)
+        keep_alive = self.config.get("EMAIL_SESSION_KEEPALIVE_SECONDS", 60)
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    handled, smtp = self.process_due(smtp)
+            except Exception:
+                self.app.logger.exception("Email worker failed, retrying after the poll interval")
+                handled = 0
+            if handled:
+                idle_since = time.monotonic()
+            elif smtp is not None and time.monotonic() - idle_since > keep_alive:
+                smtp = self._close(smtp)
+            if OUTBOX_READY.wait(poll_interval):
+                OUTBOX_READY.clear()
+        self._close(smtp)
+
+
+email_queue = EmailQueue()
+
+
+@click.group("email")
+def email_cli():
+    """Outbound email queue commands."""
+
+
+@email_cli.command("flush")
+def flush_command():
+    """Deliver every message that is due now, then exit."""
+    handled, smtp = email_queue.process_due()
+    email_queue._close(smtp)
+    click.echo(f"Processed {handled} queued emails.")
+
+
+@email_cli.command("work")
+def work_command():
+    """Run the delivery workers in the foreground, for deployments that keep them out of the web processes."""
+    email_queue.start()
+    click.echo(f"Email workers running, {OutboxEmailModel.count_pending()} messages queued. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        email_queue.stop()
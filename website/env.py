@@ -0,0 +1,8 @@
+"""Loads ``.env`` into the environment, once per process.
+
+Imported first by the package: ``config.py`` and ``libs/send_email.py`` read their settings from the environment
+at import time, so the file has to be loaded before either of them runs.
+"""
+from dotenv import load_dotenv
+
+load_dotenv(".env", verbose=True)
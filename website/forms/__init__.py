@@ -1,4 +1,5 @@
 from .base_forms import RoleForm
-from .case_forms import CreateCaseForm, AttToCaseForm, CaseDetailForm, CaseNoteForm, AttachmentForm, CourtHearingForm
+from .case_forms import CreateCaseForm, AttToCaseForm, CaseDetailForm, CaseNoteForm, AttachmentForm, CourtHearingForm, \
+    ReassignCasesForm
 from .client_form import CreateClientForm
 from .user_forms import RegistrationForm, LoginForm, UpdateProfileForm
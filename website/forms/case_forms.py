@@ -1,18 +1,112 @@
 from datetime import datetime
 
+from flask import url_for
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileRequired, FileAllowed
-from wtforms import StringField, TextAreaField, SelectField, DateField, SubmitField, DateTimeLocalField
+from markupsafe import Markup, escape
+from sqlalchemy import inspect
+from wtforms import StringField, TextAreaField, SelectField, DateField, SubmitField, DateTimeLocalField, Field
 from wtforms import widgets
 from wtforms.validators import DataRequired, Length, Optional, ValidationError
-from wtforms_alchemy import QuerySelectField, QuerySelectMultipleField
 
 from website import UserModel
 
 
-class QuerySelectMultipleFieldsWithCheckboxes(QuerySelectMultipleField):
-    widget = widgets.ListWidget(prefix_label=False)
-    option_widget = widgets.CheckboxInput()
+def typeahead_label(row):
+    """A client's or user's name followed by their email, leaving out the parts that are empty."""
+    name = " ".join(part for part in (row.first_name, getattr(row, "middle_name", None), row.last_name) if part)
+    return f"{name} ({row.email})" if row.email else name
+
+
+class TypeaheadWidget:
+    """A search box backed by a JSON lookup endpoint (see ``assets/typeahead.js``) instead of a full option list.
+
+    Single fields keep the chosen id in a hidden input; multiple fields render the current selection as checked
+    checkboxes and append one for every row picked from the results.
+    """
+
+    def __call__(self, field, **kwargs):
+        kwargs.setdefault("id", field.id)
+        search_id = f"{kwargs['id']}-search"
+        search = widgets.html_params(id=search_id, type="search", autocomplete="off", placeholder="Type to search",
+                                     list=f"{search_id}-results", data_typeahead=url_for(field.lookup_endpoint),
+                                     data_target=kwargs["id"], data_name=field.name,
+                                     data_multiple=str(field.multiple).lower(),
+                                     **{key: value for key, value in kwargs.items() if key != "id"})
+        if field.multiple:
+            selection = "".join(
+                f'<li><label><input {widgets.html_params(type="checkbox", name=field.name, value=pk, checked=True)}>'
+                f" {escape(label)}</label></li>" for pk, label in field.selection())
+            current = f'<ul {widgets.html_params(id=kwargs["id"])}>{selection}</ul>'
+            value = ""
+        else:
+            selection = field.selection()
+            pk, value = selection[0] if selection else ("", "")
+            current = f'<input {widgets.html_params(type="hidden", id=kwargs["id"], name=field.name, value=pk)}>'
+        results = f'<datalist id="{search_id}-results"></datalist>'
+        return Markup(f'{current}<input {search} value="{escape(value)}">{results}')
+
+
+class TypeaheadSelectField(Field):
+    """Choose a row through a typeahead lookup; ``data`` is the model instance, like ``QuerySelectField``.
+
+    ``query_factory`` scopes the rows that may be chosen. A submitted id is checked with a single primary key
+    lookup within that scope instead of loading every choice, and ``lookup_endpoint`` serves the search box.
+    """
+    widget = TypeaheadWidget()
+    multiple = False
+
+    def __init__(self, label=None, validators=None, query_factory=None, lookup_endpoint=None, get_label=typeahead_label,
+                 **kwargs):
+        super().__init__(label, validators, **kwargs)
+        self.query_factory = query_factory
+        self.lookup_endpoint = lookup_endpoint
+        self.get_label = get_label
+        self._formdata = None
+        self._invalid = False
+
+    def _get_data(self):
+        if self._formdata is not None:
+            rows = []
+            if self._formdata:
+                query = self.query_factory().order_by(None)
+                primary_key = inspect(query.column_descriptions[0]["entity"]).primary_key[0]
+                rows = query.filter(primary_key.in_(self._formdata)).all()
+            self._invalid = self._invalid or len(rows) != len(set(self._formdata))
+            self._data = rows if self.multiple else (rows[0] if rows else None)
+            self._formdata = None
+        return self._data
+
+    def _set_data(self, data):
+        self._data = data
+        self._formdata = None
+
+    data = property(_get_data, _set_data)
+
+    def process_formdata(self, valuelist):
+        try:
+            ids = [int(value) for value in valuelist if value]
+        except ValueError:
+            ids, self._invalid = [], True
+        self._formdata = ids if self.multiple else ids[:1]
+
+    def selection(self):
+        """``(id, label)`` pairs for the currently chosen rows."""
+        rows = self.data if self.multiple else [self.data] if self.data is not None else []
+        return [(row.id, self.get_label(row)) for row in rows]
+
+    def pre_validate(self, form):
+        self._get_data()
+        if self._invalid:
+            raise ValidationError(self.gettext("Not a valid choice."))
+
+
+class TypeaheadSelectMultipleField(TypeaheadSelectField):
+    """The multiple-choice variant; all submitted ids are checked with one primary key ``IN`` lookup."""
+    multiple = True
+
+    def __init__(self, label=None, validators=None, default=None, **kwargs):
+        super().__init__(label, validators, default=default or [], **kwargs)
 
 
 def non_client_users():
@@ -55,16 +149,22 @@ class CreateCaseForm(FlaskForm):
     resolution_date = DateField('Resolution Date', format='%Y-%m-%d', validators=[Optional()])
     resolution = StringField('Resolution', validators=[Optional(), Length(max=200)])
     priority = SelectField('Priority', choices=[('high', 'High'), ('medium', 'Medium'), ('low', 'Low')])
-    client = QuerySelectField('Client', allow_blank=True, query_factory=active_clients, get_pk=lambda client: client.id)
+    client = TypeaheadSelectField('Client', query_factory=active_clients, lookup_endpoint="search_blp.lookup_clients")
     submit = SubmitField('Create Case')
 
 
 class AttToCaseForm(FlaskForm):
-    attorneys = QuerySelectMultipleFieldsWithCheckboxes('Attorneys', allow_blank=True, query_factory=non_client_users,
-                                                        get_pk=lambda user: user.id)
+    attorneys = TypeaheadSelectMultipleField('Attorneys', query_factory=non_client_users,
+                                             lookup_endpoint="search_blp.lookup_attorneys")
     submit = SubmitField('Assign')
 
 
+class ReassignCasesForm(FlaskForm):
+    attorney = TypeaheadSelectField('New Attorney', validators=[DataRequired()], query_factory=non_client_users,
+                                    lookup_endpoint="search_blp.lookup_attorneys")
+    submit = SubmitField('Reassign Cases')
+
+
 class CaseDetailForm(FlaskForm):
     judge_name = StringField('Judge Name', validators=[DataRequired()])
     court_type = SelectField('Court Type', choices=[
@@ -0,0 +1,72 @@
+import click
+from sqlalchemy import text
+
+from .db import db
+from .models import CaseModel, CaseAttorneyModel, CaseNoteModel, CaseHearingModel, CaseAttachmentModel, \
+    ConfirmationModel
+
+
+def listing_queries():
+    """The hot listing and lookup queries, shaped like the routes issue them, with the index each must use."""
+    return [
+        ("view_notes", "ix_case_notes_case_id_reference_date",
+         CaseNoteModel.query.filter(CaseNoteModel.case_id == 1).order_by(
+             CaseNoteModel.reference_date.desc(), CaseNoteModel.id).limit(11)),
+        ("view_hearings", "ix_case_hearing_case_id_hearing_date",
+         CaseHearingModel.query.filter(CaseHearingModel.case_id == 1).order_by(
+             CaseHearingModel.hearing_date, CaseHearingModel.id).limit(11)),
+        ("view_attachments", "ix_case_attachments_case_id_uploaded_at",
+         CaseAttachmentModel.query.filter(CaseAttachmentModel.case_id == 1).order_by(
+             CaseAttachmentModel.uploaded_at.desc(), CaseAttachmentModel.id).limit(11)),
+        ("my_cases", "ix_case_attorneys_user_id_case_id",
+         db.session.query(CaseAttorneyModel.case_id).filter(CaseAttorneyModel.user_id == 1)),
+        ("client_cases", "ix_cases_client_id_case_number",
+         CaseModel.query.filter(CaseModel.client_id == 1).order_by(CaseModel.case_number, CaseModel.id).limit(11)),
+        ("most_recent_confirmation", "ix_confirmations_user_id_expire_at",
+         ConfirmationModel.query.filter(ConfirmationModel.user_id == 1).order_by(
+             ConfirmationModel.expire_at.desc()).limit(1)),
+        ("user_cases", "ix_cases_user_id", CaseModel.query.filter(CaseModel.user_id == 1)),
+        ("hearing_window", "ix_case_hearing_hearing_date",
+         CaseHearingModel.query.filter(CaseHearingModel.hearing_date.between("2024-01-01", "2024-02-01"))),
+    ]
+
+
+def explain(query):
+    """The database's plan for ``query`` as one string."""
+    dialect = db.engine.dialect
+    sql = str(query.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if dialect.name == "sqlite" else "EXPLAIN "
+    rows = db.session.execute(text(prefix + sql)).all()
+    return "\n".join(" ".join(str(value) for value in row) for row in rows)
+
+
+def check_indexes():
+    """Explain every listing query and return ``(name, index, used, plan)`` per query."""
+    if db.engine.dialect.name == "postgresql":
+        # Small development tables are cheaper to scan; make the planner show whether the index can be used at all.
+        db.session.execute(text("SET LOCAL enable_seqscan = off"))
+    results = []
+    for name, index, query in listing_queries():
+        plan = explain(query)
+        results.append((name, index, index in plan, plan))
+    db.session.rollback()
+    return results
+
+
+@click.group("indexes")
+def indexes_cli():
+    """Database index commands."""
+
+
+@indexes_cli.command("check")
+@click.option("--verbose", is_flag=True, help="Print every query plan.")
+def check_command(verbose):
+    """Fail unless every listing query is planned with its index."""
+    failed = False
+    for name, index, used, plan in check_indexes():
+        click.echo(f"{'ok' if used else 'MISSING'}  {name}: {index}")
+        if verbose or not used:
+            click.echo("    " + plan.replace("\n", "\n    "))
+        failed = failed or not used
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,98 @@
+import fcntl
+import hashlib
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def save_stream(stream, directory: str, filename: str):
+    """Copy ``stream`` to ``directory/filename`` in fixed-size chunks, hashing it on the way.
+
+    The data goes to a temporary file next to the destination and is renamed into place once complete, so a
+    failed upload never leaves a partial file behind. Returns the hex SHA-256 digest and the size in bytes.
+    """
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        os.replace(temp_path, os.path.join(directory, filename))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return digest.hexdigest(), size
+
+
+def blob_relative_path(sha256: str) -> str:
+    """Where a blob lives below the attachments root: ``blobs/ab/cd/abcd...``, so no directory grows too large."""
+    return os.path.join("blobs", sha256[:2], sha256[2:4], sha256)
+
+
+@contextmanager
+def _blob_lock(root: str):
+    """Exclusive across processes: ``store_blob`` and ``collect_garbage`` never look at the same blob at once."""
+    os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+    with open(os.path.join(root, "blobs", ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def store_blob(stream, root: str):
+    """Store ``stream`` once under its content hash, deduplicating identical files.
+
+    An existing blob gets its mtime refreshed, which keeps ``collect_garbage`` away from it until the attachment
+    row referencing it is committed. Returns the hex SHA-256 digest, the size in bytes and whether a new blob was
+    written (False when a file with the same content was already stored).
+    """
+    temp_dir = os.path.join(root, "blobs", "tmp")
+    temp_name = ".upload-" + os.urandom(8).hex()
+    sha256, size = save_stream(stream, temp_dir, temp_name)
+    temp_path = os.path.join(temp_dir, temp_name)
+    blob_path = os.path.join(root, blob_relative_path(sha256))
+    with _blob_lock(root):
+        if os.path.exists(blob_path):
+            os.utime(blob_path)
+            os.remove(temp_path)
+            return sha256, size, False
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(temp_path, blob_path)
+    return sha256, size, True
+
+
+def collect_garbage(root: str, referenced, min_age: float, dry_run: bool = False):
+    """Remove blobs whose hash is not in ``referenced`` and left-over temporary uploads; returns the paths removed.
+
+    Blobs written or reused in the last ``min_age`` seconds are kept even when unreferenced, since their attachment
+    row may not be committed yet; ``referenced`` must therefore be read before calling. Uploads whose row was never
+    committed (a failed insert, a replaced file) are removed once they are older. ``dry_run`` only lists them.
+    """
+    removed = []
+    blobs = os.path.join(root, "blobs")
+    cutoff = time.time() - min_age
+    for directory, dirs, files in os.walk(blobs):
+        for name in files:
+            path = os.path.join(directory, name)
+            is_temp = os.path.basename(directory) == "tmp" and name.startswith(".upload-")
+            if not is_temp and (directory == blobs or name in referenced):
+                continue
+            with _blob_lock(root):
+                if os.path.exists(path) and os.path.getmtime(path) < cutoff:
+                    if not dry_run:
+                        os.remove(path)
+                    removed.append(path)
+    return removed
@@ -0,0 +1,58 @@
+import hashlib
+from datetime import datetime, timezone
+
+from flask import request, session, make_response, current_app
+from flask_login import current_user
+
+from .user_cache import SESSION_USER_FIELDS
+
+
+def _last_modified(watermark):
+    stamps = [value for value in watermark if isinstance(value, datetime)]
+    if not stamps:
+        return None
+    return max(stamps).replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def page_etag(watermark):
+    """An ETag for a page rendered from data summarised by ``watermark``.
+
+    Besides the data it covers everything else the page depends on: the URL with its filters and cursor, the
+    back link taken from the referrer, and the signed-in user shown in the layout.
+    """
+    user = tuple(getattr(current_user, name, None) for name in SESSION_USER_FIELDS)
+    key = repr((tuple(watermark), user, request.full_path, request.referrer))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _not_modified(etag, last_modified):
+    # If-None-Match wins when both are sent; If-Modified-Since is only consulted without it.
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    return bool(last_modified and request.if_modified_since and last_modified <= request.if_modified_since)
+
+
+def conditional_page(watermark, render):
+    """Answer a GET with ``304 Not Modified`` when the browser's copy is still current, else call ``render``.
+
+    ``watermark`` is the row returned by a model's ``watermark`` query, None when the page has nothing to validate
+    (e.g. a missing record); ``render`` builds the full response only when it is needed. Pages with pending flash
+    messages are always rendered so the messages are shown. Responses are marked private and must be revalidated,
+    so shared caches never store them and the browser asks again on every visit.
+    """
+    if (watermark is None or not current_app.config.get("CONDITIONAL_GET_ENABLED", True)
+            or request.method != "GET" or session.get("_flashes")):
+        return render()
+    etag = page_etag(watermark)
+    last_modified = _last_modified(watermark)
+    if _not_modified(etag, last_modified):
+        response = make_response("", 304)
+    else:
+        response = make_response(render())
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add("Cookie")
+    return response
@@ -0,0 +1,94 @@
+import csv
+import io
+import tempfile
+from datetime import datetime
+
+from flask import Response, current_app, stream_with_context, request, flash, redirect, url_for
+
+EXPORT_FORMATS = ("csv", "xlsx")
+CSV_FLUSH_ROWS = 500
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+XLSX_NOT_AVAILABLE = "Exporting .xlsx files requires the openpyxl package."
+
+
+class ExportException(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="minutes")
+    return value
+
+
+def stream_rows(query):
+    """Yield the rows of ``query`` in batches through a server-side cursor instead of loading them all."""
+    batch_size = current_app.config.get("EXPORT_BATCH_SIZE", 1000)
+    yield from query.execution_options(yield_per=batch_size, stream_results=True)
+
+
+def _csv_chunks(headers, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for number, row in enumerate(rows, start=1):
+        writer.writerow([_cell(value) for value in row])
+        if number % CSV_FLUSH_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _xlsx_chunks(headers, rows):
+    from openpyxl import Workbook
+
+    # A write-only workbook keeps only the current row in memory; the zip container can only be sent once the
+    # sheet is complete, so it is spooled to a temporary file first and streamed from there.
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(headers)
+    for row in rows:
+        sheet.append([_cell(value) for value in row])
+    with tempfile.TemporaryFile() as spool:
+        workbook.save(spool)
+        spool.seek(0)
+        while chunk := spool.read(64 * 1024):
+            yield chunk
+
+
+def export_response(query, headers, filename, export_format="csv"):
+    """A streamed download of ``query``'s rows, one row per result tuple, under ``headers``.
+
+    CSV starts sending as soon as the first rows are fetched; XLSX needs openpyxl.
+    """
+    if export_format == "xlsx":
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            raise ExportException(XLSX_NOT_AVAILABLE)
+        chunks, mimetype = _xlsx_chunks(headers, stream_rows(query)), XLSX_MIMETYPE
+    else:
+        export_format = "csv"
+        chunks, mimetype = _csv_chunks(headers, stream_rows(query)), "text/csv"
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M")
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}-{stamp}.{export_format}"'
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def export_download(query, headers, filename, fallback_endpoint):
+    """``export_response`` in the ``format`` the request asks for; when that cannot be produced the error is
+    flashed and the user sent back to the page they came from, or to ``fallback_endpoint``."""
+    export_format = request.args.get("format", "csv")
+    if export_format not in EXPORT_FORMATS:
+        export_format = "csv"
+    try:
+        return export_response(query, headers, filename, export_format)
+    except ExportException as e:
+        flash(str(e), "error")
+        return redirect(request.referrer or url_for(fallback_endpoint))
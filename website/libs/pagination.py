@@ -0,0 +1,140 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from flask import request, url_for
+from sqlalchemy import and_, or_
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+DEFAULT_PER_PAGE = 10
+MAX_PER_PAGE = 100
+
+
+class KeysetPage:
+    """One page of a keyset (seek) paginated listing.
+
+    Iterating the page yields its rows. There is no total count: the page only knows whether there are rows on
+    either side of it, and the cursor links that lead there.
+    """
+
+    def __init__(self, items, per_page, has_prev, has_next, prev_cursor, next_cursor):
+        self.items = items
+        self.per_page = per_page
+        self.has_prev = has_prev
+        self.has_next = has_next
+        self.prev_cursor = prev_cursor
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def _url(self, cursor):
+        # The path arguments win over a query string argument of the same name, e.g. ``?id=`` on /case/<id>/notes.
+        args = {**request.args.to_dict(), **request.view_args, "cursor": cursor}
+        return url_for(request.endpoint, **args)
+
+    @property
+    def prev_url(self):
+        return self._url(self.prev_cursor) if self.has_prev else None
+
+    @property
+    def next_url(self):
+        return self._url(self.next_cursor) if self.has_next else None
+
+
+def _sort_keys(order_by):
+    """Split ``order_by`` (columns, optionally wrapped in ``desc()``) into ``(column, descending)`` pairs."""
+    keys = []
+    for clause in order_by:
+        if isinstance(clause, UnaryExpression) and clause.modifier in (operators.desc_op, operators.asc_op):
+            keys.append((clause.element, clause.modifier is operators.desc_op))
+        else:
+            keys.append((clause, False))
+    return keys
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        return date.fromisoformat(value["d"])
+    return value
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps({"k": [_encode_value(value) for value in values], "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Decode a cursor token into ``(values, direction)``, or ``(None, "next")`` if it is missing or malformed."""
+    if not token:
+        return None, "next"
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        direction = payload["d"] if payload["d"] in ("next", "prev") else "next"
+        return [_decode_value(value) for value in payload["k"]], direction
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        return None, "next"
+
+
+def _seek_predicate(keys, values, forward):
+    """Rows strictly after ``values`` in the ordering (or strictly before it when not ``forward``)."""
+    alternatives = []
+    for position, (column, descending) in enumerate(keys):
+        after = column < values[position] if descending == forward else column > values[position]
+        equal_prefix = [keys[index][0] == values[index] for index in range(position)]
+        alternatives.append(and_(*equal_prefix, after))
+    return or_(*alternatives)
+
+
+def keyset_paginate(query, order_by, primary_key, per_page=None):
+    """Paginate ``query`` by seeking past the last row seen instead of using OFFSET, and without a COUNT.
+
+    ``order_by`` are the listing's sort columns (wrap a column in ``desc()`` for descending order) and
+    ``primary_key`` breaks ties between equal sort keys. Sort columns must not be NULL. Like Flask-SQLAlchemy's
+    ``paginate``, the ``cursor`` and ``per_page`` request arguments are read when not given.
+    """
+    if per_page is None:
+        per_page = request.args.get("per_page", DEFAULT_PER_PAGE, type=int)
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    keys = _sort_keys(order_by) + [(primary_key, False)]
+    values, direction = decode_cursor(request.args.get("cursor"))
+    if values is not None and len(values) != len(keys):
+        values, direction = None, "next"
+    forward = direction == "next"
+
+    query = query.order_by(None)
+    if values is not None:
+        query = query.filter(_seek_predicate(keys, values, forward))
+    ordering = [column.desc() if descending == forward else column.asc() for column, descending in keys]
+    rows = query.order_by(*ordering).limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+    has_prev, has_next = (values is not None, has_more) if forward else (has_more, True)
+
+    def key_of(row):
+        return [getattr(row, column.key) for column, _ in keys]
+
+    prev_cursor = encode_cursor(key_of(rows[0]), "prev") if rows and has_prev else None
+    next_cursor = encode_cursor(key_of(rows[-1]), "next") if rows and has_next else None
+    return KeysetPage(rows, per_page, has_prev, has_next, prev_cursor, next_cursor)
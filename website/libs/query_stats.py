@@ -0,0 +1,103 @@
+import json
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SLOW_REQUEST_FLAG = "slow_request"
+TOO_MANY_QUERIES_FLAG = "too_many_queries"
+
+_listeners_installed = False
+
+
+class QueryStats:
+    """SQL statements issued while handling a single request."""
+
+    def __init__(self, keep_slowest: int):
+        self.keep_slowest = keep_slowest
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest = []
+
+    def record(self, statement: str, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.slowest.append((duration_ms, statement))
+        self.slowest.sort(key=lambda item: item[0], reverse=True)
+        del self.slowest[self.keep_slowest:]
+
+
+def _current_stats():
+    if not has_request_context():
+        return None
+    return g.get("_query_stats")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats()
+    if stats is None or not conn.info.get("query_start_time"):
+        return
+    started = conn.info["query_start_time"].pop()
+    stats.record(statement, (time.perf_counter() - started) * 1000)
+
+
+def init_query_stats(app):
+    """Count the queries and DB time of every request, report them and flag requests over the thresholds.
+
+    The counters are exposed in a ``Server-Timing`` header and a JSON log line per request. Enabled with the
+    ``QUERY_STATS_ENABLED`` setting.
+    """
+    global _listeners_installed
+    if not _listeners_installed:
+        # Listening on the Engine class covers every engine the app creates, including any replica binds.
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _listeners_installed = True
+
+    slow_request_ms = app.config.get("QUERY_STATS_SLOW_REQUEST_MS", 500)
+    max_queries = app.config.get("QUERY_STATS_MAX_QUERIES", 30)
+    keep_slowest = app.config.get("QUERY_STATS_KEEP_SLOWEST", 3)
+
+    @app.before_request
+    def start_query_stats():
+        g._query_stats = QueryStats(keep_slowest)
+        g._query_stats_started = time.perf_counter()
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.pop("_query_stats", None)
+        if stats is None:
+            return response
+        request_ms = (time.perf_counter() - g.pop("_query_stats_started")) * 1000
+        flags = []
+        if request_ms > slow_request_ms:
+            flags.append(SLOW_REQUEST_FLAG)
+        if stats.count > max_queries:
+            flags.append(TOO_MANY_QUERIES_FLAG)
+
+        response.headers.add("Server-Timing", f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"')
+        response.headers.add("Server-Timing", f"app;dur={request_ms:.1f}")
+
+        log_line = json.dumps({
+            "event": "query_stats",
+            "method": request.method,
+            "endpoint": request.endpoint,
+            "path": request.path,
+            "status": response.status_code,
+            "request_ms": round(request_ms, 1),
+            "query_count": stats.count,
+            "db_ms": round(stats.total_ms, 1),
+            "slowest": [{"ms": round(ms, 1), "sql": " ".join(sql.split())} for ms, sql in stats.slowest],
+            "flags": flags,
+        })
+        if flags:
+            app.logger.warning(log_line)
+        else:
+            app.logger.info(log_line)
+        return response
@@ -1,18 +1,18 @@
 import os
 import smtplib
+import threading
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
-from dotenv import load_dotenv
-
-load_dotenv()
-
 msg = MIMEMultipart()
 
 PASS_NOT_GIVEN = "Password not given"
 EMAIL_NOT_GIVEN = "Email is not given"
 EMAIL_ERROR = "Email not sent , please check user email and password"
 
+# Set whenever mail is queued so idle delivery workers wake up instead of waiting for their next poll.
+OUTBOX_READY = threading.Event()
+
 
 class MailgunException(Exception):
     def __init__(self, message: str):
@@ -22,26 +22,50 @@ class MailgunException(Exception):
 class Mailgun:
     SMTP_PASS = os.getenv("SMTP_PASSWORD")
     EMAIL = os.getenv("SMTP_EMAIL")
+    SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+    SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
+    SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+    SMTP_LOGIN = os.getenv("SMTP_LOGIN", "true").lower() == "true"
+    SMTP_TIMEOUT = int(os.getenv("SMTP_TIMEOUT", 30))
 
     @classmethod
-    def send_email(cls, email: str, subject: str, text: str, html: str):
-        if cls.SMTP_PASS is None:
+    def check_config(cls):
+        if cls.SMTP_LOGIN and cls.SMTP_PASS is None:
             raise MailgunException(PASS_NOT_GIVEN)
 
         if cls.EMAIL is None:
             raise MailgunException(EMAIL_NOT_GIVEN)
 
+    @classmethod
+    def build_message(cls, email: str, subject: str, text: str, html: str) -> MIMEMultipart:
         msg = MIMEMultipart()
         msg['From'] = cls.EMAIL
         msg['Subject'] = subject
         msg['To'] = email
-        body = text
-        html = html
         msg.attach(MIMEText(html, 'html'))
+        return msg
+
+    @classmethod
+    def open_session(cls) -> smtplib.SMTP:
+        """Connect, upgrade to TLS and log in once, so the session can be reused for many messages."""
+        cls.check_config()
         try:
-            with smtplib.SMTP('smtp.gmail.com', 587) as smtp:
+            smtp = smtplib.SMTP(cls.SMTP_HOST, cls.SMTP_PORT, timeout=cls.SMTP_TIMEOUT)
+            if cls.SMTP_STARTTLS:
                 smtp.starttls()
+            if cls.SMTP_LOGIN:
                 smtp.login(cls.EMAIL, cls.SMTP_PASS)
+            return smtp
+        except Exception as e:
+            raise MailgunException(f"{e}:{EMAIL_ERROR}")
+
+    @classmethod
+    def send_email(cls, email: str, subject: str, text: str, html: str):
+        """Send a single message synchronously over a fresh connection; request handlers queue mail instead."""
+        msg = cls.build_message(email, subject, text, html)
+        smtp = cls.open_session()
+        try:
+            with smtp:
                 smtp.send_message(msg)
         except Exception as e:
             raise MailgunException(f"{e}:{EMAIL_ERROR}")
@@ -0,0 +1,24 @@
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+
+def init_template_cache(app):
+    """Keep compiled templates in ``JINJA_BYTECODE_CACHE_DIR`` so fresh processes skip compiling them again."""
+    directory = app.config.get("JINJA_BYTECODE_CACHE_DIR")
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def preload_templates(app):
+    """Compile every template into the environment's cache; returns how many there are.
+
+    Called before the server forks its workers, which then share the compiled templates instead of each compiling
+    them on its first requests.
+    """
+    names = app.jinja_env.list_templates(filter_func=lambda name: name.endswith(".html"))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
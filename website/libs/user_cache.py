@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask_login import UserMixin
+
+SESSION_USER_FIELDS = ("id", "user_type", "is_active", "confirmed", "email", "first_name", "last_name", "image")
+
+
+class SessionUser(UserMixin):
+    """Slim, read-only stand-in for ``UserModel`` used as ``current_user``.
+
+    Only holds what the layout and the permission checks need, so loading it never fetches the password hash.
+    Routes that change the user still load the ``UserModel`` row explicitly.
+    """
+    is_active = True
+
+    def __init__(self, **fields):
+        for name in SESSION_USER_FIELDS:
+            setattr(self, name, fields.get(name))
+
+    def __repr__(self):
+        return f"{self.user_type}- {self.first_name} {self.last_name}"
+
+
+class TTLLRUBackend:
+    """In-process store that keeps at most ``max_size`` entries, each for at most ``ttl`` seconds."""
+
+    def __init__(self, max_size=1024, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class UserSessionCache:
+    """Caches the ``SessionUser`` fields per user id in a pluggable backend.
+
+    A backend is any object with ``get(key)``, ``set(key, value)`` and ``delete(key)``; values are plain dicts so
+    a shared store (e.g. Redis behind a small adapter) can be used when several processes must see invalidations.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or TTLLRUBackend()
+        self.enabled = True
+
+    def configure(self, enabled=True, backend=None, max_size=1024, ttl=60):
+        self.enabled = enabled
+        self.backend = backend or TTLLRUBackend(max_size=max_size, ttl=ttl)
+
+    def get(self, user_id, loader):
+        """Return the ``SessionUser`` for ``user_id``, calling ``loader(user_id)`` for the fields on a miss."""
+        fields = self.backend.get(user_id) if self.enabled else None
+        if fields is None:
+            fields = loader(user_id)
+            if fields is None:
+                return None
+            if self.enabled:
+                self.backend.set(user_id, fields)
+        return SessionUser(**fields)
+
+    def invalidate(self, user_id):
+        if user_id is not None:
+            self.backend.delete(user_id)
+
+
+user_cache = UserSessionCache()
@@ -0,0 +1,149 @@
+import hmac
+import os
+import time
+from datetime import datetime
+
+from flask import g, request, abort, Response, has_app_context
+from prometheus_client import CollectorRegistry, Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import event, func
+from sqlalchemy.pool import QueuePool
+
+from .db import db
+from .models import OutboxEmailModel
+
+# Set (by gunicorn.conf.py) for multi-process servers: every worker writes its samples to files in this directory
+# and a scrape, whichever worker answers it, adds them up.
+MULTIPROCESS_DIR = "PROMETHEUS_MULTIPROC_DIR"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Outbox states still waiting for delivery or attention; sent mail is left out so the count stays an index scan.
+QUEUED_STATES = ("pending", "sending", "failed")
+
+registry = CollectorRegistry(auto_describe=True)
+REQUESTS = Counter("http_requests_total", "Requests handled, by blueprint, endpoint, method and status.",
+                   ["blueprint", "endpoint", "method", "status"], registry=registry)
+LATENCY = Histogram("http_request_duration_seconds", "Time spent handling requests.", ["blueprint", "endpoint"],
+                    buckets=LATENCY_BUCKETS, registry=registry)
+IN_PROGRESS = Gauge("http_requests_in_progress", "Requests being handled right now.", ["blueprint", "endpoint"],
+                    multiprocess_mode="livesum", registry=registry)
+POOL_IN_USE = Gauge("db_pool_connections_in_use", "Database connections checked out of the pool.", ["bind"],
+                    multiprocess_mode="livesum", registry=registry)
+POOL_CAPACITY = Gauge("db_pool_connections_max", "Connections the pool may open, pool size plus overflow.",
+                      ["bind"], multiprocess_mode="livesum", registry=registry)
+
+
+class _OutboxCollector:
+    """Email queue depth, read from the outbox when scraped; the same for every worker, so not kept per process."""
+
+    def collect(self):
+        if not has_app_context():
+            return
+        depth = GaugeMetricFamily("email_outbox_messages", "Outbox messages not delivered yet, by status.",
+                                  labels=["status"])
+        counts = dict(db.session.query(OutboxEmailModel.status, func.count()).filter(
+            OutboxEmailModel.status.in_(QUEUED_STATES)).group_by(OutboxEmailModel.status))
+        for status in QUEUED_STATES:
+            depth.add_metric([status], counts.get(status, 0))
+        yield depth
+        oldest = db.session.query(func.min(OutboxEmailModel.next_attempt_at)).filter(
+            OutboxEmailModel.status == "pending", OutboxEmailModel.next_attempt_at <= datetime.utcnow()).scalar()
+        yield GaugeMetricFamily("email_outbox_oldest_due_seconds", "How long the oldest due message has waited.",
+                                value=(datetime.utcnow() - oldest).total_seconds() if oldest else 0)
+
+
+class Metrics:
+    """Request, database pool and email queue metrics, served in the Prometheus text format at ``METRICS_PATH``.
+
+    Requests are counted and timed per blueprint and endpoint (never per URL, so ids do not multiply the series)
+    from ``before_request`` to ``teardown_request``, which also covers requests ending in an exception. Under a
+    multi-process server set ``PROMETHEUS_MULTIPROC_DIR`` before the app is imported, as gunicorn.conf.py does;
+    gauges then add up the live workers. The scrape endpoint is only registered with a ``METRICS_TOKEN``, which
+    scrapers send as a bearer token: the output names every endpoint and each scrape queries the outbox.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._children = {}
+        self._pools = []
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["metrics"] = self
+        if not app.config.get("METRICS_ENABLED", True):
+            return
+        app.before_request(self._start)
+        app.after_request(self._status)
+        app.teardown_request(self._finish)
+        if app.config.get("METRICS_TOKEN"):
+            app.add_url_rule(app.config.get("METRICS_PATH", "/metrics"), "metrics", self.scrape)
+        else:
+            app.logger.info("METRICS_TOKEN is not set, metrics are collected but not served")
+        with app.app_context():
+            for bind, engine in db.engines.items():
+                self._watch_pool(bind or "default", engine)
+
+    def _watch_pool(self, bind, engine):
+        in_use = POOL_IN_USE.labels(bind)
+        event.listen(engine, "checkout", lambda *args: in_use.inc())
+        event.listen(engine, "checkin", lambda *args: in_use.dec())
+        self._pools.append((POOL_CAPACITY.labels(bind), engine))
+
+    def _report_capacity(self):
+        # Once per process on its first request, so a preloading master never counts towards the workers' sum.
+        self._pid = os.getpid()
+        for capacity, engine in self._pools:
+            pool = engine.pool
+            if isinstance(pool, QueuePool) and pool._max_overflow >= 0:
+                capacity.set(pool.size() + pool._max_overflow)
+
+    def _series(self):
+        key = (request.blueprint or "", request.endpoint or "none")
+        series = self._children.get(key)
+        if series is None:
+            series = self._children[key] = (LATENCY.labels(*key), IN_PROGRESS.labels(*key))
+        return key, series
+
+    def _start(self):
+        if self._pid != os.getpid():
+            self._report_capacity()
+        if request.endpoint == "metrics":
+            return
+        g._metrics_started = time.perf_counter()
+        self._series()[1][1].inc()
+
+    def _status(self, response):
+        g._metrics_status = response.status_code
+        return response
+
+    def _finish(self, exc):
+        started = g.pop("_metrics_started", None)
+        if started is None:
+            return
+        key, (latency, in_progress) = self._series()
+        in_progress.dec()
+        latency.observe(time.perf_counter() - started)
+        status = g.pop("_metrics_status", 500)
+        REQUESTS.labels(*key, request.method, str(status)).inc()
+
+    @staticmethod
+    def _registry():
+        scraped = CollectorRegistry(auto_describe=False)
+        if os.environ.get(MULTIPROCESS_DIR):
+            MultiProcessCollector(scraped)
+        else:
+            scraped.register(registry)
+        scraped.register(_OutboxCollector())
+        return scraped
+
+    def scrape(self):
+        expected = f"Bearer {self.app.config['METRICS_TOKEN']}"
+        if not hmac.compare_digest(request.headers.get("Authorization", "").encode(), expected.encode()):
+            abort(401)
+        return Response(generate_latest(self._registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+metrics = Metrics()
@@ -3,3 +3,7 @@ from .case_models import CaseModel, CaseAttorneyModel, CaseNoteModel, CaseDetail
     CaseHearingModel
 from .client_model import ClientModel
 from .user_models import UserModel, ConfirmationModel
+from .outbox_model import OutboxEmailModel
+from .stats_model import CaseStatModel, STAT_DIMENSIONS
+from .audit_trail_model import AuditTrailModel
+from .reminder_model import HearingReminderModel
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from ..db import db
+
+
+class AuditTrailModel(db.Model):
+    """Append-only record of who created, changed or deleted an audited row, and what changed.
+
+    Rows are written in batches by ``website.audit`` after the audited transaction commits; ``changes`` maps each
+    column to ``[old, new]`` (``old`` is None for inserts, ``new`` for deletes). ``user_id`` is deliberately not a
+    foreign key, so entries outlive the users they name.
+    """
+    __tablename__ = "audit_trail"
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.Enum("insert", "update", "delete", name="audit_action"), nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    changes = db.Column(db.JSON, nullable=False)
+    ts = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_audit_trail_entity_entity_id_ts", "entity", "entity_id", "ts"),
+    )
+
+    @classmethod
+    def find_by_entity(cls, entity, entity_id, limit=None):
+        """The history of one row, newest first."""
+        query = cls.query.filter_by(entity=entity, entity_id=entity_id).order_by(cls.ts.desc(), cls.id.desc())
+        return query.limit(limit).all() if limit else query.all()
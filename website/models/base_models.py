@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from ..db import db
+from ..db import db, commit
 
 
 class RoleModel(db.Model):
@@ -22,11 +22,11 @@ class RoleModel(db.Model):
 
     def save_to_db(self):
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     def update_db(self):
         self.update_date = datetime.utcnow()
-        db.session.commit()
+        commit()
 
     def make_active(self):
         self.is_active = True
@@ -1,6 +1,33 @@
+from collections import Counter
 from datetime import datetime
 
-from ..db import db
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import joinedload, selectinload, load_only, query_expression, with_expression
+
+from ..db import db, commit
+from .stats_model import CaseStatModel
+from .user_models import UserModel
+
+LOADING_PROFILES = ("detail", "list")
+
+
+def _scalar(expression, *criteria):
+    return db.select(expression).where(*criteria).scalar_subquery()
+
+
+def _joined_ids(column, *criteria):
+    """The matching values of ``column`` in ascending order, joined into one string such as ``"3,7,12"``."""
+    if db.engine.dialect.name == "postgresql":
+        joined = db.func.string_agg(db.cast(column, db.Text), aggregate_order_by(db.literal_column("','"), column))
+        return _scalar(joined, *criteria)
+    # group_concat (SQLite, MySQL) joins the values in the order the rows arrive, which the subquery sorts.
+    ordered = db.select(column.label("value")).where(*criteria).order_by(column).subquery()
+    return db.select(db.func.group_concat(ordered.c.value)).scalar_subquery()
+
+
+def _changed_at(model):
+    """When a row last changed: ``last_updated`` once it has been edited, ``date_created`` before that."""
+    return db.func.coalesce(model.last_updated, model.date_created)
 
 
 class CaseModel(db.Model):
@@ -34,18 +61,24 @@ class CaseModel(db.Model):
                                   cascade="all, delete-orphan")
     court_hearings = db.relationship('CaseHearingModel', back_populates='case', lazy='dynamic',
                                      cascade='all, delete-orphan')
+    note_count = query_expression()
+
+    __table_args__ = (
+        db.Index("ix_cases_client_id_case_number", "client_id", "case_number"),
+        db.Index("ix_cases_user_id", "user_id"),
+    )
 
     def save_to_db(self):
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     def delete_from_db(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
 
     def update_db(self):
         self.last_updated = datetime.utcnow()
-        db.session.commit()
+        commit()
 
     @classmethod
     def find_by_id(cls, id):
@@ -55,6 +88,108 @@ class CaseModel(db.Model):
     def find_by_case_number(cls, case_number):
         return cls.query.filter_by(case_number=case_number).first()
 
+    def assign_attorneys(self, user_ids):
+        """Make ``user_ids`` exactly the attorneys of this case, in a single transaction."""
+        return self.set_attorneys([self.id], user_ids)
+
+    @classmethod
+    def set_attorneys(cls, case_ids, user_ids):
+        """Make ``user_ids`` exactly the attorneys of every case in ``case_ids``.
+
+        The current assignments are read in one query and only the difference is written: one DELETE for the
+        dropped pairs and one executemany INSERT for the new ones, committed together. Returns the number of
+        assignments added and removed.
+        """
+        case_ids, desired = set(case_ids), set(user_ids)
+        current = db.session.query(CaseAttorneyModel.id, CaseAttorneyModel.case_id, CaseAttorneyModel.user_id).filter(
+            CaseAttorneyModel.case_id.in_(case_ids)).all()
+        existing = {(row.case_id, row.user_id) for row in current}
+        removed = [row.id for row in current if row.user_id not in desired]
+        added = [{"case_id": case_id, "user_id": user_id} for case_id in case_ids for user_id in desired
+                 if (case_id, user_id) not in existing]
+        changed_cases = {row.case_id for row in current if row.user_id not in desired} | {
+            row["case_id"] for row in added}
+        if removed:
+            db.session.execute(db.delete(CaseAttorneyModel).where(CaseAttorneyModel.id.in_(removed)))
+        if added:
+            db.session.execute(db.insert(CaseAttorneyModel), added)
+        if changed_cases:
+            db.session.execute(db.update(cls).where(cls.id.in_(changed_cases)).values(last_updated=datetime.utcnow()))
+        # Core statements bypass the flush hooks that maintain the dashboard rollup, so adjust it here.
+        deltas = Counter(("attorney", row["user_id"]) for row in added)
+        deltas.subtract(("attorney", row.user_id) for row in current if row.user_id not in desired)
+        CaseStatModel.apply(db.session.connection(), deltas)
+        commit()
+        return len(added), len(removed)
+
+    @classmethod
+    def reassign_attorney(cls, from_user_id, to_user_id):
+        """Move every case of one attorney to another, e.g. when a lawyer leaves the firm, in one transaction.
+
+        Returns the number of cases that were reassigned, none when both ids are the same attorney.
+        """
+        if from_user_id == to_user_id:
+            return 0
+        case_ids = db.select(CaseAttorneyModel.case_id).where(CaseAttorneyModel.user_id == from_user_id)
+        already_assigned = db.select(CaseAttorneyModel.case_id).where(CaseAttorneyModel.user_id == to_user_id)
+        now = datetime.utcnow()
+        db.session.execute(db.update(cls).where(cls.id.in_(case_ids)).values(last_updated=now))
+        inserted = db.session.execute(db.insert(CaseAttorneyModel).from_select(
+            ["case_id", "user_id"],
+            db.select(CaseAttorneyModel.case_id, db.literal(to_user_id)).where(
+                CaseAttorneyModel.user_id == from_user_id, CaseAttorneyModel.case_id.not_in(already_assigned))))
+        moved = db.session.execute(db.delete(CaseAttorneyModel).where(CaseAttorneyModel.user_id == from_user_id))
+        CaseStatModel.apply(db.session.connection(), Counter(
+            {("attorney", from_user_id): -moved.rowcount, ("attorney", to_user_id): inserted.rowcount}))
+        commit()
+        return moved.rowcount
+
+    @classmethod
+    def loading_options(cls, profile):
+        """Loader options for a named profile, so a page loads its case data in a fixed number of queries.
+
+        "detail" eager loads everything ``cases/case_info.html`` touches and fills ``note_count``, "list" only loads
+        the columns the case listings render.
+        """
+        if profile == "detail":
+            note_count = db.select(db.func.count(CaseNoteModel.id)).where(
+                CaseNoteModel.case_id == cls.id).correlate_except(CaseNoteModel).scalar_subquery()
+            return [
+                joinedload(cls.client),
+                selectinload(cls.attorneys),
+                selectinload(cls.case_details),
+                with_expression(cls.note_count, note_count),
+            ]
+        if profile == "list":
+            return [load_only(cls.id, cls.case_number, cls.title, cls.court_date, cls.priority, cls.status,
+                              cls.date_created)]
+        raise ValueError(f"Unknown loading profile {profile!r}, expected one of {LOADING_PROFILES}")
+
+    @classmethod
+    def query_with_profile(cls, profile):
+        return cls.query.options(*cls.loading_options(profile))
+
+    @classmethod
+    def find_by_id_with_profile(cls, id, profile="detail"):
+        return cls.query_with_profile(profile).filter(cls.id == id).first()
+
+    @classmethod
+    def watermark(cls, id):
+        """Validators for ``cases/case_info.html`` in one query: the case's and its client's timestamps, the assigned
+        attorney ids with their latest profile change, and counts and high-water marks of the notes and details it
+        shows. None when the case does not exist."""
+        from .client_model import ClientModel
+        return db.session.query(
+            _changed_at(cls),
+            _scalar(_changed_at(ClientModel), ClientModel.id == cls.client_id),
+            _joined_ids(CaseAttorneyModel.user_id, CaseAttorneyModel.case_id == id),
+            _scalar(db.func.max(db.func.coalesce(UserModel.update_date, UserModel.creation_date)),
+                    UserModel.id == CaseAttorneyModel.user_id, CaseAttorneyModel.case_id == id),
+            _scalar(db.func.count(CaseNoteModel.id), CaseNoteModel.case_id == id),
+            _scalar(db.func.count(CaseDetailModel.id), CaseDetailModel.case_id == id),
+            _scalar(db.func.max(_changed_at(CaseDetailModel)), CaseDetailModel.case_id == id),
+        ).filter(cls.id == id).first()
+
 
 class CaseAttorneyModel(db.Model):
     __tablename__ = "case_attorneys"
@@ -65,6 +200,7 @@ class CaseAttorneyModel(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('case_id', 'user_id', ),
+        db.Index("ix_case_attorneys_user_id_case_id", "user_id", "case_id"),
     )
 
     @classmethod
@@ -73,11 +209,11 @@ class CaseAttorneyModel(db.Model):
 
     def save_to_db(self):
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     def delete_from_db(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
 
 
 class CaseHearingModel(db.Model):
@@ -94,17 +230,23 @@ class CaseHearingModel(db.Model):
     case = db.relationship('CaseModel', back_populates='court_hearings')
     user = db.relationship("UserModel", back_populates="court_hearings")
 
+    __table_args__ = (
+        db.Index("ix_case_hearing_case_id_hearing_date", "case_id", "hearing_date", "id"),
+        db.Index("ix_case_hearing_hearing_date", "hearing_date"),
+        db.Index("ix_case_hearing_next_hearing_date", "next_hearing_date"),
+    )
+
     def save_to_db(self):
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     def delete_from_db(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
 
     def update_db(self):
         self.last_updated = datetime.utcnow()
-        db.session.commit()
+        commit()
 
     @classmethod
     def find_by_id(cls, id):
@@ -136,17 +278,21 @@ class CaseDetailModel(db.Model):
     case = db.relationship("CaseModel", back_populates="case_details")
     user = db.relationship("UserModel", back_populates="case_details")
 
+    __table_args__ = (
+        db.Index("ix_case_details_case_id", "case_id"),
+    )
+
     def save_to_db(self):
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     def delete_from_db(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
 
     def update_db(self):
         self.last_updated = datetime.utcnow()
-        db.session.commit()
+        commit()
 
     @classmethod
     def find_by_id(cls, id):
@@ -156,6 +302,12 @@ class CaseDetailModel(db.Model):
     def find_by_case_id(cls, id):
         return cls.query.filter_by(case_id=id).first()
 
+    @classmethod
+    def watermark(cls, case_id):
+        """``(count, last change)`` of a case's details, the validators of ``cases/case_detail.html``."""
+        return db.session.query(db.func.count(cls.id), db.func.max(_changed_at(cls))).filter(
+            cls.case_id == case_id).one()
+
 
 class CaseNoteModel(db.Model):
     __tablename__ = "case_notes"
@@ -166,31 +318,47 @@ class CaseNoteModel(db.Model):
     note = db.Column(db.Text, nullable=False)
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
     last_updated = db.Column(db.DateTime, onupdate=datetime.utcnow)
-    reference_date = db.Column(db.DateTime)
+    reference_date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     case = db.relationship("CaseModel", back_populates="case_notes")
     user = db.relationship("UserModel", back_populates="user_notes")
 
     def save_to_db(self):
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     def delete_from_db(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
 
     def update_db(self):
         self.last_updated = datetime.utcnow()
-        db.session.commit()
+        commit()
 
     @classmethod
     def find_by_case_id(cls, id):
         return cls.query.filter_by(case_id=id).order_by(cls.reference_date.desc())
 
+    @classmethod
+    def watermark(cls, case_id):
+        """Validators for a case's note listing in one query: the case's title and timestamp plus the count, newest id
+        and last change of its notes. None when the case does not exist."""
+        return db.session.query(
+            CaseModel.title,
+            _changed_at(CaseModel),
+            _scalar(db.func.count(cls.id), cls.case_id == case_id),
+            _scalar(db.func.max(cls.id), cls.case_id == case_id),
+            _scalar(db.func.max(_changed_at(cls)), cls.case_id == case_id),
+        ).filter(CaseModel.id == case_id).first()
+
     @classmethod
     def find_by_id(cls, id):
         return cls.query.get(id)
 
 
+db.Index("ix_case_notes_case_id_reference_date", CaseNoteModel.case_id, CaseNoteModel.reference_date.desc(),
+         CaseNoteModel.id)
+
+
 class CaseAttachmentModel(db.Model):
     __tablename__ = "case_attachments"
 
@@ -199,6 +367,8 @@ class CaseAttachmentModel(db.Model):
     attachment_filename = db.Column(db.String(200), nullable=False)
     description = db.Column(db.String(200), nullable=False)
     file_url = db.Column(db.String(200), nullable=False)
+    sha256 = db.Column(db.String(64), nullable=True, index=True)
+    size = db.Column(db.BigInteger, nullable=True)
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     case_id = db.Column(db.Integer, db.ForeignKey('cases.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -208,20 +378,29 @@ class CaseAttachmentModel(db.Model):
 
     def save_to_db(self):
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     def delete_from_db(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
 
     def update_db(self):
         self.last_updated = datetime.utcnow()
-        db.session.commit()
+        commit()
 
     @classmethod
     def find_by_case_id(cls, id):
         return cls.query.filter_by(case_id=id).order_by(cls.uploaded_at.desc())
 
+    @classmethod
+    def referenced_hashes(cls):
+        """Content hashes of every stored blob still used by an attachment."""
+        return {row.sha256 for row in db.session.query(cls.sha256).filter(cls.sha256.isnot(None)).distinct()}
+
     @classmethod
     def find_by_id(cls, id):
         return cls.query.get(id)
+
+
+db.Index("ix_case_attachments_case_id_uploaded_at", CaseAttachmentModel.case_id, CaseAttachmentModel.uploaded_at.desc(),
+         CaseAttachmentModel.id)
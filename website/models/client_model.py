@@ -1,6 +1,8 @@
 from datetime import datetime
 
-from ..db import db
+from ..db import db, commit
+from .case_models import CaseModel
+from .user_models import UserModel
 
 
 class ClientModel(db.Model):
@@ -30,15 +32,15 @@ class ClientModel(db.Model):
 
     def save_to_db(self):
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     def delete_from_db(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
 
     def update_db(self):
         self.last_updated = datetime.utcnow()
-        db.session.commit()
+        commit()
 
     @classmethod
     def find_by_id(cls, client_id):
@@ -59,3 +61,24 @@ class ClientModel(db.Model):
     def find_by_identification(cls, identification_no):
         """Find a client by their identification number."""
         return cls.query.filter_by(identification_no=identification_no).first()
+
+    @classmethod
+    def watermark(cls, client_id):
+        """Validators for ``clients/client_info.html`` in one query: the client's timestamp, the count and last change
+        of their cases and the last change of the matching client account. None when the client does not exist."""
+        cases = db.select(db.func.count(CaseModel.id), db.func.max(
+            db.func.coalesce(CaseModel.last_updated, CaseModel.date_created))).where(
+            CaseModel.client_id == client_id).subquery()
+        account = db.select(db.func.max(db.func.coalesce(UserModel.update_date, UserModel.creation_date))).where(
+            UserModel.email == cls.email).scalar_subquery()
+        return db.session.query(db.func.coalesce(cls.last_updated, cls.date_created), account, *cases.c).select_from(
+            cls).join(cases, db.true()).filter(cls.id == client_id).first()
+
+
+# Prefix lookups for the typeahead endpoints filter on lower(column); see ``search.prefix_condition``.
+db.Index("ix_clients_lower_first_name", db.func.lower(ClientModel.first_name).label("lower_first_name"),
+         postgresql_ops={"lower_first_name": "text_pattern_ops"})
+db.Index("ix_clients_lower_last_name", db.func.lower(ClientModel.last_name).label("lower_last_name"),
+         postgresql_ops={"lower_last_name": "text_pattern_ops"})
+db.Index("ix_clients_lower_email", db.func.lower(ClientModel.email).label("lower_email"),
+         postgresql_ops={"lower_email": "text_pattern_ops"})
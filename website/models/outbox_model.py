@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from ..db import db, commit, after_commit
+from ..libs.send_email import Mailgun, OUTBOX_READY
+
+
+class OutboxEmailModel(db.Model):
+    __tablename__ = "email_outbox"
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    text = db.Column(db.Text, nullable=True)
+    html = db.Column(db.Text, nullable=False)
+    status = db.Column(db.Enum("pending", "sending", "sent", "failed", name="outbox_status"), default="pending",
+                       nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    claim_token = db.Column(db.String(32), nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    date_created = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    @classmethod
+    def enqueue(cls, email: str, subject: str, text: str, html: str) -> "OutboxEmailModel":
+        """Persist a message for background delivery and wake the delivery workers once it is committed."""
+        Mailgun.check_config()
+        message = cls(recipient=email, subject=subject, text=text, html=html)
+        after_commit(OUTBOX_READY.set)
+        message.save_to_db()
+        return message
+
+    @classmethod
+    def find_by_claim_token(cls, claim_token):
+        return cls.query.filter_by(claim_token=claim_token, status="sending").order_by(cls.id).all()
+
+    @classmethod
+    def count_pending(cls):
+        return cls.query.filter(cls.status.in_(("pending", "sending"))).count()
+
+    def save_to_db(self):
+        db.session.add(self)
+        commit()
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from ..db import db, commit
+
+
+class HearingReminderModel(db.Model):
+    """One row per attorney and reminder window whose hearing digest has been queued.
+
+    The primary key makes ``flask reminders send`` idempotent: a re-run for the same window skips everyone listed
+    here, and two concurrent runs cannot both queue a digest for the same attorney. A window is its first day and
+    its length, so a longer run starting the same day still sends the hearings the shorter one left out.
+    """
+    __tablename__ = "hearing_reminders"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    window_start = db.Column(db.Date, primary_key=True)
+    window_days = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    hearings = db.Column(db.Integer, nullable=False)
+    outbox_id = db.Column(db.Integer, db.ForeignKey("email_outbox.id"), nullable=True)
+    date_created = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @classmethod
+    def reminded_user_ids(cls, window_start, window_days):
+        return {user_id for user_id, in db.session.query(cls.user_id).filter(
+            cls.window_start == window_start, cls.window_days == window_days)}
+
+    def save_to_db(self):
+        db.session.add(self)
+        commit()
@@ -0,0 +1,66 @@
+from collections import Counter
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..db import db
+
+# Rollup dimensions and what their ``key`` holds.
+STAT_DIMENSIONS = {
+    "status": "case status",
+    "case_type": "case type",
+    "priority": "case priority",
+    "attorney": "user id of an assigned attorney",
+    "client": "client id",
+    "hearing_day": "hearing date as YYYY-MM-DD",
+}
+
+
+class CaseStatModel(db.Model):
+    """Precomputed case and hearing counts, one row per ``(dimension, key)``.
+
+    Kept current by ``website.dashboard`` as cases, hearings and assignments change, so the dashboard reads a
+    handful of rows by primary key instead of grouping the case tables on every view.
+    """
+    __tablename__ = "case_stats"
+
+    dimension = db.Column(db.String(20), primary_key=True)
+    key = db.Column(db.String(80), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def apply(cls, connection, deltas: Counter):
+        """Add ``{(dimension, key): delta}`` to the counts in one upsert, inside the caller's transaction."""
+        rows = [{"dimension": dimension, "key": str(key), "count": delta}
+                for (dimension, key), delta in deltas.items() if delta and key is not None]
+        if not rows:
+            return
+        dialect = connection.dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = (postgresql if dialect == "postgresql" else sqlite).insert(cls.__table__)
+            connection.execute(insert.on_conflict_do_update(
+                index_elements=[cls.dimension, cls.key], set_={"count": cls.__table__.c.count + insert.excluded.count}),
+                rows)
+            return
+        for row in rows:
+            updated = connection.execute(db.update(cls).where(
+                cls.dimension == row["dimension"], cls.key == row["key"]).values(count=cls.count + row["count"]))
+            if not updated.rowcount:
+                connection.execute(db.insert(cls), row)
+
+    @classmethod
+    def counts(cls, dimension, keys=None):
+        """``{key: count}`` for a dimension, optionally only for ``keys``."""
+        query = db.session.query(cls.key, cls.count).filter(cls.dimension == dimension, cls.count != 0)
+        if keys is not None:
+            query = query.filter(cls.key.in_([str(key) for key in keys]))
+        return dict(query)
+
+    @classmethod
+    def total(cls, dimension, start_key=None, end_key=None):
+        """Sum of a dimension's counts, for keys in ``[start_key, end_key]`` when given (e.g. a date range)."""
+        query = db.session.query(db.func.coalesce(db.func.sum(cls.count), 0)).filter(cls.dimension == dimension)
+        if start_key is not None:
+            query = query.filter(cls.key >= start_key)
+        if end_key is not None:
+            query = query.filter(cls.key <= end_key)
+        return query.scalar()
@@ -6,8 +6,9 @@ from flask import request, url_for
 from flask_login import UserMixin
 from passlib.handlers.pbkdf2 import pbkdf2_sha256
 
-from ..db import db
-from ..libs.send_email import Mailgun
+from ..db import db, commit, after_commit
+from ..libs.user_cache import user_cache
+from .outbox_model import OutboxEmailModel
 
 CONFIRMTIMEDELTA = 3600
 
@@ -51,21 +52,36 @@ class UserModel(db.Model, UserMixin):
     def find_by_id(cls, _id) -> "UserModel":
         return cls.query.get_or_404(_id)
 
+    @classmethod
+    def find_session_fields(cls, _id) -> dict:
+        """Fetch only the columns ``SessionUser`` needs, including the latest confirmation flag, in one query."""
+        confirmed = db.select(ConfirmationModel.confirmed).where(ConfirmationModel.user_id == cls.id).order_by(
+            ConfirmationModel.expire_at.desc()).limit(1).correlate(cls).scalar_subquery()
+        row = db.session.query(cls.id, cls.user_type, cls.is_active, confirmed.label("confirmed"), cls.email,
+                               cls.first_name, cls.last_name, cls.image).filter(cls.id == _id).first()
+        return row._asdict() if row else None
+
     def save_to_db(self):
+        user_id = self.id
         db.session.add(self)
-        db.session.commit()
+        after_commit(lambda: user_cache.invalidate(user_id))
+        commit()
 
     def check_pwd(self, password):
         is_password_correct = pbkdf2_sha256.verify(password, self.password)
         return is_password_correct
 
     def delete_from_db(self):
+        user_id = self.id
         db.session.delete(self)
-        db.session.commit()
+        after_commit(lambda: user_cache.invalidate(user_id))
+        commit()
 
     def update_db(self):
+        user_id = self.id
         self.update_date = datetime.utcnow()
-        db.session.commit()
+        after_commit(lambda: user_cache.invalidate(user_id))
+        commit()
 
     @property
     def most_recent_confirmation(self) -> "ConfirmationModel":
@@ -86,7 +102,7 @@ class UserModel(db.Model, UserMixin):
         text = f"Click here to confirm your registration: {link}"
         html = f"<html> Please click the link to confirm your registration: <a href={link}> Link </a> </html>"
 
-        Mailgun.send_email(self.email, subject, text, html)
+        OutboxEmailModel.enqueue(self.email, subject, text, html)
 
     def send_pass_reset_email(self):
         subject = "Password Reset"
@@ -94,7 +110,7 @@ class UserModel(db.Model, UserMixin):
         text = f"Click here to change your password: {link}"
         html = f"<html> Please click the link to change your password: <a href={link}> Link </a> </html>"
 
-        Mailgun.send_email(self.email, subject, text, html)
+        OutboxEmailModel.enqueue(self.email, subject, text, html)
 
 
 class ConfirmationModel(db.Model):
@@ -125,9 +141,25 @@ class ConfirmationModel(db.Model):
             self.save_to_db()
 
     def save_to_db(self):
+        user_id = self.user_id
         db.session.add(self)
-        db.session.commit()
+        after_commit(lambda: user_cache.invalidate(user_id))
+        commit()
 
     def delete_from_db(self):
+        user_id = self.user_id
         db.session.delete(self)
-        db.session.commit()
+        after_commit(lambda: user_cache.invalidate(user_id))
+        commit()
+
+
+db.Index("ix_confirmations_user_id_expire_at", ConfirmationModel.user_id, ConfirmationModel.expire_at.desc())
+
+
+# Prefix lookups for the typeahead endpoints filter on lower(column); see ``search.prefix_condition``.
+db.Index("ix_users_lower_first_name", db.func.lower(UserModel.first_name).label("lower_first_name"),
+         postgresql_ops={"lower_first_name": "text_pattern_ops"})
+db.Index("ix_users_lower_last_name", db.func.lower(UserModel.last_name).label("lower_last_name"),
+         postgresql_ops={"lower_last_name": "text_pattern_ops"})
+db.Index("ix_users_lower_email", db.func.lower(UserModel.email).label("lower_email"),
+         postgresql_ops={"lower_email": "text_pattern_ops"})
@@ -2,3 +2,4 @@ from .auth_path import auth_blp
 from .case_path import case_blp
 from .client_path import client_blp
 from .home_path import home_blp
+from .search_path import search_blp
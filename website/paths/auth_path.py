@@ -1,4 +1,3 @@
-import secrets
 import traceback
 from datetime import datetime
 
@@ -9,10 +8,11 @@ from passlib.handlers.pbkdf2 import pbkdf2_sha256
 from sqlalchemy.exc import IntegrityError
 
 from website.forms import RegistrationForm, LoginForm, UpdateProfileForm
-from ..db import db
+from ..db import db, unit_of_work
+from ..libs.pagination import keyset_paginate
 from ..libs.send_email import MailgunException
 from ..models import UserModel, ConfirmationModel
-from ..photos import photos
+from ..photos import save_photo
 
 auth_blp = Blueprint("auth_blp", __name__, static_folder="static", template_folder="templates")
 
@@ -63,15 +63,16 @@ def register_admin():
             flash(USER_PHONE_EXISTS, category="error")
         if pass1 != pass2:
             flash(PASSWORD_MISMATCH_ERROR, category="error")
-        image = photos.save(image, name=secrets.token_hex(10) + ".")
+        image = save_photo(image)
         user = UserModel(email=email, phone_no=phone_no, user_type="super_admin", last_name=last_name,
                          first_name=first_name, password=pbkdf2_sha256.hash(pass1), date_registered=datetime.utcnow(),
                          image=image)
         try:
-            user.save_to_db()
-            confirmation = ConfirmationModel(user.id)
-            confirmation.save_to_db()
-            user.send_email()
+            with unit_of_work():
+                user.save_to_db()
+                confirmation = ConfirmationModel(user.id)
+                confirmation.save_to_db()
+                user.send_email()
             flash(USER_CREATED_SUCCESS, "success")
         except IntegrityError as e:
             db.session.rollback()
@@ -80,11 +81,9 @@ def register_admin():
             else:
                 flash(SERVER_ERROR, category="error")
         except MailgunException as e:
-            user.delete_from_db()
             traceback.print_exc()
             flash(EMAIL_ERROR, category="error")
         except Exception as e:
-            user.delete_from_db()
             traceback.print_exc()
             flash(SERVER_ERROR, category="error")
     return render_template("auth/register.html", form=form, user=current_user)
@@ -122,10 +121,11 @@ def reconfirmation(user_id):
         if confirmation:
             if confirmation.confirmed:
                 flash(CONFIRMATION_CONFIRMED, "error")
-            confirmation.force_to_expire()
-            new_confirmation = ConfirmationModel(user_id)
-            new_confirmation.save_to_db()
-            user.send_email()
+            with unit_of_work():
+                confirmation.force_to_expire()
+                new_confirmation = ConfirmationModel(user_id)
+                new_confirmation.save_to_db()
+                user.send_email()
             return {"message": RESEND_SUCCESS}, 201
 
     except MailgunException as e:
@@ -195,7 +195,7 @@ def edit_user(id):
             user.password = pbkdf2_sha256.hash(form.password.data)
         if form.image.data and isinstance(form.image.data, werkzeug.datastructures.FileStorage):
             try:
-                image = photos.save(form.image.data, name=secrets.token_hex(10) + ".")
+                image = save_photo(form.image.data)
                 user.image = image
             except Exception as e:
                 flash(f"Error saving image: {str(e)}", category="error")
@@ -242,15 +242,16 @@ def new_user():
             flash(USER_PHONE_EXISTS, category="error")
         if pass1 != pass2:
             flash(PASSWORD_MISMATCH_ERROR, category="error")
-        image = photos.save(image, name=secrets.token_hex(10) + ".")
+        image = save_photo(image)
         user = UserModel(email=email, phone_no=phone_no, user_type=user_type, last_name=last_name,
                          first_name=first_name, password=pbkdf2_sha256.hash(pass1), date_registered=date_registered,
                          image=image)
         try:
-            user.save_to_db()
-            confirmation = ConfirmationModel(user.id)
-            confirmation.save_to_db()
-            user.send_email()
+            with unit_of_work():
+                user.save_to_db()
+                confirmation = ConfirmationModel(user.id)
+                confirmation.save_to_db()
+                user.send_email()
             flash(USER_CREATED_SUCCESS, "success")
         except IntegrityError as e:
             db.session.rollback()
@@ -259,11 +260,9 @@ def new_user():
             else:
                 flash(SERVER_ERROR, category="error")
         except MailgunException as e:
-            user.delete_from_db()
             traceback.print_exc()
             flash(EMAIL_ERROR, category="error")
         except Exception as e:
-            user.delete_from_db()
             traceback.print_exc()
             flash(SERVER_ERROR, category="error")
     return render_template("auth/new_user.html", form=form, user=current_user)
@@ -272,13 +271,12 @@ def new_user():
 @auth_blp.route("/users")
 @login_required
 def all_users():
-    page = request.args.get("page", 1, type=int)
     item_filter = request.args.get("emailFilter")
-    base_query = UserModel.query.order_by(UserModel.first_name, UserModel.last_name, UserModel.creation_date.asc())
+    base_query = UserModel.query
 
     if item_filter:
         base_query = base_query.filter(UserModel.email.icontains(item_filter))
-    users = base_query.paginate(page=page, per_page=10)
+    users = keyset_paginate(base_query, [UserModel.first_name, UserModel.last_name], UserModel.id)
     return render_template("auth/all_users.html", users=users, user=current_user)
 
 
@@ -1,18 +1,25 @@
+import mimetypes
 import os
-import secrets
 import traceback
 from datetime import datetime
+from functools import partial
 
-from flask import Blueprint, request, render_template, flash, url_for, redirect, current_app
+from flask import Blueprint, request, render_template, flash, url_for, redirect, current_app, send_file, abort
 from flask_login import current_user, login_required
 from sqlalchemy import or_
 from werkzeug.utils import secure_filename
 
 from .. import UserModel
-from ..db import db
-from ..forms import CreateCaseForm, AttToCaseForm, CaseDetailForm, CaseNoteForm, AttachmentForm, CourtHearingForm
-from ..models import CaseModel, CaseAttorneyModel, CaseDetailModel, CaseNoteModel, CaseAttachmentModel, ClientModel, \
+from ..db import db, unit_of_work, read_replica
+from ..forms import CreateCaseForm, AttToCaseForm, CaseDetailForm, CaseNoteForm, AttachmentForm, CourtHearingForm, \
+    ReassignCasesForm
+from ..libs.attachment_store import store_blob, blob_relative_path
+from ..libs.conditional import conditional_page
+from ..libs.export import export_download
+from ..libs.pagination import keyset_paginate
+from ..models import CaseModel, CaseDetailModel, CaseNoteModel, CaseAttachmentModel, ClientModel, \
     CaseHearingModel
+from ..search import matching_ids
 
 case_blp = Blueprint("case_blp", __name__, static_folder="static", template_folder="templates")
 ALLOWED_EXTENSIONS = ['pdf', 'doc', 'docx', 'xls', 'xlsx', 'xlsm']
@@ -21,6 +28,11 @@ CASE_CREATED_SUCCESSFULLY = "Case created successfully!"
 CASE_CREATION_FAILED = "Case creation failed!!"
 ASSIGN_SUCCESS = 'Attorneys assigned successfully.'
 ASSIGN_FAILED = 'Failed to assign attorneys.'
+REASSIGN_NOT_ALLOWED = "You are not allowed to reassign cases."
+REASSIGN_SAME_ATTORNEY = "Choose a different attorney to take over the cases."
+REASSIGN_SUCCESS = "{} cases reassigned successfully."
+REASSIGN_FAILED = "Failed to reassign cases."
+USER_NOT_FOUND = "User not found."
 CASE_DETAIL_CREATED = "Case details saved successfully"
 CASE_DETAIL_NOT_FOUND = "Case does not have any details"
 CASE_DETAIL_ERROR = "An error occurred while saving case details"
@@ -32,6 +44,32 @@ ATTACHMENT_SUCCESS = "Attachment uploaded successfully."
 ATTACHMENT_FAIL = "Failed to upload attachment."""
 HEARING_SUCCESS = "Hearing added successfully"
 HEARING_FAIL = "Hearing update failed"
+CASE_EXPORT_HEADERS = ["Case Number", "Title", "Status", "Case Type", "Priority", "Filed Date", "Court Date",
+                       "Resolution Date", "Resolution", "Client First Name", "Client Last Name", "Date Created"]
+EXPORT_NOT_ALLOWED = "You are not allowed to export cases."
+HEARING_EXPORT_HEADERS = ["Hearing Date", "Next Hearing Date", "Description", "Details", "Uploaded By"]
+
+
+def _filter_cases_by_name(query, name_filter):
+    matches = matching_ids("case", name_filter)
+    if matches is not None:
+        return query.filter(CaseModel.id.in_(matches))
+    return query.filter(or_(CaseModel.case_number.ilike(f"%{name_filter}%")))
+
+
+def _filter_hearings_by_date(query):
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    if start_date and end_date:
+        if start_date > end_date:
+            flash("Start date cannot be after end date.", "error")
+        else:
+            query = query.filter(CaseHearingModel.hearing_date.between(start_date, end_date))
+    return query
+
+
+def _assigned_to_current_user(query):
+    return query.join(CaseModel.attorneys).filter(UserModel.id == current_user.id)
 
 
 @case_blp.route("/edit_hearing/<int:hearing_id>", methods=["POST", "GET"])
@@ -46,10 +84,11 @@ def edit_hearing(hearing_id):
         hearing.description = form.description.data
         hearing.details = form.details.data
         try:
-            hearing.update_db()
-            if form.next_hearing_date.data:
-                case.court_date = form.next_hearing_date.data
-                case.update_db()
+            with unit_of_work():
+                hearing.update_db()
+                if form.next_hearing_date.data:
+                    case.court_date = form.next_hearing_date.data
+                    case.update_db()
             flash(HEARING_SUCCESS, "success")
             return redirect(url_for('case_blp.view_hearings', case_id=case.id))
         except Exception as e:
@@ -61,25 +100,29 @@ def edit_hearing(hearing_id):
 
 @case_blp.route("/case/<int:case_id>/hearings", methods=["GET"])
 @login_required
+@read_replica
 def view_hearings(case_id):
     case = CaseModel.find_by_id(case_id)
     if not case:
         flash(CASE_NOT_FOUND, "error")
         return redirect(url_for('case_blp.all_cases'))
-    page = request.args.get("page", 1, type=int)
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    query = _filter_hearings_by_date(CaseHearingModel.query.filter_by(case_id=case_id))
+    hearings = keyset_paginate(query, [CaseHearingModel.hearing_date], CaseHearingModel.id)
+    return render_template("cases/view_hearings.html", case=case, hearings=hearings, user=current_user)
 
-    query = CaseHearingModel.query.filter_by(case_id=case_id).order_by(CaseHearingModel.hearing_date)
 
-    if start_date and end_date:
-        if start_date > end_date:
-            flash("Start date cannot be after end date.", "error")
-        else:
-            query = query.filter(CaseHearingModel.hearing_date.between(start_date, end_date))
-
-    hearings = query.paginate(page=page, per_page=10)
-    return render_template("cases/view_hearings.html", case=case, hearings=hearings, user=current_user)
+@case_blp.route("/case/<int:case_id>/hearings/export", methods=["GET"])
+@login_required
+def export_hearings(case_id):
+    case = CaseModel.find_by_id(case_id)
+    if not case:
+        flash(CASE_NOT_FOUND, "error")
+        return redirect(url_for('case_blp.all_cases'))
+    query = _filter_hearings_by_date(CaseHearingModel.query.filter_by(case_id=case_id)).join(
+        CaseHearingModel.user).order_by(CaseHearingModel.hearing_date, CaseHearingModel.id).with_entities(
+        CaseHearingModel.hearing_date, CaseHearingModel.next_hearing_date, CaseHearingModel.description,
+        CaseHearingModel.details, UserModel.email)
+    return export_download(query, HEARING_EXPORT_HEADERS, f"hearings-{case.case_number}", 'case_blp.all_cases')
 
 
 @case_blp.route("/add_hearing/<int:case_id>", methods=["POST", "GET"])
@@ -99,10 +142,11 @@ def add_hearing(case_id):
             user_id=current_user.id
         )
         try:
-            hearing.save_to_db()
-            if form.next_hearing_date.data:
-                case.court_date = form.next_hearing_date.data
-                case.update_db()
+            with unit_of_work():
+                hearing.save_to_db()
+                if form.next_hearing_date.data:
+                    case.court_date = form.next_hearing_date.data
+                    case.update_db()
             flash(HEARING_SUCCESS, "success")
             return redirect(url_for('case_blp.view_hearings', case_id=case_id))
         except Exception as e:
@@ -115,45 +159,35 @@ def add_hearing(case_id):
 @case_blp.route("/mycase")
 @login_required
 def my_cases():
-    page = request.args.get("page", 1, type=int)
     name_filter = request.args.get("nameFilter")
-    base_query = CaseModel.query.join(CaseModel.attorneys).filter(UserModel.id == current_user.id).order_by(
-        CaseModel.case_number, CaseModel.date_created.desc())
+    base_query = _assigned_to_current_user(CaseModel.query_with_profile("list"))
 
     if name_filter:
-        search_query = f"%{name_filter}%"
-        base_query = base_query.filter(
-            or_(
-                CaseModel.case_number.ilike(search_query),
-            )
-        )
-    cases = base_query.paginate(page=page, per_page=10)
-    return render_template("cases/cases.html", cases=cases, user=current_user)
+        base_query = _filter_cases_by_name(base_query, name_filter)
+    cases = keyset_paginate(base_query, [CaseModel.case_number], CaseModel.id)
+    return render_template("cases/cases.html", cases=cases, user=current_user, export_scope="mine")
 
 
 @case_blp.route("/clientcase")
 @login_required
 def client_cases():
-    page = request.args.get("page", 1, type=int)
     name_filter = request.args.get("nameFilter")
-    user = UserModel.find_by_id(current_user.id)
-    client = ClientModel.find_by_email(user.email)
-    base_query = CaseModel.query.filter_by(client_id=client.id).order_by(CaseModel.case_number,
-                                                                         CaseModel.date_created.desc())
+    client = ClientModel.find_by_email(current_user.email)
+    base_query = CaseModel.query_with_profile("list").filter_by(client_id=client.id)
     if name_filter:
-        search_query = f"%{name_filter}%"
-        base_query = base_query.filter(
-            or_(
-                CaseModel.case_number.ilike(search_query),
-            )
-        )
-    cases = base_query.paginate(page=page, per_page=10)
+        base_query = _filter_cases_by_name(base_query, name_filter)
+    cases = keyset_paginate(base_query, [CaseModel.case_number], CaseModel.id)
     return render_template("cases/cases.html", cases=cases, user=current_user)
 
 
 @case_blp.route("/view/detail/<int:id>", methods=["POST", "GET"])
 @login_required
 def view_case_detail(id):
+    watermark = CaseDetailModel.watermark(id)
+    return conditional_page(watermark if watermark[0] else None, partial(_render_case_detail, id))
+
+
+def _render_case_detail(id):
     case_detail = CaseDetailModel.find_by_case_id(id)
     if not case_detail:
         flash(CASE_DETAIL_NOT_FOUND, category="error")
@@ -178,8 +212,9 @@ def edit_case_detail(id):
         case_detail.evidence_details = form.evidence_details.data
 
         try:
-            case_detail.update_db()
-            case_detail.case.update_db()
+            with unit_of_work():
+                case_detail.update_db()
+                case_detail.case.update_db()
             flash(CASE_DETAIL_UPDATED_SUCCESS, category="success")
             return redirect(url_for('case_blp.view_case_detail', id=id))
         except Exception as e:
@@ -213,8 +248,9 @@ def case_detail(id):
             user_id=current_user.id
         )
         try:
-            case_detail.save_to_db()
-            case.update_db()
+            with unit_of_work():
+                case_detail.save_to_db()
+                case.update_db()
             flash(CASE_DETAIL_CREATED, category="success")
             return redirect(url_for('case_blp.get_case', id=case.id))
         except Exception as e:
@@ -358,50 +394,95 @@ def assign_cases(id):
         flash(CASE_NOT_FOUND, "error")
     form = AttToCaseForm(data={"attorneys": case.attorneys})
     if request.method == "POST":
-        case.attorneys.clear()
         try:
-            for att in form.attorneys.data:
-                existing_attorney = CaseAttorneyModel.find_by_ids(user_id=att.id, case_id=case.id)
-                if existing_attorney:
-                    existing_attorney.delete_from_db()
-                attorney = CaseAttorneyModel(case_id=case.id, user_id=att.id)
-                case.update_db()
-                attorney.save_to_db()
+            case.assign_attorneys([att.id for att in form.attorneys.data])
             flash(ASSIGN_SUCCESS, 'success')
             return redirect(url_for('case_blp.get_case', id=case.id))
         except Exception as e:
             traceback.print_exc()
+            db.session.rollback()
             flash(ASSIGN_FAILED, 'error')
 
     return render_template("cases/assign_cases.html", form=form, user=current_user, next=request.referrer)
 
 
+@case_blp.route("/reassign/<int:user_id>", methods=["POST", "GET"])
+@login_required
+def reassign_cases(user_id):
+    """Hand every case of one attorney over to another, e.g. when a lawyer leaves the firm."""
+    if current_user.user_type != "super_admin":
+        flash(REASSIGN_NOT_ALLOWED, "error")
+        return redirect(url_for('home_blp.home_page'))
+    attorney = UserModel.find_by_id(user_id)
+    if not attorney:
+        flash(USER_NOT_FOUND, "error")
+        return redirect(url_for('auth_blp.all_users'))
+    form = ReassignCasesForm()
+    if form.validate_on_submit():
+        if form.attorney.data.id == attorney.id:
+            flash(REASSIGN_SAME_ATTORNEY, "error")
+        else:
+            try:
+                moved = CaseModel.reassign_attorney(attorney.id, form.attorney.data.id)
+                flash(REASSIGN_SUCCESS.format(moved), "success")
+                return redirect(url_for('auth_blp.user_info', id=form.attorney.data.id))
+            except Exception as e:
+                traceback.print_exc()
+                db.session.rollback()
+                flash(REASSIGN_FAILED, "error")
+
+    return render_template("cases/reassign_cases.html", form=form, attorney=attorney, user=current_user)
+
+
 @case_blp.route("/")
 @login_required
+@read_replica
 def all_cases():
-    page = request.args.get("page", 1, type=int)
     name_filter = request.args.get("nameFilter")
-    base_query = CaseModel.query.order_by(CaseModel.case_number, CaseModel.date_created.desc())
+    base_query = CaseModel.query_with_profile("list")
 
     if name_filter:
-        search_query = f"%{name_filter}%"
-        base_query = base_query.filter(
-            or_(
-                CaseModel.case_number.ilike(search_query),
-            )
-        )
-    cases = base_query.paginate(page=page, per_page=10)
-    return render_template("cases/cases.html", cases=cases, user=current_user)
+        base_query = _filter_cases_by_name(base_query, name_filter)
+    cases = keyset_paginate(base_query, [CaseModel.case_number], CaseModel.id)
+    return render_template("cases/cases.html", cases=cases, user=current_user, export_scope="all")
+
+
+@case_blp.route("/export")
+@login_required
+def export_cases():
+    """Every case matching the listing's ``nameFilter``, streamed as CSV or XLSX.
+
+    ``scope=mine`` exports the "My Cases" listing. Only administrators may export all cases; other staff always
+    get the cases assigned to them, and clients none.
+    """
+    if current_user.user_type == "client":
+        return {"message": EXPORT_NOT_ALLOWED}, 403
+    name_filter = request.args.get("nameFilter")
+    query = CaseModel.query
+    if request.args.get("scope") == "mine" or current_user.user_type not in ("admin", "super_admin"):
+        query = _assigned_to_current_user(query)
+    if name_filter:
+        query = _filter_cases_by_name(query, name_filter)
+    query = query.join(CaseModel.client).order_by(CaseModel.case_number, CaseModel.id).with_entities(
+        CaseModel.case_number, CaseModel.title, CaseModel.status, CaseModel.case_type, CaseModel.priority,
+        CaseModel.filed_date, CaseModel.court_date, CaseModel.resolution_date, CaseModel.resolution,
+        ClientModel.first_name, ClientModel.last_name, CaseModel.date_created)
+    return export_download(query, CASE_EXPORT_HEADERS, "cases", 'case_blp.all_cases')
 
 
 @case_blp.route("/<int:id>")
 @login_required
 def get_case(id):
-    case = CaseModel.find_by_id(id)
+    return conditional_page(CaseModel.watermark(id), partial(_render_case, id))
+
+
+def _render_case(id):
+    case = CaseModel.find_by_id_with_profile(id, "detail")
     if not case:
         flash(CASE_NOT_FOUND, category="error")
-    count = CaseNoteModel.find_by_case_id(case.id).count()
-    return render_template("cases/case_info.html", case=case, user=current_user, next=request.referrer, count=count)
+        return redirect(url_for('case_blp.all_cases'))
+    return render_template("cases/case_info.html", case=case, user=current_user, next=request.referrer,
+                           count=case.note_count)
 
 
 @case_blp.route("/<int:id>/note", methods=["POST", "GET"])
@@ -417,8 +498,9 @@ def add_note(id):
     if request.method == "POST":
         new_note = CaseNoteModel(note=note, reference_date=date, user_id=current_user.id, case_id=case.id)
         try:
-            new_note.save_to_db()
-            case.update_db()
+            with unit_of_work():
+                new_note.save_to_db()
+                case.update_db()
             flash(CASE_CREATED_SUCCESSFULLY, "success")
             return redirect(url_for('case_blp.view_notes', id=case.id))
         except Exception as e:
@@ -429,18 +511,22 @@ def add_note(id):
 
 @case_blp.route("/<int:id>/notes")
 @login_required
+@read_replica
 def view_notes(id):
+    return conditional_page(CaseNoteModel.watermark(id), partial(_render_notes, id))
+
+
+def _render_notes(id):
     case = CaseModel.find_by_id(id)
     if not case:
         flash(CASE_NOT_FOUND, "error")
-    page = request.args.get("page", 1, type=int)
     email_filter = request.args.get("emailFilter")
     base_query = CaseNoteModel.query.join(UserModel).filter(CaseNoteModel.case_id == id)
 
     if email_filter:
         base_query = base_query.filter(UserModel.email.ilike(f"%{email_filter}%"))
 
-    notes = base_query.paginate(page=page, per_page=10)
+    notes = keyset_paginate(base_query, [CaseNoteModel.reference_date.desc()], CaseNoteModel.id)
     return render_template("cases/view_case_notes.html", notes=notes, case=case, user=current_user,
                            next=request.referrer)
 
@@ -456,8 +542,9 @@ def edit_note(id):
         case.note = form.note.data
         case.reference_date = form.reference_date.data
         try:
-            case.update_db()
-            case.case.update_db()
+            with unit_of_work():
+                case.update_db()
+                case.case.update_db()
             flash(CASE_DETAIL_UPDATED_SUCCESS, "success")
             return redirect(url_for('case_blp.view_notes', id=case.case.id))
         except Exception as e:
@@ -467,6 +554,26 @@ def edit_note(id):
     return render_template("cases/case_notes.html", form=form, user=current_user, next=request.referrer)
 
 
+def _attachment_relative_path(attachment):
+    """Stored location below the attachments root: the shared blob, or the per-case file for older uploads."""
+    if attachment.sha256:
+        return blob_relative_path(attachment.sha256)
+    return os.path.join(str(attachment.case.case_number), attachment.attachment_filename)
+
+
+def _store_attachment(file):
+    """Stream an uploaded file into the content-addressed store; returns its stored name, SHA-256 and size."""
+    sha256, size, _ = store_blob(file.stream, current_app.config['UPLOADED_ATTACHMENTS_DEST'])
+    return sha256 + os.path.splitext(file.filename)[1], sha256, size
+
+
+def _release_attachment_file(relative_path, sha256):
+    """Remove a replaced per-case file; shared blobs are left to ``flask attachments gc``."""
+    path = os.path.join(current_app.config['UPLOADED_ATTACHMENTS_DEST'], relative_path)
+    if not sha256 and os.path.exists(path):
+        os.remove(path)
+
+
 @case_blp.route("/attachment/<int:id>", methods=["POST", "GET"])
 @login_required
 def case_attachment(id):
@@ -484,16 +591,8 @@ def case_attachment(id):
             flash('Invalid file type. Only PDF, Word, and Excel files are allowed.', 'error')
             return redirect(request.url)
 
-        attachment_filename = secrets.token_hex(10) + os.path.splitext(filename)[1]
-
-        case_dir = os.path.join(current_app.config['UPLOADED_ATTACHMENTS_DEST'], str(case.case_number))
-        if not os.path.exists(case_dir):
-            os.makedirs(case_dir)
-
-        file_path = os.path.join(case_dir, attachment_filename)
-        file.save(file_path)
-
-        file_url = os.path.join('static', 'attachments', case.case_number, attachment_filename)
+        attachment_filename, sha256, size = _store_attachment(file)
+        file_url = os.path.join('static', 'attachments', blob_relative_path(sha256))
 
         new_attachment = CaseAttachmentModel(
             case_id=case.id,
@@ -501,7 +600,9 @@ def case_attachment(id):
             file_url=file_url,
             description=description,
             user_id=current_user.id,
-            attachment_filename=attachment_filename
+            attachment_filename=attachment_filename,
+            sha256=sha256,
+            size=size
         )
 
         try:
@@ -515,6 +616,40 @@ def case_attachment(id):
                            next=request.referrer)
 
 
+@case_blp.route("/attachment/<int:id>/download", methods=["GET"])
+@login_required
+def download_attachment(id):
+    attachment = CaseAttachmentModel.find_by_id(id)
+    if not attachment:
+        abort(404)
+    relative_path = _attachment_relative_path(attachment)
+    file_path = os.path.join(current_app.config['UPLOADED_ATTACHMENTS_DEST'], relative_path)
+    if not os.path.exists(file_path):
+        abort(404)
+    as_attachment = not request.args.get("inline", type=int)
+
+    accel_prefix = current_app.config.get("ATTACHMENT_ACCEL_REDIRECT_PREFIX")
+    if accel_prefix:
+        # nginx serves the bytes (including ranges) from an internal location; we only check access and validators.
+        mimetype = mimetypes.guess_type(attachment.filename)[0] or "application/octet-stream"
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers.set("Content-Disposition", "attachment" if as_attachment else "inline",
+                             filename=attachment.filename)
+        internal_path = relative_path.replace(os.sep, "/")
+        response.headers["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{internal_path}"
+        response.last_modified = os.path.getmtime(file_path)
+        if attachment.sha256:
+            response.set_etag(attachment.sha256)
+        response = response.make_conditional(request)
+    else:
+        # send_file answers Range and If-None-Match/If-Modified-Since itself, and hands the file to the front
+        # server instead of streaming it when USE_X_SENDFILE is enabled.
+        response = send_file(file_path, download_name=attachment.filename, as_attachment=as_attachment,
+                             etag=attachment.sha256 or True, conditional=True, max_age=0)
+    response.cache_control.private = True
+    return response
+
+
 @case_blp.route("/attachments/<int:id>", methods=["GET"])
 @login_required
 def view_attachments(id):
@@ -522,14 +657,13 @@ def view_attachments(id):
     if not case:
         flash(CASE_NOT_FOUND, "error")
         return redirect(url_for('case_blp.all_cases'))
-    page = request.args.get("page", 1, type=int)
     desc_filter = request.args.get("description")
     base_query = CaseAttachmentModel.find_by_case_id(case.id)
 
     if desc_filter:
         base_query = base_query.filter(CaseAttachmentModel.description.ilike(f"%{desc_filter}%"))
 
-    attachments = base_query.paginate(page=page, per_page=10)
+    attachments = keyset_paginate(base_query, [CaseAttachmentModel.uploaded_at.desc()], CaseAttachmentModel.id)
     return render_template("cases/view_attachments.html", case=case, attachments=attachments, user=current_user)
 
 
@@ -539,39 +673,33 @@ def edit_attachment(id):
     attachment = CaseAttachmentModel.find_by_id(id)
     if not attachment:
         flash("Attachment not found", "error")
-        return redirect(url_for('case_blp.view_attachments', id=attachment.case_id))
+        return redirect(url_for('case_blp.all_cases'))
 
     form = AttachmentForm(obj=attachment)
     if request.method == "POST":
-        old_file_path = os.path.join(current_app.config['UPLOADED_ATTACHMENTS_DEST'], str(attachment.case.case_number),
-                                     attachment.attachment_filename)
-        if os.path.exists(old_file_path):
-            os.remove(old_file_path)
-
         file = form.file.data
         description = form.description.data
         filename = secure_filename(file.filename)
-        attachment_filename = secrets.token_hex(10) + os.path.splitext(file.filename)[1]
         if filename.rsplit('.', 1)[1].lower() not in ALLOWED_EXTENSIONS:
             flash('Invalid file type. Only PDF, Word, and Excel files are allowed.', 'error')
             return redirect(request.url)
 
-        case_dir = os.path.join(current_app.config['UPLOADED_ATTACHMENTS_DEST'], str(attachment.case.case_number))
-        if not os.path.exists(case_dir):
-            os.makedirs(case_dir)
-
-        file_path = os.path.join(case_dir, attachment_filename)
-        file.save(file_path)
+        old_relative_path, old_sha256 = _attachment_relative_path(attachment), attachment.sha256
+        attachment_filename, sha256, size = _store_attachment(file)
 
         attachment.filename = filename
-        attachment.file_url = os.path.join('static', 'attachments', str(attachment.case.case_number),
-                                           attachment_filename)
+        attachment.file_url = os.path.join('static', 'attachments', blob_relative_path(sha256))
         attachment.description = description
         attachment.attachment_filename = attachment_filename
+        attachment.sha256 = sha256
+        attachment.size = size
         attachment.uploaded_at = datetime.utcnow()
         try:
-            attachment.update_db()
-            attachment.case.update_db()
+            with unit_of_work():
+                attachment.update_db()
+                attachment.case.update_db()
+            if old_relative_path != blob_relative_path(sha256):
+                _release_attachment_file(old_relative_path, old_sha256)
             flash(ATTACHMENT_SUCCESS, "success")
             return redirect(url_for('case_blp.view_attachments', id=attachment.case_id))
         except Exception as e:
@@ -1,5 +1,6 @@
 import traceback
 from datetime import datetime
+from functools import partial
 
 from flask import Blueprint, request, render_template, flash, redirect, url_for
 from flask_login import current_user, login_required
@@ -8,10 +9,15 @@ from sqlalchemy import or_
 from sqlalchemy.exc import IntegrityError
 
 from .. import UserModel
-from ..db import db
+from ..bulk_import import import_file, BulkImportException, IMPORT_KINDS
+from ..db import db, unit_of_work, read_replica
 from ..forms import CreateClientForm, RegistrationForm
+from ..libs.conditional import conditional_page
+from ..libs.export import export_download
+from ..libs.pagination import keyset_paginate
 from ..libs.send_email import MailgunException
 from ..models import ClientModel, ConfirmationModel
+from ..search import matching_ids
 
 client_blp = Blueprint("client_blp", __name__, static_folder="static", template_folder="templates")
 
@@ -27,33 +33,84 @@ PASSWORD_MISMATCH_ERROR = "Passwords do not match."
 CLIENT_CREATED_SUCCESS = "Client account created successfully and confirmation email sent."
 CLIENT_NAME_EXISTS = "A client with this name already exists."
 EMAIL_ERROR = "There was an error sending the confirmation email."
+IMPORT_NOT_ALLOWED = "Only administrators can import records."
+EXPORT_NOT_ALLOWED = "You are not allowed to export clients."
+IMPORT_FILE_REQUIRED = "A CSV or XLSX file is required."
+IMPORT_KIND_INVALID = "Import kind must be one of: clients, cases."
+CLIENT_EXPORT_HEADERS = ["First Name", "Middle Name", "Last Name", "Email", "Phone Number", "Address",
+                         "Identification Number", "Active", "Client Date", "Date Created"]
+
+
+def _filter_clients_by_name(query, name_filter):
+    matches = matching_ids("client", name_filter)
+    if matches is not None:
+        return query.filter(ClientModel.id.in_(matches))
+    search_query = f"%{name_filter}%"
+    return query.filter(
+        or_(
+            ClientModel.first_name.ilike(search_query),
+            ClientModel.middle_name.ilike(search_query),
+            ClientModel.last_name.ilike(search_query),
+            ClientModel.email.ilike(search_query)
+        )
+    )
 
 
 @client_blp.route("/")
 @login_required
+@read_replica
 def get_clients():
-    page = request.args.get("page", 1, type=int)
     name_filter = request.args.get("nameFilter")
-    base_query = ClientModel.query.order_by(ClientModel.first_name, ClientModel.last_name,
-                                            ClientModel.date_created.asc())
-
+    base_query = ClientModel.query
     if name_filter:
-        search_query = f"%{name_filter}%"
-        base_query = base_query.filter(
-            or_(
-                ClientModel.first_name.ilike(search_query),
-                ClientModel.middle_name.ilike(search_query),
-                ClientModel.last_name.ilike(search_query),
-                ClientModel.email.ilike(search_query)
-            )
-        )
-    clients = base_query.paginate(page=page, per_page=10)
+        base_query = _filter_clients_by_name(base_query, name_filter)
+    clients = keyset_paginate(base_query, [ClientModel.first_name, ClientModel.last_name], ClientModel.id)
     return render_template("clients/clients.html", clients=clients, user=current_user)
 
 
+@client_blp.route("/export")
+@login_required
+def export_clients():
+    """Every client matching the listing's ``nameFilter``, streamed as CSV or XLSX."""
+    if current_user.user_type == "client":
+        return {"message": EXPORT_NOT_ALLOWED}, 403
+    name_filter = request.args.get("nameFilter")
+    query = ClientModel.query
+    if name_filter:
+        query = _filter_clients_by_name(query, name_filter)
+    query = query.order_by(ClientModel.first_name, ClientModel.last_name, ClientModel.id).with_entities(
+        ClientModel.first_name, ClientModel.middle_name, ClientModel.last_name, ClientModel.email,
+        ClientModel.phone_no, ClientModel.address, ClientModel.identification_no, ClientModel.is_active,
+        ClientModel.client_date, ClientModel.date_created)
+    return export_download(query, CLIENT_EXPORT_HEADERS, "clients", "client_blp.get_clients")
+
+
+@client_blp.route("/import", methods=["POST"])
+@login_required
+def bulk_import():
+    """Import clients or cases from an uploaded CSV/XLSX file and return the row counts and per-row errors."""
+    if current_user.user_type not in ("admin", "super_admin"):
+        return {"message": IMPORT_NOT_ALLOWED}, 403
+    kind = request.form.get("kind", "clients")
+    if kind not in IMPORT_KINDS:
+        return {"message": IMPORT_KIND_INVALID}, 400
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        return {"message": IMPORT_FILE_REQUIRED}, 400
+    try:
+        report = import_file(kind, upload.stream, upload.filename, current_user.id)
+    except BulkImportException as e:
+        return {"message": str(e)}, 400
+    return report.as_dict()
+
+
 @client_blp.route("/<int:id>")
 @login_required
 def get_client(id):
+    return conditional_page(ClientModel.watermark(id), partial(_render_client, id))
+
+
+def _render_client(id):
     client = ClientModel.find_by_id(id)
     if not client:
         flash(CLIENT_NOT_FOUND, category="error")
@@ -150,10 +207,11 @@ def new_client_account(id):
                          first_name=form.first_name.data, password=pbkdf2_sha256.hash(pass1),
                          date_registered=datetime.utcnow())
         try:
-            user.save_to_db()
-            confirmation = ConfirmationModel(user.id)
-            confirmation.save_to_db()
-            user.send_email()
+            with unit_of_work():
+                user.save_to_db()
+                confirmation = ConfirmationModel(user.id)
+                confirmation.save_to_db()
+                user.send_email()
             flash(CLIENT_CREATED_SUCCESS, "success")
             return redirect(url_for("client_blp.get_client", id=id))
         except IntegrityError as e:
@@ -163,11 +221,9 @@ def new_client_account(id):
             else:
                 flash(SERVER_ERROR, category="error")
         except MailgunException as e:
-            user.delete_from_db()
             traceback.print_exc()
             flash(EMAIL_ERROR, category="error")
         except Exception as e:
-            user.delete_from_db()
             traceback.print_exc()
             flash(SERVER_ERROR, category="error")
     return render_template("clients/new_client_account.html", user=current_user, form=form, next=request.referrer,
@@ -1,71 +1,108 @@
-from flask import Blueprint, render_template, redirect, url_for
+from datetime import datetime, time
+
+from flask import Blueprint, render_template, redirect, url_for, request, jsonify
 from flask_login import current_user, login_required
+from sqlalchemy import or_, and_
 
-from website import UserModel
-from website.models import CaseModel, CaseAttorneyModel, ClientModel
+from website.dashboard import dashboard_stats
+from website.db import db, read_replica
+from website.models import CaseModel, CaseAttorneyModel, ClientModel, CaseHearingModel
 
 home_blp = Blueprint("home_blp", __name__, )
 
+INVALID_WINDOW = "Both start and end must be valid ISO dates, with start before end."
+DASHBOARD_NOT_ALLOWED = "Clients cannot view firm statistics."
+
+
+def _parse_window_bound(value):
+    """Parse a FullCalendar window bound (an ISO date or datetime, possibly with an offset) into a date."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).date()
+    except ValueError:
+        return None
+
+
+def _case_scope(user):
+    """Filter criteria restricting a case query to the cases the given user is allowed to see."""
+    if user.user_type == 'super_admin':
+        return []
+    if user.user_type != "client":
+        attorney_cases = db.session.query(CaseAttorneyModel.case_id).filter(CaseAttorneyModel.user_id == user.id)
+        return [CaseModel.id.in_(attorney_cases)]
+    client_ids = db.session.query(ClientModel.id).filter(ClientModel.email == user.email)
+    return [CaseModel.client_id.in_(client_ids)]
+
+
+def _event(title, day, color, case_url):
+    day = day.strftime("%Y-%m-%d")
+    return {"title": title, "start": day, "end": day, "color": color, "url": case_url}
+
 
 @home_blp.route("/")
 @login_required
+@read_replica
 def home_page():
-    user = UserModel.find_by_id(current_user.id)
     if not current_user.is_authenticated:
         return redirect(url_for('auth_blp.login'))
-    if user.user_type == 'super_admin':
-        cases = CaseModel.query.all()
-    elif user.user_type != 'super_admin' and user.user_type != "client":
-        cases = CaseModel.query.join(CaseAttorneyModel).filter(CaseAttorneyModel.user_id == user.id).all()
-    elif user.user_type == 'client':
-        client = ClientModel.find_by_email(user.email)
-        print(client.id)
-        cases = CaseModel.query.filter_by(client_id=client.id).all()
-    else:
-        return render_template("403.html", user=current_user)
+    stats = dashboard_stats(current_user) if current_user.user_type != "client" else None
+    return render_template("utils/home.html", user=current_user, stats=stats)
+
+
+@home_blp.route("/dashboard/stats")
+@login_required
+def dashboard():
+    if current_user.user_type == "client":
+        return {"message": DASHBOARD_NOT_ALLOWED}, 403
+    return jsonify(dashboard_stats(current_user))
+
+
+@home_blp.route("/calendar/events")
+@login_required
+def calendar_events():
+    start = _parse_window_bound(request.args.get("start"))
+    end = _parse_window_bound(request.args.get("end"))
+    if not start or not end or start >= end:
+        return {"message": INVALID_WINDOW}, 400
+    start_at, end_at = datetime.combine(start, time.min), datetime.combine(end, time.min)
+
+    def in_days(column):
+        return and_(column >= start, column < end)
+
+    def in_range(column):
+        return and_(column >= start_at, column < end_at)
+
+    # A single statement: every visible case with either a case date or a hearing inside the window, one row per
+    # matching hearing (or one row with NULL hearing columns when only the case dates match).
+    rows = db.session.query(
+        CaseModel.id, CaseModel.case_number, CaseModel.filed_date, CaseModel.court_date, CaseModel.resolution_date,
+        CaseHearingModel.hearing_date, CaseHearingModel.next_hearing_date
+    ).outerjoin(
+        CaseHearingModel,
+        and_(CaseHearingModel.case_id == CaseModel.id,
+             or_(in_range(CaseHearingModel.hearing_date), in_range(CaseHearingModel.next_hearing_date)))
+    ).filter(
+        *_case_scope(current_user),
+        or_(in_days(CaseModel.filed_date), in_days(CaseModel.court_date), in_days(CaseModel.resolution_date),
+            CaseHearingModel.id.isnot(None))
+    ).order_by(CaseModel.id)
+
     events = []
-    print(len(cases))
-    for case in cases:
-        case_url = url_for('case_blp.get_case', id=case.id)
-        if case.filed_date:
-            events.append({
-                "title": f"Filed: {case.case_number}",
-                "start": case.filed_date.strftime("%Y-%m-%d"),
-                "end": case.filed_date.strftime("%Y-%m-%d"),
-                "color": "blue",
-                "url": case_url
-            })
-        if case.court_date:
-            events.append({
-                "title": f"Court Date:  {case.case_number}",
-                "start": case.court_date.strftime("%Y-%m-%d"),
-                "end": case.court_date.strftime("%Y-%m-%d"),
-                "color": "red",
-                "url": case_url
-            })
-        if case.resolution_date:
-            events.append({
-                "title": f"Resolution:  {case.case_number}",
-                "start": case.resolution_date.strftime("%Y-%m-%d"),
-                "end": case.resolution_date.strftime("%Y-%m-%d"),
-                "color": "green",
-                "url": case_url
-            })
-        for hearing in case.court_hearings:
-            events.append({
-                "title": f"Hearing:  {case.case_number}",
-                "start": hearing.hearing_date.strftime("%Y-%m-%d"),
-                "end": hearing.hearing_date.strftime("%Y-%m-%d"),
-                "color": "purple",
-                "url": case_url
-            })
-            if hearing.next_hearing_date:
-                events.append({
-                    "title": f"Next Hearing:  {case.case_number}",
-                    "start": hearing.next_hearing_date.strftime("%Y-%m-%d"),
-                    "end": hearing.next_hearing_date.strftime("%Y-%m-%d"),
-                    "color": "orange",
-                    "url": case_url
-                })
-
-    return render_template("utils/home.html", user=current_user, events=events)
+    seen_cases = set()
+    for case_id, case_number, filed_date, court_date, resolution_date, hearing_date, next_hearing_date in rows:
+        case_url = url_for('case_blp.get_case', id=case_id)
+        if case_id not in seen_cases:
+            seen_cases.add(case_id)
+            if filed_date and start <= filed_date < end:
+                events.append(_event(f"Filed: {case_number}", filed_date, "blue", case_url))
+            if court_date and start <= court_date < end:
+                events.append(_event(f"Court Date:  {case_number}", court_date, "red", case_url))
+            if resolution_date and start <= resolution_date < end:
+                events.append(_event(f"Resolution:  {case_number}", resolution_date, "green", case_url))
+        if hearing_date and start_at <= hearing_date < end_at:
+            events.append(_event(f"Hearing:  {case_number}", hearing_date, "purple", case_url))
+        if next_hearing_date and start_at <= next_hearing_date < end_at:
+            events.append(_event(f"Next Hearing:  {case_number}", next_hearing_date, "orange", case_url))
+
+    return jsonify(events)
@@ -0,0 +1,85 @@
+from flask import Blueprint, request, url_for, jsonify
+from flask_login import login_required, current_user
+
+from ..forms.case_forms import active_clients, non_client_users, typeahead_label
+from ..libs.pagination import keyset_paginate
+from ..models import CaseModel, ClientModel, CaseNoteModel, UserModel
+from ..search import search, prefix_condition, SEARCHABLE, MAX_RESULTS
+
+search_blp = Blueprint("search_blp", __name__)
+
+QUERY_REQUIRED = "A search query is required."
+LOOKUP_NOT_ALLOWED = "You are not allowed to look up clients or attorneys."
+SEARCH_NOT_ALLOWED = "You are not allowed to search cases, clients and notes."
+LOOKUP_PAGE_SIZE = 20
+
+
+def _case_result(case):
+    return {"label": f"{case.case_number} - {case.title}", "url": url_for('case_blp.get_case', id=case.id)}
+
+
+def _client_result(client):
+    return {"label": f"{client} ({client.email})", "url": url_for('client_blp.get_client', id=client.id)}
+
+
+def _note_result(note):
+    return {"label": note.note[:120], "url": url_for('case_blp.view_notes', id=note.case_id)}
+
+
+RESULT_BUILDERS = {
+    "case": (CaseModel, _case_result),
+    "client": (ClientModel, _client_result),
+    "note": (CaseNoteModel, _note_result),
+}
+
+
+@search_blp.route("/")
+@login_required
+def search_all():
+    if current_user.user_type == "client":
+        return {"message": SEARCH_NOT_ALLOWED}, 403
+    query_text = request.args.get("q", "").strip()
+    if not query_text:
+        return {"message": QUERY_REQUIRED}, 400
+    entities = request.args.getlist("entity") or list(SEARCHABLE)
+    limit = max(1, min(request.args.get("limit", 20, type=int), MAX_RESULTS))
+    hits = search(query_text, entities=entities, limit=limit)
+
+    # One primary key lookup per entity type for the labels, whatever the number of hits.
+    found = {}
+    for entity, (model, _) in RESULT_BUILDERS.items():
+        ids = [entity_id for hit_entity, entity_id, _ in hits if hit_entity == entity]
+        if ids:
+            found[entity] = {row.id: row for row in model.query.filter(model.id.in_(ids))}
+
+    results = []
+    for entity, entity_id, rank in hits:
+        row = found.get(entity, {}).get(entity_id)
+        if row is not None:
+            results.append({"entity": entity, "id": entity_id, "rank": rank, **RESULT_BUILDERS[entity][1](row)})
+    return jsonify(results)
+
+
+def _lookup(query, columns, order_by, primary_key):
+    """One keyset page of rows whose names or email start with the ``q`` terms, as typeahead JSON."""
+    if current_user.user_type == "client":
+        return {"message": LOOKUP_NOT_ALLOWED}, 403
+    query = query.filter(prefix_condition(columns, request.args.get("q", "")))
+    page = keyset_paginate(query, order_by, primary_key,
+                           per_page=request.args.get("per_page", LOOKUP_PAGE_SIZE, type=int))
+    return jsonify({"results": [{"id": row.id, "text": typeahead_label(row)} for row in page],
+                    "next_cursor": page.next_cursor})
+
+
+@search_blp.route("/clients")
+@login_required
+def lookup_clients():
+    return _lookup(active_clients(), [ClientModel.first_name, ClientModel.last_name, ClientModel.email],
+                   [ClientModel.first_name], ClientModel.id)
+
+
+@search_blp.route("/attorneys")
+@login_required
+def lookup_attorneys():
+    return _lookup(non_client_users(), [UserModel.first_name, UserModel.last_name, UserModel.email],
+                   [UserModel.first_name], UserModel.id)
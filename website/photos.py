@@ -1,4 +1,15 @@
+import secrets
+
 from flask_uploads import UploadSet, IMAGES
 
+from .thumbnails import thumbnails
+
 photos = UploadSet('photos', IMAGES)
 attachments = UploadSet('attachments', extensions=('pdf', 'doc', 'docx', 'xls', 'xlsx'))
+
+
+def save_photo(storage):
+    """Store an uploaded user photo under a random name and queue its thumbnails; returns the stored name."""
+    image = photos.save(storage, name=secrets.token_hex(10) + ".")
+    thumbnails.schedule(image)
+    return image
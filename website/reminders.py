@@ -0,0 +1,115 @@
+from datetime import date, datetime, timedelta
+from itertools import groupby
+
+import click
+from flask import current_app, render_template
+from sqlalchemy import or_, and_
+from sqlalchemy.exc import IntegrityError
+
+from .db import db, unit_of_work
+from .email_queue import email_queue
+from .libs.send_email import MailgunException
+from .models import CaseModel, CaseAttorneyModel, CaseHearingModel, UserModel, OutboxEmailModel, \
+    HearingReminderModel
+
+DIGEST_SUBJECT = "Your hearings from {start:%d %b} to {end:%d %b %Y}"
+ALREADY_SENT = "Another run queued digests for this window at the same time; nothing was sent."
+
+
+def _in_window(column, start, end):
+    return and_(column >= start, column < end)
+
+
+def upcoming_hearings(start, end):
+    """``(attorney, [hearings])`` for every active attorney with a hearing or adjourned date in ``[start, end)``.
+
+    One query for all attorneys: both date columns are range-scanned on their own indexes and joined through
+    ``case_attorneys``, ordered so the rows group per recipient.
+    """
+    query = db.session.query(
+        UserModel.id.label("user_id"), UserModel.email, UserModel.first_name, CaseModel.id.label("case_id"),
+        CaseModel.case_number, CaseModel.title, CaseHearingModel.hearing_date, CaseHearingModel.next_hearing_date,
+        CaseHearingModel.description,
+    ).select_from(CaseHearingModel).join(
+        CaseModel, CaseModel.id == CaseHearingModel.case_id
+    ).join(
+        CaseAttorneyModel, CaseAttorneyModel.case_id == CaseHearingModel.case_id
+    ).join(
+        UserModel, UserModel.id == CaseAttorneyModel.user_id
+    ).filter(
+        or_(_in_window(CaseHearingModel.hearing_date, start, end),
+            _in_window(CaseHearingModel.next_hearing_date, start, end)),
+        UserModel.is_active.is_(True),
+    ).order_by(UserModel.id, CaseHearingModel.hearing_date, CaseHearingModel.id)
+    for _, hearings in groupby(query.all(), key=lambda row: row.user_id):
+        hearings = list(hearings)
+        yield hearings[0], hearings
+
+
+def _hearing_day(hearing, start, end):
+    """The date that brings ``hearing`` into the window: the hearing itself, or the date it was adjourned to."""
+    if start <= hearing.hearing_date < end:
+        return hearing.hearing_date
+    return hearing.next_hearing_date
+
+
+def _digest(attorney, hearings, start, end):
+    days = [(_hearing_day(hearing, start, end), hearing) for hearing in hearings]
+    last_day = end - timedelta(days=1)
+    subject = DIGEST_SUBJECT.format(start=start, end=last_day)
+    text = "\n".join([f"Hello {attorney.first_name}, these hearings are coming up:"] + [
+        f"{day:%a %d %b %H:%M}  {hearing.case_number} {hearing.title}" for day, hearing in days])
+    html = render_template("cases/hearing_digest_email.html", attorney=attorney, days=days, start=start,
+                           last_day=last_day)
+    return subject, text, html
+
+
+def queue_hearing_digests(window_start=None, days=None):
+    """Queue one digest email per attorney with hearings in the ``days`` long window starting at ``window_start``.
+
+    Attorneys who already got the digest for this window are skipped, so the command can be re-run (or run by
+    several schedulers) safely. Each reminder row is committed together with its outbox message; delivery is left
+    to the email queue, whose workers send over one kept-alive SMTP session. Returns ``(queued, skipped)``.
+    """
+    window_start = window_start or date.today()
+    days = days or current_app.config.get("HEARING_REMINDER_DAYS", 7)
+    start = datetime.combine(window_start, datetime.min.time())
+    end = start + timedelta(days=days)
+    reminded = HearingReminderModel.reminded_user_ids(window_start, days)
+    queued = skipped = 0
+    with unit_of_work():
+        for attorney, hearings in upcoming_hearings(start, end):
+            if attorney.user_id in reminded:
+                skipped += 1
+                continue
+            message = OutboxEmailModel.enqueue(attorney.email, *_digest(attorney, hearings, start, end))
+            HearingReminderModel(user_id=attorney.user_id, window_start=window_start, window_days=days,
+                                 hearings=len(hearings), outbox_id=message.id).save_to_db()
+            queued += 1
+    return queued, skipped
+
+
+@click.group("reminders")
+def reminders_cli():
+    """Hearing reminder commands."""
+
+
+@reminders_cli.command("send")
+@click.option("--date", "window_start", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="First day of the window, defaults to today.")
+@click.option("--days", type=int, default=None, help="Length of the window, defaults to HEARING_REMINDER_DAYS.")
+@click.option("--deliver/--no-deliver", default=False,
+              help="Deliver the queued mail now instead of leaving it to the email workers.")
+def send_command(window_start, days, deliver):
+    """Queue this window's hearing digests, one per attorney; safe to run more than once per window."""
+    try:
+        queued, skipped = queue_hearing_digests(window_start.date() if window_start else None, days)
+    except IntegrityError:
+        raise click.ClickException(ALREADY_SENT)
+    except MailgunException as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Queued {queued} hearing digests, {skipped} attorneys already reminded for this window.")
+    if deliver and queued:
+        handled, smtp = email_queue.process_due()
+        email_queue._close(smtp)
+        click.echo(f"Processed {handled} queued emails.")
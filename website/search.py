@@ -0,0 +1,203 @@
+import re
+
+import click
+from flask import current_app
+from sqlalchemy import event, inspect, text, and_, or_, true
+
+from .db import db
+from .models import CaseModel, ClientModel, CaseNoteModel
+
+# Entity name -> (model, indexed columns). Every indexed row is stored as one document in ``search_documents``.
+SEARCHABLE = {
+    "case": (CaseModel, ("case_number", "title", "description")),
+    "client": (ClientModel, ("first_name", "middle_name", "last_name", "email")),
+    "note": (CaseNoteModel, ("note",)),
+}
+SUPPORTED_DIALECTS = ("sqlite", "postgresql")
+MAX_RESULTS = 50
+# Documents are keyed by a single integer so updates and deletes hit the primary key (the rowid on SQLite).
+_KEY_COLUMN = {"sqlite": "rowid", "postgresql": "doc_id"}
+
+# Migration b6e2f0c4d815 creates the table; this copy of its schema is only used by ``create_search_index``.
+_SCHEMA = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_documents USING fts5("
+        "entity UNINDEXED, entity_id UNINDEXED, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    ],
+    "postgresql": [
+        "CREATE TABLE IF NOT EXISTS search_documents ("
+        "doc_id BIGINT PRIMARY KEY, entity VARCHAR(20) NOT NULL, entity_id INTEGER NOT NULL, body TEXT NOT NULL, "
+        "document TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED)",
+        "CREATE INDEX IF NOT EXISTS ix_search_documents_document ON search_documents USING gin (document)",
+    ],
+}
+_listener_installed = False
+
+
+def _dialect(bind):
+    return bind.dialect.name
+
+
+def _doc_id(entity, entity_id):
+    return entity_id * len(SEARCHABLE) + list(SEARCHABLE).index(entity)
+
+
+def _delete_documents(connection, doc_ids):
+    key = _KEY_COLUMN[_dialect(connection)]
+    connection.execute(text(f"DELETE FROM search_documents WHERE {key} = :doc_id"),
+                       [{"doc_id": doc_id} for doc_id in doc_ids])
+
+
+def _insert_documents(connection, documents):
+    key = _KEY_COLUMN[_dialect(connection)]
+    connection.execute(text(f"INSERT INTO search_documents ({key}, entity, entity_id, body) "
+                            f"VALUES (:doc_id, :entity, :entity_id, :body)"), documents)
+
+
+def _document(entity, entity_id, body):
+    return {"doc_id": _doc_id(entity, entity_id), "entity": entity, "entity_id": entity_id, "body": body}
+
+
+def search_enabled(bind=None):
+    bind = bind if bind is not None else db.engine
+    return current_app.config.get("SEARCH_ENABLED", True) and _dialect(bind) in SUPPORTED_DIALECTS
+
+
+def create_search_index():
+    """Create the index table when it is missing, e.g. in a database made with ``create_all`` instead of migrations.
+
+    Runs on its own connection and commits before returning, so the table never disappears with a caller's
+    rolled-back transaction.
+    """
+    with db.engine.begin() as connection:
+        for statement in _SCHEMA[_dialect(connection)]:
+            connection.execute(text(statement))
+
+
+def _terms(query_text):
+    return re.findall(r"\w+", query_text.lower())
+
+
+def prefix_condition(columns, query_text):
+    """Rows where every term of ``query_text`` starts one of ``columns``, case-insensitively.
+
+    Written so the ``lower(column)`` expression indexes can serve it: a ``LIKE 'term%'`` on PostgreSQL (the indexes
+    use ``text_pattern_ops``) and the equivalent range on other databases, where LIKE cannot use an expression index.
+    """
+    conditions = []
+    for term in _terms(query_text):
+        if _dialect(db.engine) == "postgresql":
+            matches = [db.func.lower(column).startswith(term, autoescape=True) for column in columns]
+        else:
+            matches = [and_(db.func.lower(column) >= term, db.func.lower(column) < term + "\U0010ffff")
+                       for column in columns]
+        conditions.append(or_(*matches))
+    return and_(*conditions) if conditions else true()
+
+
+def _match_clause(dialect, query_text):
+    """A prefix-matching full-text condition and rank expression on ``search_documents`` for the given dialect."""
+    terms = _terms(query_text)
+    if dialect == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        return "search_documents MATCH :match", "bm25(search_documents)", match
+    match = " & ".join(f"{term}:*" for term in terms)
+    return ("document @@ to_tsquery('simple', :match)",
+            "-ts_rank(document, to_tsquery('simple', :match))", match)
+
+
+def _document_body(obj, columns):
+    return " ".join(str(getattr(obj, column)) for column in columns if getattr(obj, column))
+
+
+def _index_changes(session, flush_context):
+    connection = session.connection()
+    if not search_enabled(connection):
+        return
+    deletes, upserts = [], []
+    for entity, (model, columns) in SEARCHABLE.items():
+        for obj in session.deleted:
+            if isinstance(obj, model):
+                deletes.append(_doc_id(entity, obj.id))
+        for obj in session.new:
+            if isinstance(obj, model):
+                upserts.append(_document(entity, obj.id, _document_body(obj, columns)))
+        for obj in session.dirty:
+            if isinstance(obj, model) and any(inspect(obj).attrs[column].history.has_changes() for column in columns):
+                upserts.append(_document(entity, obj.id, _document_body(obj, columns)))
+    if not deletes and not upserts:
+        return
+    _delete_documents(connection, deletes + [document["doc_id"] for document in upserts])
+    if upserts:
+        _insert_documents(connection, upserts)
+
+
+def index_rows(entity, rows):
+    """Index rows written with core inserts, which skip the flush hook; ``rows`` are dicts including ``id``."""
+    connection = db.session.connection()
+    if not rows or not search_enabled(connection):
+        return
+    columns = SEARCHABLE[entity][1]
+    _insert_documents(connection, [
+        _document(entity, row["id"], " ".join(str(row[column]) for column in columns if row.get(column)))
+        for row in rows])
+
+
+def matching_ids(entity, query_text):
+    """Ids of ``entity`` rows matching ``query_text`` as a subquery, or None when the index cannot be used."""
+    if not search_enabled() or not _terms(query_text):
+        return None
+    condition, _, match = _match_clause(_dialect(db.engine), query_text)
+    return text(f"SELECT entity_id FROM search_documents WHERE entity = :entity AND {condition}").bindparams(
+        entity=entity, match=match).columns(entity_id=db.Integer)
+
+
+def search(query_text, entities=None, limit=MAX_RESULTS):
+    """Ranked ``(entity, entity_id, rank)`` hits across the indexed entities, best first."""
+    if not search_enabled() or not _terms(query_text):
+        return []
+    entities = [entity for entity in (entities or SEARCHABLE) if entity in SEARCHABLE]
+    condition, rank, match = _match_clause(_dialect(db.engine), query_text)
+    statement = text(f"SELECT entity, entity_id, {rank} AS rank FROM search_documents "
+                     f"WHERE {condition} AND entity IN ({', '.join(f':e{i}' for i in range(len(entities)))}) "
+                     f"ORDER BY rank LIMIT :limit")
+    params = {"match": match, "limit": limit, **{f"e{i}": entity for i, entity in enumerate(entities)}}
+    return [(row.entity, int(row.entity_id), -row.rank) for row in db.session.execute(statement, params)]
+
+
+def rebuild_search_index():
+    """Reindex every searchable row in batches, e.g. after enabling search on an existing database."""
+    create_search_index()
+    connection = db.session.connection()
+    connection.execute(text("DELETE FROM search_documents"))
+    for entity, (model, columns) in SEARCHABLE.items():
+        rows = db.session.query(model.id, *[getattr(model, column) for column in columns]).yield_per(1000)
+        batch = []
+        for row in rows:
+            batch.append(_document(entity, row[0], " ".join(str(value) for value in row[1:] if value)))
+            if len(batch) == 1000:
+                _insert_documents(connection, batch)
+                batch = []
+        if batch:
+            _insert_documents(connection, batch)
+    db.session.commit()
+
+
+@click.group("search")
+def search_cli():
+    """Full-text search index commands."""
+
+
+@search_cli.command("rebuild")
+def rebuild_command():
+    rebuild_search_index()
+    click.echo("Search index rebuilt.")
+
+
+def init_search(app):
+    """Keep the index in step with every flush and register the ``flask search`` commands."""
+    global _listener_installed
+    if not _listener_installed:
+        event.listen(db.session, "after_flush", _index_changes)
+        _listener_installed = True
+    app.cli.add_command(search_cli)
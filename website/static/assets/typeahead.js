@@ -0,0 +1,68 @@
+// Search boxes rendered by TypeaheadWidget: query the lookup endpoint as the user types and keep the chosen ids
+// in the form (a hidden input, or one checked checkbox per row for multiple fields). Results are kept by id; two
+// rows with the same text get their id appended so either can be picked from the list.
+document.querySelectorAll('input[data-typeahead]').forEach(function (search) {
+    var target = document.getElementById(search.dataset.target);
+    var results = document.getElementById(search.getAttribute('list'));
+    var multiple = search.dataset.multiple === 'true';
+    var found = {};
+    var timer = null;
+
+    search.addEventListener('input', function () {
+        var choice = Object.keys(found).map(function (id) { return found[id]; }).filter(function (row) {
+            return row.choice === search.value;
+        })[0];
+        if (choice !== undefined) {
+            pick(choice);
+            return;
+        }
+        if (!multiple) {
+            target.value = '';
+        }
+        clearTimeout(timer);
+        timer = setTimeout(lookup, 200);
+    });
+
+    function lookup() {
+        if (search.value.trim().length < 2) {
+            return;
+        }
+        fetch(search.dataset.typeahead + '?q=' + encodeURIComponent(search.value), {credentials: 'same-origin'})
+            .then(function (response) { return response.json(); })
+            .then(function (data) {
+                var rows = data.results || [];
+                var texts = {};
+                rows.forEach(function (row) { texts[row.text] = (texts[row.text] || 0) + 1; });
+                found = {};
+                results.innerHTML = '';
+                rows.forEach(function (row) {
+                    row.choice = texts[row.text] > 1 ? row.text + ' #' + row.id : row.text;
+                    found[row.id] = row;
+                    var option = document.createElement('option');
+                    option.value = row.choice;
+                    results.appendChild(option);
+                });
+            });
+    }
+
+    function pick(row) {
+        if (!multiple) {
+            target.value = row.id;
+            return;
+        }
+        if (!target.querySelector('input[value="' + row.id + '"]')) {
+            var item = document.createElement('li');
+            var label = document.createElement('label');
+            var checkbox = document.createElement('input');
+            checkbox.type = 'checkbox';
+            checkbox.name = search.dataset.name;
+            checkbox.value = row.id;
+            checkbox.checked = true;
+            label.appendChild(checkbox);
+            label.appendChild(document.createTextNode(' ' + row.text));
+            item.appendChild(label);
+            target.appendChild(item);
+        }
+        search.value = '';
+    }
+});
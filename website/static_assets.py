@@ -0,0 +1,201 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+
+import click
+from flask import current_app, request, send_from_directory, abort
+from flask.sessions import SecureCookieSessionInterface
+
+# Text assets worth precompressing; images and documents are already compressed.
+COMPRESSIBLE = (".js", ".css", ".svg", ".json", ".map", ".txt", ".html")
+# Preferred first when the browser accepts several.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+MANIFEST_NAME = "manifest.json"
+HASH_LENGTH = 12
+_FINGERPRINTED = re.compile(rf"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{{{HASH_LENGTH}}})(?P<suffix>\.[^./]+)$")
+# Never served or fingerprinted as static files: attachments have their own permission-checked route.
+SKIPPED_DIRS = ("attachments", "__pycache__")
+
+
+def _digest(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(64 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()[:HASH_LENGTH]
+
+
+def is_skipped(filename):
+    """Whether ``filename`` resolves into one of ``SKIPPED_DIRS``, however it spells the path (``./``, ``../``)."""
+    return posixpath.normpath("/" + filename.replace("\\", "/")).lstrip("/").split("/", 1)[0] in SKIPPED_DIRS
+
+
+def fingerprinted_name(filename, digest):
+    stem, suffix = os.path.splitext(filename)
+    return f"{stem}.{digest}{suffix}"
+
+
+class _SessionInterface(SecureCookieSessionInterface):
+    """Leaves static responses alone unless the session changed.
+
+    Flask-Login reads the session after every request, which would otherwise add ``Vary: Cookie`` to assets and
+    make browsers drop their cached copy whenever the session cookie changes.
+    """
+
+    def save_session(self, app, session, response):
+        if request.endpoint == "static" and not session.modified:
+            return
+        super().save_session(app, session, response)
+
+
+class StaticAssets:
+    """Content-hashed URLs, year-long immutable caching and precompressed variants for the static folder.
+
+    ``url_for('static', filename='assets/assets.js')`` becomes ``/static/assets/assets.<hash>.js``, so a changed
+    file always gets a new URL and browsers can keep every URL forever without revalidating. Hashes come from the
+    manifest written by ``flask assets build`` when there is one, and are otherwise computed on first use and
+    cached until the file's mtime changes, which also covers photos uploaded while the app runs. A request for an
+    outdated hash still gets the current file, with the normal short cache lifetime.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._hashes = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["static_assets"] = self
+        app.cli.add_command(assets_cli)
+        if not app.config.get("STATIC_FINGERPRINT", True) or not app.static_folder:
+            return
+        self._hashes = self._load_manifest()
+        app.url_defaults(self.fingerprint_url)
+        app.view_functions["static"] = self.send_static
+        if type(app.session_interface) is SecureCookieSessionInterface:
+            app.session_interface = _SessionInterface()
+
+    @property
+    def folder(self):
+        return self.app.static_folder
+
+    def _load_manifest(self):
+        """``{filename: (mtime, hash)}`` from the build manifest, dropping entries whose file changed since."""
+        path = os.path.join(self.folder, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as file:
+            manifest = json.load(file)
+        hashes = {}
+        for filename, (mtime, digest) in manifest.items():
+            source = os.path.join(self.folder, filename)
+            if os.path.exists(source) and os.path.getmtime(source) == mtime:
+                hashes[filename] = (mtime, digest)
+        return hashes
+
+    def digest(self, filename):
+        """The content hash of a static file, or None when it does not exist."""
+        path = os.path.join(self.folder, filename)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        cached = self._hashes.get(filename)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        digest = _digest(path)
+        self._hashes[filename] = (mtime, digest)
+        return digest
+
+    def fingerprint_url(self, endpoint, values):
+        if endpoint != "static" or "filename" not in values:
+            return
+        filename = values["filename"]
+        if is_skipped(filename):
+            return
+        digest = self.digest(filename)
+        if digest:
+            values["filename"] = fingerprinted_name(filename, digest)
+
+    def _precompressed(self, filename):
+        accepted = request.accept_encodings
+        for encoding, extension in ENCODINGS:
+            variant = filename + extension
+            path = os.path.join(self.folder, variant)
+            if accepted[encoding] and os.path.exists(path) and \
+                    os.path.getmtime(path) >= os.path.getmtime(os.path.join(self.folder, filename)):
+                return encoding, variant
+        return None, filename
+
+    def send_static(self, filename):
+        """The static view: resolves fingerprinted names and serves the best precompressed variant."""
+        if is_skipped(filename):
+            abort(404)
+        immutable = False
+        match = _FINGERPRINTED.match(filename)
+        if match and not os.path.exists(os.path.join(self.folder, filename)):
+            filename = match["stem"] + match["suffix"]
+            immutable = self.digest(filename) == match["hash"]
+        encoding, served = self._precompressed(filename) if filename.endswith(COMPRESSIBLE) else (None, filename)
+        max_age = self.app.config.get("STATIC_MAX_AGE", 31536000) if immutable else None
+        response = send_from_directory(self.folder, served, max_age=max_age,
+                                       mimetype=mimetypes.guess_type(filename)[0])
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        if filename.endswith(COMPRESSIBLE):
+            response.vary.add("Accept-Encoding")
+        if immutable:
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+        return response
+
+
+static_assets = StaticAssets()
+
+
+def _compress(path, level):
+    written = []
+    with open(path, "rb") as file:
+        data = file.read()
+    with open(path + ".gz", "wb") as file:
+        file.write(gzip.compress(data, compresslevel=level, mtime=0))
+    written.append(path + ".gz")
+    try:
+        import brotli
+    except ImportError:
+        return written
+    with open(path + ".br", "wb") as file:
+        file.write(brotli.compress(data, quality=11))
+    written.append(path + ".br")
+    return written
+
+
+@click.group("assets")
+def assets_cli():
+    """Static asset commands."""
+
+
+@assets_cli.command("build")
+@click.option("--compress/--no-compress", default=True, help="Write .gz (and .br with brotli installed) variants.")
+def build_command(compress):
+    """Hash every static file into the manifest and precompress the text assets, e.g. as a deploy step."""
+    folder = current_app.static_folder
+    manifest, compressed = {}, 0
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = [name for name in dirs if name not in SKIPPED_DIRS]
+        for name in files:
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, folder).replace(os.sep, "/")
+            if name == MANIFEST_NAME or name.endswith((".gz", ".br", ".py", ".pyc")):
+                continue
+            if compress and name.endswith(COMPRESSIBLE):
+                compressed += len(_compress(path, 9))
+            manifest[filename] = (os.path.getmtime(path), _digest(path))
+    with open(os.path.join(folder, MANIFEST_NAME), "w") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    click.echo(f"Fingerprinted {len(manifest)} static files, wrote {compressed} compressed variants.")
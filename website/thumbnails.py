@@ -0,0 +1,145 @@
+import importlib.util
+import os
+import queue
+import threading
+
+import click
+from flask import url_for
+from flask_uploads import IMAGES
+
+# Variant sizes in pixels, of the shorter side; templates ask for the size they display and get the smallest
+# variant covering it, which stays sharp under ``object-fit: cover`` too.
+THUMBNAIL_SIZES = (64, 256)
+THUMBNAIL_DIR = "thumbs"
+THUMBNAIL_FORMAT = "webp"
+
+
+def thumbnail_name(image, size):
+    """The variant's path below the photos folder, e.g. ``thumbs/0a1b2c-64.webp``."""
+    return f"{THUMBNAIL_DIR}/{os.path.splitext(image)[0]}-{size}.{THUMBNAIL_FORMAT}"
+
+
+class Thumbnails:
+    """Generates downscaled, recompressed WebP variants of uploaded photos on a background thread.
+
+    ``schedule`` only queues the file name, so uploads return as soon as the original is stored. Variants are
+    written to a temporary name and renamed into place, so ``photo_url`` never links a half-written file; until
+    they exist it links the original and asks for them again, which also heals jobs lost with a restarted process.
+    Needs Pillow; without it the originals are always served.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._failed = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.available = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["thumbnails"] = self
+        # Checked once: without Pillow, pages link the originals and never queue work that cannot be done.
+        enabled = app.config.get("THUMBNAILS_ENABLED", True)
+        self.available = enabled and importlib.util.find_spec("PIL") is not None
+        if enabled and not self.available:
+            app.logger.warning("Pillow is not installed, user photos are served without thumbnails")
+        app.add_template_global(self.photo_url)
+        app.cli.add_command(thumbnails_cli)
+
+    @property
+    def folder(self):
+        return self.app.config["UPLOADED_PHOTOS_DEST"]
+
+    def _path(self, name):
+        return os.path.join(self.folder, name)
+
+    def missing(self, image):
+        return [size for size in THUMBNAIL_SIZES if not os.path.exists(self._path(thumbnail_name(image, size)))]
+
+    def schedule(self, image):
+        """Queue ``image`` (a name inside the photos folder) for its variants; repeated calls are ignored."""
+        if not image or not self.available:
+            return
+        with self._lock:
+            if image in self._pending or image in self._failed:
+                return
+            self._pending.add(image)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="thumbnail-worker", daemon=True)
+                self._thread.start()
+        self._queue.put(image)
+
+    def _run(self):
+        while True:
+            image = self._queue.get()
+            try:
+                self.generate(image)
+            except Exception:
+                self.app.logger.exception("Creating thumbnails of %s failed", image)
+                # Not retried by every page showing it; ``flask thumbnails build`` tries again.
+                self._failed.add(image)
+            finally:
+                with self._lock:
+                    self._pending.discard(image)
+
+    def generate(self, image):
+        """Write every missing variant of ``image``; returns the number written."""
+        sizes = self.missing(image)
+        if not self.available or not sizes or not os.path.exists(self._path(image)):
+            return 0
+        from PIL import Image, ImageOps
+        os.makedirs(self._path(THUMBNAIL_DIR), exist_ok=True)
+        quality = self.app.config.get("THUMBNAIL_QUALITY", 80)
+        with Image.open(self._path(image)) as original:
+            # Phone cameras store rotation in EXIF instead of rotating the pixels.
+            original = ImageOps.exif_transpose(original)
+            original = original.convert("RGBA" if original.mode in ("RGBA", "LA", "P") else "RGB")
+            for size in sizes:
+                scale = min(1.0, size / min(original.size))
+                dimensions = (max(1, round(original.width * scale)), max(1, round(original.height * scale)))
+                resized = original.resize(dimensions, Image.Resampling.LANCZOS)
+                target = self._path(thumbnail_name(image, size))
+                partial = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+                resized.save(partial, THUMBNAIL_FORMAT.upper(), quality=quality, method=6)
+                os.replace(partial, target)
+        return len(sizes)
+
+    def photo_url(self, image, size):
+        """URL of the smallest variant of ``image`` at least ``size`` pixels wide, or of the original."""
+        if not self.available:
+            return url_for("static", filename=f"uploads/{image}")
+        for variant in THUMBNAIL_SIZES:
+            if variant >= size:
+                name = thumbnail_name(image, variant)
+                if os.path.exists(self._path(name)):
+                    return url_for("static", filename=f"uploads/{name}")
+                self.schedule(image)
+                break
+        return url_for("static", filename=f"uploads/{image}")
+
+
+thumbnails = Thumbnails()
+
+
+@click.group("thumbnails")
+def thumbnails_cli():
+    """User photo thumbnail commands."""
+
+
+@thumbnails_cli.command("build")
+def build_command():
+    """Create the missing thumbnails of every stored photo, e.g. after adding a size."""
+    if not thumbnails.available:
+        raise click.ClickException("Thumbnails are disabled or Pillow is not installed.")
+    written = 0
+    for name in sorted(os.listdir(thumbnails.folder)):
+        if os.path.isfile(thumbnails._path(name)) and os.path.splitext(name)[1][1:].lower() in IMAGES:
+            try:
+                written += thumbnails.generate(name)
+            except Exception as e:
+                click.echo(f"{name}: {e}", err=True)
+    click.echo(f"Wrote {written} thumbnails.")
@@ -0,0 +1,11 @@
+"""Production entry point: ``gunicorn`` run from this directory serves ``wsgi:app`` with the settings in
+gunicorn.conf.py.
+
+The app is built and every template compiled at import, which gunicorn does once in the master before forking
+(``preload_app``), so workers start ready to serve. ``app.py`` keeps the development server.
+"""
+from website import create_app
+from website.libs.template_cache import preload_templates
+
+app = create_app()
+preload_templates(app)